@@ -19,7 +19,6 @@ import random
 import matplotlib
 matplotlib.use('Agg')  # Or 'Qt5Agg', 'GTK3Agg', etc., depending on what's installed
 import matplotlib.pyplot as plt
-import heapq
 
 # Setup for Jellyfish
 # num_servers = 686
@@ -28,207 +27,33 @@ import heapq
 
 # Initialize Jellyfish topology
 num_switches = 245
-num_ports = 8
+num_ports = 14
 num_servers = 686
 
-jf_topo = topo.Jellyfish(num_servers, num_switches, num_ports)
+jf_topo = topo.Jellyfish(num_switches, num_ports, num_servers)
 
-# TODO: code for reproducing Figure 9 in the jellyfish paper
-# Helper functions
-def dijkstra(start_node, nodes_dict):
-    distances = {node_id: float('inf') for node_id in nodes_dict}
-    distances[start_node.id] = 0
-    priority_queue = [(0, start_node.id)]
-    visited = set()
-
-    while priority_queue:
-        current_distance, current_node_id = heapq.heappop(priority_queue)
-        if current_node_id in visited:
-            continue
-        visited.add(current_node_id)
-
-        current_node = nodes_dict[current_node_id]
-
-        for edge in current_node.edges:
-            neighbor = edge.rnode if edge.lnode == current_node else edge.lnode
-            if neighbor.id not in visited:
-                distance = current_distance + 1
-                if distance < distances[neighbor.id]:
-                    distances[neighbor.id] = distance
-                    heapq.heappush(priority_queue, (distance, neighbor.id))
-
-    return distances
-
-def yen_k_shortest_paths(graph, traffic_pairs, K=8):
-    A = []
-    B = []
-    
-    source = traffic_pairs[0]
-    target = traffic_pairs[1]
-    
-
-    def reconstruct_path(previous_nodes, start, end):
-        path = []
-        current = end
-        while current is not None:
-            path.insert(0, current)
-            current = previous_nodes[current]
-        return path
-
-    def dijkstra_path(graph, source, target):
-        distances, previous_nodes = dijkstra(source, graph)
-        path = reconstruct_path(previous_nodes, source.id, target.id)
-        return path if path[0] == source.id else []
-
-    shortest_path = dijkstra_path(graph, source, target)
-    A.append(shortest_path)
-
-    for k in range(1, K):
-        for i in range(len(A[-1]) - 1):
-            spur_node = A[-1][i]
-            root_path = A[-1][:i+1]
-
-            edges_removed = []
-            for path in A:
-                if len(path) > i and root_path == path[:i+1]:
-                    edge_start = path[i]
-                    edge_end = path[i+1]
-                    for node in graph:
-                        if node.id == edge_start:
-                            try:
-                                edge = next(edge for edge in node.edges if (edge.rnode.id == edge_end or edge.lnode.id == edge_end))
-                                node.edges.remove(edge)
-                                edges_removed.append(edge)
-                            except StopIteration:
-                                continue
-
-            spur_path = dijkstra_path(graph, next(node for node in graph if node.id == spur_node), target)
-
-            if spur_path:
-                total_path = root_path[:-1] + spur_path
-                if total_path not in B:
-                    heapq.heappush(B, (len(total_path), total_path))
-
-            for edge in edges_removed:
-                edge.lnode.edges.append(edge)
-                edge.rnode.edges.append(edge)
-
-        if not B:
-            break
-
-        A.append(heapq.heappop(B)[1])
-
-    return A
-
-def yen_k_ecmp_shortest_paths(graph, traffic_pairs, K=8):
-    A = []
-    B = []
-    
-    source = traffic_pairs[0]
-    target = traffic_pairs[1]
-
-    def reconstruct_path(previous_nodes, start, end):
-        path = []
-        current = end
-        while current is not None:
-            path.insert(0, current)
-            current = previous_nodes[current]
-        return path
-
-    def dijkstra_path(graph, source, target):
-        distances, previous_nodes = dijkstra(source, graph)
-        path = reconstruct_path(previous_nodes, source.id, target.id)
-        return path if path[0] == source.id else []
-
-    shortest_path = dijkstra_path(graph, source, target)
-    A.append(shortest_path)
-
-    for k in range(1, K):
-        for i in range(len(A[-1]) - 1):
-            spur_node = A[-1][i]
-            root_path = A[-1][:i+1]
-
-            edges_removed = []
-            for path in A:
-                if len(path) > i and root_path == path[:i+1]:
-                    edge_start = path[i]
-                    edge_end = path[i+1]
-                    for node in graph:
-                        if node.id == edge_start:
-                            try:
-                                edge = next(edge for edge in node.edges if (edge.rnode.id == edge_end or edge.lnode.id == edge_end))
-                                node.edges.remove(edge)
-                                edges_removed.append(edge)
-                            except StopIteration:
-                                continue
-
-            spur_path = dijkstra_path(graph, next(node for node in graph if node.id == spur_node), target)
-
-            if spur_path:
-                total_path = root_path[:-1] + spur_path
-                if len(total_path) == len(shortest_path) and total_path not in B:
-                    heapq.heappush(B, (len(total_path), total_path))
-
-            for edge in edges_removed:
-                edge.lnode.edges.append(edge)
-                edge.rnode.edges.append(edge)
-
-        if not B:
-            break
-
-        A.append(heapq.heappop(B)[1])
-
-    return A
-
-def dijkstra_path(graph, start, end):
-    shortest_paths = dijkstra(graph, start)
-    path = []
-    node = end
-
-    while node is not None:
-        path.append(node)
-        next_node = shortest_paths[node][0]
-        node = next_node
-
-    path = path[::-1]
-    return path if path[0] == start else None
-
-# Create adjacency list from Jellyfish topology
-graph = {}
-for node in jf_topo.all_nodes:
-    graph[node.id] = {}
-for node in jf_topo.all_nodes:
-    for edge in node.edges:
-        graph[edge.lnode.id][edge.rnode.id] = 1
-        graph[edge.rnode.id][edge.lnode.id] = 1
+# Export the topology to integer-indexed adjacency arrays for the path engine
+indptr, indices, nodes = topo.to_csr(jf_topo)
 
 # Generate random permutation traffic
-servers = [node.id for node in jf_topo.servers]
+servers = [int(i) for i in topo.server_indices(jf_topo, nodes)]
 permutation = servers[:]
 random.shuffle(permutation)
-traffic_pairs = list(zip(servers, permutation))
-
-
-def count_link_occurrences(all_paths):
-    link_occurrences = {}
-    for path in all_paths:
-        links_in_path = list(zip(path, path[1:]))
-        for link in links_in_path:
-            if link not in link_occurrences:
-                link_occurrences[link] = 1
-            else:
-                link_occurrences[link] += 1
-    return link_occurrences
-
-# Evaluate and count paths
-all_paths_8_shortest = yen_k_shortest_paths(graph, traffic_pairs, 8)
-all_paths_8_ecmp = yen_k_ecmp_shortest_paths(graph, traffic_pairs, 8)
-all_paths_64_ecmp = yen_k_ecmp_shortest_paths(graph, traffic_pairs, 64)
-
-# Count link occurrences
-link_occurrences_8_shortest = count_link_occurrences(all_paths_8_shortest)
-link_occurrences_8_ecmp = count_link_occurrences(all_paths_8_ecmp)
-link_occurrences_64_ecmp = count_link_occurrences(all_paths_64_ecmp)
+traffic_pairs = [(src, dst) for src, dst in zip(servers, permutation) if src != dst]
+
+# Evaluate and count paths, each run prints its pairs/second
+link_occurrences_8_shortest = topo.link_path_counts(indptr, indices, traffic_pairs, 8, benchmark=True)
+link_occurrences_8_ecmp = topo.link_path_counts(indptr, indices, traffic_pairs, 8, ecmp=True, benchmark=True)
+link_occurrences_64_ecmp = topo.link_path_counts(indptr, indices, traffic_pairs, 64, ecmp=True, benchmark=True)
+
+# Links used by no path have zero distinct paths
+all_links = set()
+for u in range(len(nodes)):
+    for v in indices[indptr[u]:indptr[u + 1]]:
+        all_links.add((u, int(v)) if u < v else (int(v), u))
+for link_occurrences in (link_occurrences_8_shortest, link_occurrences_8_ecmp, link_occurrences_64_ecmp):
+    for link in all_links:
+        link_occurrences.setdefault(link, 0)
 
 # Rank links
 def rank_links(link_occurrences):
@@ -0,0 +1,67 @@
+"""
+ Copyright 2024 Computer Networks Group @ UPB
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+      https://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+ """
+
+import unittest
+
+import numpy as np
+
+import topo
+
+
+class TestAllPairsHopCounts(unittest.TestCase):
+
+    def check(self, indptr, indices, expected):
+        indptr = np.array(indptr, dtype=np.int64)
+        indices = np.array(indices, dtype=np.int64)
+        sources = np.arange(len(indptr) - 1)
+        for batch_size in (1, 256):
+            dist = topo.all_pairs_hop_counts(indptr, indices, sources,
+                                             batch_size)
+            np.testing.assert_array_equal(dist, np.array(expected))
+
+    def test_trailing_isolated_node(self):
+        # Path 0 - 2 - 1, node 3 has no neighbors.
+        self.check([0, 1, 2, 4, 4], [2, 2, 0, 1],
+                   [[0, 2, 1, -1],
+                    [2, 0, 1, -1],
+                    [1, 1, 0, -1],
+                    [-1, -1, -1, 0]])
+
+    def test_isolated_nodes_in_between(self):
+        # Path 1 - 3 - 4, nodes 0, 2 and 5 have no neighbors.
+        self.check([0, 0, 1, 1, 3, 4, 4], [3, 1, 4, 3],
+                   [[0, -1, -1, -1, -1, -1],
+                    [-1, 0, -1, 1, 2, -1],
+                    [-1, -1, 0, -1, -1, -1],
+                    [-1, 1, -1, 0, 1, -1],
+                    [-1, 2, -1, 1, 0, -1],
+                    [-1, -1, -1, -1, -1, 0]])
+
+    def test_matches_networkx(self):
+        indptr, indices, nodes = topo.to_csr(topo.Fattree(4))
+        graph = topo.nx.Graph()
+        graph.add_nodes_from(range(len(nodes)))
+        for i in range(len(nodes)):
+            graph.add_edges_from((i, j) for j in indices[indptr[i]:indptr[i + 1]])
+        sources = [0, 5]
+        dist = topo.all_pairs_hop_counts(indptr, indices, sources)
+        for row, source in enumerate(sources):
+            lengths = topo.nx.single_source_shortest_path_length(graph, source)
+            for node in range(len(nodes)):
+                self.assertEqual(lengths.get(node, -1), dist[row, node])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,7 +16,11 @@
 
 
 import random
+import heapq
+import time
+import multiprocessing
 import networkx as nx
+import numpy as np
 
 # Class for an edge in the graph
 class Edge:
@@ -208,3 +212,392 @@ class DCell:
 # dcell_network.visualize()
 
 
+# Compact, array-backed alternative to Node/Edge for large topologies.
+# Nodes are numbered 0..n-1, the adjacency of node i is the set
+# adjacency[i], so neighbor tests and edge removal are O(1). Node records
+# only keep an id and a type.
+class CompactNode:
+    __slots__ = ('id', 'type')
+
+    def __init__(self, id, type):
+        self.id = id
+        self.type = type
+
+class CompactTopology:
+    def __init__(self):
+        self.nodes = []
+        self.adjacency = []
+        self.servers = []
+        self.switches = []
+
+    # Add a node and return its index
+    def add_node(self, id, type):
+        self.nodes.append(CompactNode(id, type))
+        self.adjacency.append(set())
+        return len(self.nodes) - 1
+
+    def add_edge(self, u, v):
+        self.adjacency[u].add(v)
+        self.adjacency[v].add(u)
+
+    def remove_edge(self, u, v):
+        self.adjacency[u].discard(v)
+        self.adjacency[v].discard(u)
+
+    def is_neighbor(self, u, v):
+        return v in self.adjacency[u]
+
+    def num_edges(self):
+        return sum(len(neighbors) for neighbors in self.adjacency) // 2
+
+    # CSR adjacency arrays, see to_csr
+    def to_csr(self):
+        indptr = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+        np.cumsum([len(neighbors) for neighbors in self.adjacency], out=indptr[1:])
+        indices = np.fromiter((v for neighbors in self.adjacency for v in sorted(neighbors)),
+                              dtype=np.int64, count=int(indptr[-1]))
+        return indptr, indices
+
+class CompactJellyfish(CompactTopology):
+    def __init__(self, num_switches, num_ports, num_servers):
+        super().__init__()
+        self.switches = [self.add_node(f"Switch{i}", "switch") for i in range(num_switches)]
+        self.servers = [self.add_node(f"Server{i}", "server") for i in range(num_servers)]
+        self.generate_topology(num_ports)
+
+    def generate_topology(self, num_ports):
+        # Connect servers to switches, the first switches take the extra servers
+        servers_per_switch = len(self.servers) // len(self.switches)
+        extra_servers = len(self.servers) % len(self.switches)
+        free_ports = {}
+        server_index = 0
+        for i, switch in enumerate(self.switches):
+            count = servers_per_switch + (i < extra_servers)
+            for server in self.servers[server_index:server_index + count]:
+                self.add_edge(switch, server)
+            server_index += count
+            free_ports[switch] = num_ports - count
+
+        # Randomly connect switches with free ports. Switches are kept in a
+        # list with swap-removal, so every step is O(1) and the whole build
+        # is linear in the number of ports.
+        free = [switch for switch in self.switches if free_ports[switch] > 0]
+        position = {switch: i for i, switch in enumerate(free)}
+        links = []    # switch-to-switch links, for the final rewiring
+        link_position = {}
+
+        def drop(switch):
+            i = position.pop(switch)
+            last = free.pop()
+            if last != switch:
+                free[i] = last
+                position[last] = i
+
+        def connect(u, v):
+            self.add_edge(u, v)
+            link_position[(u, v)] = len(links)
+            links.append((u, v))
+            for switch in (u, v):
+                free_ports[switch] -= 1
+                if free_ports[switch] == 0:
+                    drop(switch)
+
+        def disconnect(u, v):
+            self.remove_edge(u, v)
+            if (u, v) not in link_position:
+                u, v = v, u
+            i = link_position.pop((u, v))
+            last = links.pop()
+            if last != (u, v):
+                links[i] = last
+                link_position[last] = i
+            for switch in (u, v):
+                if free_ports[switch] == 0:
+                    position[switch] = len(free)
+                    free.append(switch)
+                free_ports[switch] += 1
+
+        failures = 0
+        while len(free) >= 2:
+            s1, s2 = random.sample(free, 2)
+            if not self.is_neighbor(s1, s2):
+                connect(s1, s2)
+                failures = 0
+                continue
+            failures += 1
+            # Stop once the remaining free switches are pairwise connected
+            if failures > 4 * len(free) and all(self.is_neighbor(u, v) for i, u in enumerate(free) for v in free[i + 1:]):
+                break
+
+        # As in the Jellyfish paper, a switch p left with two or more free
+        # ports replaces a random link (x, y) with the links (p, x), (p, y).
+        for p in list(free):
+            attempts = 0
+            while free_ports[p] >= 2 and links and attempts < 4 * len(links):
+                attempts += 1
+                x, y = random.choice(links)
+                if p in (x, y) or self.is_neighbor(p, x) or self.is_neighbor(p, y):
+                    continue
+                disconnect(x, y)
+                connect(p, x)
+                connect(p, y)
+
+class CompactFattree(CompactTopology):
+    def __init__(self, k):
+        super().__init__()
+        self.k = k
+        self.generate_fattree(k)
+
+    def generate_fattree(self, k):
+        half = k // 2
+        cores = [self.add_node(f"Core{i}", "core") for i in range(half * half)]
+        self.switches.extend(cores)
+        for p in range(k):
+            aggs = [self.add_node(f"Agg{p}-{a}", "agg") for a in range(half)]
+            edges = [self.add_node(f"Edge{p}-{e}", "edge") for e in range(half)]
+            self.switches.extend(aggs)
+            self.switches.extend(edges)
+            for e, edge in enumerate(edges):
+                for h in range(half):
+                    host = self.add_node(f"Host{p}-{e}-{h}", "host")
+                    self.servers.append(host)
+                    self.add_edge(edge, host)
+                for agg in aggs:
+                    self.add_edge(edge, agg)
+            # Aggregation switch i of every pod connects to cores i*k/2 .. (i+1)*k/2-1
+            for i, agg in enumerate(aggs):
+                for j in range(half):
+                    self.add_edge(agg, cores[i * half + j])
+
+
+# Collect every node of a Jellyfish/Fattree/BCube/DCell or compact instance
+def topology_nodes(topology):
+    if isinstance(topology, CompactTopology):
+        return topology.nodes
+    if hasattr(topology, 'all_nodes'):
+        return list(topology.all_nodes)
+    if hasattr(topology, 'nodes'):
+        return list(topology.nodes.values())
+    return list(topology.servers) + list(topology.switches)
+
+# Export a topology to a CSR adjacency.
+# Nodes are numbered by their position in the returned node list (node ids
+# are not unique in every topology, e.g. DCell), the neighbors of node i are
+# indices[indptr[i]:indptr[i + 1]].
+def to_csr(topology):
+    if isinstance(topology, CompactTopology):
+        indptr, indices = topology.to_csr()
+        return indptr, indices, topology.nodes
+    nodes = topology_nodes(topology)
+    index = {id(node): i for i, node in enumerate(nodes)}
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    neighbors = []
+    for i, node in enumerate(nodes):
+        for edge in node.edges:
+            neighbor = edge.rnode if edge.lnode is node else edge.lnode
+            neighbors.append(index[id(neighbor)])
+        indptr[i + 1] = len(neighbors)
+    indices = np.array(neighbors, dtype=np.int64)
+    return indptr, indices, nodes
+
+# Indices of the servers of a topology in the node list returned by to_csr
+def server_indices(topology, nodes):
+    if isinstance(topology, CompactTopology):
+        return np.array(topology.servers, dtype=np.int64)
+    index = {id(node): i for i, node in enumerate(nodes)}
+    return np.array([index[id(server)] for server in topology.servers], dtype=np.int64)
+
+# Unweighted hop counts from every source to every node, -1 if unreachable.
+# The BFS runs for a batch of sources at once: the frontier is a boolean
+# (batch x nodes) matrix, and the next frontier of node v is the OR of the
+# frontier over the neighbors of v, computed with one reduceat per level.
+def all_pairs_hop_counts(indptr, indices, sources, batch_size=256):
+    num_nodes = len(indptr) - 1
+    sources = np.asarray(sources, dtype=np.int64)
+    dist = np.full((len(sources), num_nodes), -1, dtype=np.int32)
+    if len(indices) == 0:
+        dist[np.arange(len(sources)), sources] = 0
+        return dist
+    # reduceat only runs over nodes with neighbors: the segment of a node
+    # ends where the next one starts, so empty rows would cut it short.
+    has_neighbors = np.diff(indptr) > 0
+    starts = indptr[:-1][has_neighbors]
+
+    for begin in range(0, len(sources), batch_size):
+        batch = sources[begin:begin + batch_size]
+        rows = np.arange(len(batch))
+        frontier = np.zeros((len(batch), num_nodes), dtype=bool)
+        frontier[rows, batch] = True
+        visited = frontier.copy()
+        batch_dist = dist[begin:begin + len(batch)]
+        batch_dist[rows, batch] = 0
+        level = 0
+        while frontier.any():
+            level += 1
+            reached = np.zeros_like(frontier)
+            reached[:, has_neighbors] = np.logical_or.reduceat(
+                frontier[:, indices], starts, axis=1)
+            frontier = reached & ~visited
+            visited |= frontier
+            batch_dist[frontier] = level
+    return dist
+
+# Histogram of the shortest path lengths between all ordered server pairs:
+# histogram[l] is the number of pairs l hops apart. Unreachable pairs are
+# not counted.
+def path_length_histogram(topology, batch_size=256):
+    indptr, indices, nodes = to_csr(topology)
+    servers = server_indices(topology, nodes)
+    dist = all_pairs_hop_counts(indptr, indices, servers, batch_size)[:, servers]
+    lengths = dist[dist > 0]
+    if len(lengths) == 0:
+        return np.zeros(1, dtype=np.int64)
+    return np.bincount(lengths)
+
+def _trial_histogram(args):
+    factory, factory_args, seed = args
+    random.seed(seed)
+    return path_length_histogram(factory(*factory_args))
+
+# Build `trials` random instances with factory(*factory_args) and return the
+# path length histogram of each. Trials run in a process pool, every trial
+# gets its own random seed so that forked workers do not repeat topologies.
+def path_length_histograms(factory, factory_args, trials, processes=None, seed=None):
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    jobs = [(factory, factory_args, seed + trial) for trial in range(trials)]
+    if processes == 1 or trials == 1:
+        return [_trial_histogram(job) for job in jobs]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(_trial_histogram, jobs)
+
+
+# Integer-indexed graph used by the path enumerators below. Adjacency is kept
+# as Python lists (faster than NumPy for scalar access in BFS), removed edges
+# and nodes are masked instead of being taken out of the graph.
+class PathGraph:
+    def __init__(self, indptr, indices):
+        self.indptr = [int(i) for i in indptr]
+        self.indices = [int(i) for i in indices]
+        self.num_nodes = len(self.indptr) - 1
+        # Position of the directed edge (u, v) in indices
+        self.position = {}
+        for u in range(self.num_nodes):
+            for pos in range(self.indptr[u], self.indptr[u + 1]):
+                self.position[(u, self.indices[pos])] = pos
+        self.node_mask = [False] * self.num_nodes
+        self.edge_mask = [False] * len(self.indices)
+
+    # Shortest path from source to target by BFS, skipping masked nodes and
+    # edges. Returns a list of node indices or None.
+    def bfs_path(self, source, target):
+        indptr, indices = self.indptr, self.indices
+        node_mask, edge_mask = self.node_mask, self.edge_mask
+        previous = {source: None}
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for u in frontier:
+                for pos in range(indptr[u], indptr[u + 1]):
+                    v = indices[pos]
+                    if edge_mask[pos] or node_mask[v] or v in previous:
+                        continue
+                    previous[v] = u
+                    if v == target:
+                        path = [v]
+                        while previous[path[-1]] is not None:
+                            path.append(previous[path[-1]])
+                        path.reverse()
+                        return path
+                    next_frontier.append(v)
+            frontier = next_frontier
+        return None
+
+    # Yen's k shortest loopless paths from source to target.
+    # With ecmp=True only paths as short as the shortest one are returned
+    # (k-way ECMP). Paths are tuples of node indices.
+    def k_shortest_paths(self, source, target, k, ecmp=False):
+        if source == target:
+            return [(source,)]
+        first = self.bfs_path(source, target)
+        if first is None:
+            return []
+        paths = [tuple(first)]
+        candidates = []        # heap of (length, path)
+        seen = {paths[0]}      # paths in either paths or candidates
+        while len(paths) < k:
+            last = paths[-1]
+            for i in range(len(last) - 1):
+                spur_node = last[i]
+                root = last[:i + 1]
+                masked_edges = []
+                for path in paths:
+                    if path[:i + 1] == root:
+                        pos = self.position[(path[i], path[i + 1])]
+                        if not self.edge_mask[pos]:
+                            self.edge_mask[pos] = True
+                            masked_edges.append(pos)
+                for node in root[:-1]:
+                    self.node_mask[node] = True
+
+                spur = self.bfs_path(spur_node, target)
+
+                for node in root[:-1]:
+                    self.node_mask[node] = False
+                for pos in masked_edges:
+                    self.edge_mask[pos] = False
+
+                if spur is not None:
+                    candidate = root[:-1] + tuple(spur)
+                    if ecmp and len(candidate) > len(paths[0]):
+                        continue
+                    if candidate not in seen:
+                        seen.add(candidate)
+                        heapq.heappush(candidates, (len(candidate), candidate))
+            if not candidates:
+                break
+            paths.append(heapq.heappop(candidates)[1])
+        return paths
+
+_worker_graph = None
+
+def _init_worker(indptr, indices):
+    global _worker_graph
+    _worker_graph = PathGraph(indptr, indices)
+
+# Count the distinct paths over every link for a chunk of (source, target)
+# pairs, links are undirected (u, v) with u < v.
+def _count_links(args):
+    pairs, k, ecmp = args
+    counts = {}
+    for source, target in pairs:
+        for path in _worker_graph.k_shortest_paths(source, target, k, ecmp):
+            for u, v in zip(path, path[1:]):
+                link = (u, v) if u < v else (v, u)
+                counts[link] = counts.get(link, 0) + 1
+    return counts
+
+# Number of distinct paths crossing each link for a whole traffic matrix.
+# pairs holds (source, target) node indices in the CSR numbering of to_csr,
+# the result maps undirected links (u, v), u < v, to their path count.
+# The pairs are split into chunks that run in a process pool; with
+# benchmark=True the throughput in pairs/second is printed.
+def link_path_counts(indptr, indices, pairs, k, ecmp=False, processes=None, chunk_size=16, benchmark=False):
+    pairs = [(int(source), int(target)) for source, target in pairs]
+    chunks = [(pairs[i:i + chunk_size], k, ecmp) for i in range(0, len(pairs), chunk_size)]
+    start_time = time.time()
+    if processes == 1:
+        _init_worker(indptr, indices)
+        results = [_count_links(chunk) for chunk in chunks]
+    else:
+        with multiprocessing.Pool(processes, _init_worker, (indptr, indices)) as pool:
+            results = pool.map(_count_links, chunks)
+    counts = {}
+    for result in results:
+        for link, count in result.items():
+            counts[link] = counts.get(link, 0) + count
+    elapsed = time.time() - start_time
+    if benchmark:
+        mode = f"{k}-way ECMP" if ecmp else f"{k} shortest paths"
+        print(f"{mode}: {len(pairs)} pairs in {elapsed:.2f} seconds ({len(pairs) / elapsed:.1f} pairs/second)")
+    return counts
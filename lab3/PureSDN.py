@@ -1,18 +1,24 @@
 
 # clear && sudo ryu-manager PureSDN.py  /home/ubuntu/sdn/sources/flowmanager/flowmanager.py  --k_paths=4 --weight=bw --fanout=4 --observe-links --ofp-tcp-listen-port 6633
 
+import time
+
+import networkx as nx
+
 from ryu import cfg
 from ryu.base import app_manager
 from ryu.controller import ofp_event
 from ryu.controller.handler import MAIN_DISPATCHER, DEAD_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
+from ryu.lib import hub
 from ryu.lib.packet import packet
 from ryu.lib.packet import ethernet
 from ryu.lib.packet import arp
 from ryu.lib.packet import ipv4
 from ryu.lib.packet import tcp
 from ryu.lib.packet import udp
+from ryu.lib.packet import ether_types
 
 import network_awareness
 import network_monitor
@@ -37,6 +43,9 @@ class ShortestForwarding(app_manager.RyuApp):
 
 	WEIGHT_MODEL = {'hop': 'weight', 'bw': 'bw'}
 
+	# Priority of the proactive entries, below the reactive ones.
+	PROACTIVE_PRIORITY = 20
+
 	def __init__(self, *args, **kwargs):
 		super(ShortestForwarding, self).__init__(*args, **kwargs)
 		self.name = "shortest_forwarding"
@@ -44,6 +53,17 @@ class ShortestForwarding(app_manager.RyuApp):
 		self.monitor = kwargs["network_monitor"]
 		self.datapaths = {}
 		self.weight = self.WEIGHT_MODEL[CONF.weight]
+		self.proactive = CONF.proactive
+		self.forwarding_tables = {}   # Installed proactively, {dpid:{ip_dst:out_port,},}
+		self.tables_version = None    # (topology_version, access_version) of forwarding_tables
+		self.next_hops = {}   # Towards each destination switch, {dst_sw:{dpid:out_port,},}
+		self.next_hops_version = None    # topology_version of next_hops
+		self.packet_in_count = 0
+		self.packet_in_rate = 0.0     # unit: packet-in/s
+		self.packet_in_thread = hub.spawn(self._packet_in_rate_loop)
+		self.ecmp = CONF.ecmp
+		self.groups = {}   # ECMP select groups, {dpid:{(out_port,):[group_id, (weight,)],},}
+		self.group_thread = hub.spawn(self._group_weight_loop)
 
 	@set_ev_cls(ofp_event.EventOFPStateChange, [MAIN_DISPATCHER, DEAD_DISPATCHER])
 	def _state_change_handler(self, ev):
@@ -55,18 +75,51 @@ class ShortestForwarding(app_manager.RyuApp):
 			if not datapath.id in self.datapaths:
 				self.logger.debug('register datapath: %016x', datapath.id)
 				self.datapaths[datapath.id] = datapath
+				if self.ecmp:
+					# Start from an empty group table, group ids are reused.
+					ofproto = datapath.ofproto
+					datapath.send_msg(datapath.ofproto_parser.OFPGroupMod(
+						datapath, ofproto.OFPGC_DELETE, 0, ofproto.OFPG_ALL))
+				if self.proactive:
+					self.tables_version = None
+					self.update_forwarding_tables()
 		elif ev.state == DEAD_DISPATCHER:
 			if datapath.id in self.datapaths:
 				self.logger.debug('unregister datapath: %016x', datapath.id)
 				del self.datapaths[datapath.id]
+				# The entries are gone with the switch, reinstall them on return.
+				self.forwarding_tables.pop(datapath.id, None)
+				self.tables_version = None
+				self.groups.pop(datapath.id, None)
+
+	@set_ev_cls(network_awareness.EventNetworkChanged)
+	def network_changed_handler(self, ev):
+		"""
+			Bring the proactive flow entries up to date with the network.
+		"""
+		if self.proactive:
+			self.update_forwarding_tables()
+
+	def _packet_in_rate_loop(self):
+		"""
+			Measure the packet-in rate, in reactive and proactive mode alike.
+		"""
+		while True:
+			count, start = self.packet_in_count, time.time()
+			hub.sleep(setting.MONITOR_PERIOD)
+			self.packet_in_rate = (self.packet_in_count - count) / (time.time() - start)
+			if self.packet_in_rate:
+				self.logger.info("[PACKET-IN] %.1f/s (%s)", self.packet_in_rate,
+								 'proactive' if self.proactive else 'reactive')
 
 	@set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
 	def _packet_in_handler(self, ev):
 		'''
 			In packet_in handler, we need to learn access_table by ARP and IP packets.
 		'''
+		self.packet_in_count += 1
 		msg = ev.msg
-		pkt = packet.Packet(msg.data)
+		pkt = packet.get_packet(msg)
 		arp_pkt = pkt.get_protocol(arp.arp)
 		ip_pkt = pkt.get_protocol(ipv4.ipv4)
 
@@ -76,13 +129,16 @@ class ShortestForwarding(app_manager.RyuApp):
 
 		if isinstance(ip_pkt, ipv4.ipv4):
 			self.logger.debug("IPV4 processing")
-			if len(pkt.get_protocols(ethernet.ethernet)):
-				eth_type = pkt.get_protocols(ethernet.ethernet)[0].ethertype
+			eth = pkt.get_protocol(ethernet.ethernet)
+			if eth:
+				eth_type = eth.ethertype
 				self.shortest_forwarding(msg, eth_type, ip_pkt.src, ip_pkt.dst)
 
-	def add_flow(self, dp, priority, match, actions, idle_timeout=0, hard_timeout=0):
+	def add_flow(self, dp, priority, match, actions, idle_timeout=0, hard_timeout=0, batch=None):
 		"""
 			Send a flow entry to datapath.
+			If batch is given, the flow mod is collected in it instead,
+			batch = {dpid:[msg,],}, see send_batch.
 		"""
 		ofproto = dp.ofproto
 		parser = dp.ofproto_parser
@@ -91,7 +147,35 @@ class ShortestForwarding(app_manager.RyuApp):
 								idle_timeout=idle_timeout,
 								hard_timeout=hard_timeout,
 								match=match, instructions=inst)
-		dp.send_msg(mod)
+		if batch is None:
+			dp.send_msg(mod)
+		else:
+			batch.setdefault(dp.id, []).append(mod)
+
+	def del_flow(self, dp, priority, match, batch=None):
+		"""
+			Delete the flow entry with exactly this priority and match.
+		"""
+		ofproto = dp.ofproto
+		parser = dp.ofproto_parser
+		mod = parser.OFPFlowMod(datapath=dp, command=ofproto.OFPFC_DELETE_STRICT,
+								priority=priority, match=match,
+								out_port=ofproto.OFPP_ANY, out_group=ofproto.OFPG_ANY)
+		if batch is None:
+			dp.send_msg(mod)
+		else:
+			batch.setdefault(dp.id, []).append(mod)
+
+	def send_batch(self, datapaths, batch):
+		"""
+			Send the collected flow mods of every datapath in one go,
+			followed by a barrier request.
+			batch = {dpid:[msg,],}
+		"""
+		for dpid, msgs in batch.items():
+			datapath = datapaths[dpid]
+			msgs.append(datapath.ofproto_parser.OFPBarrierRequest(datapath))
+			datapath.send_msgs(msgs)
 
 	def _build_packet_out(self, datapath, buffer_id, src_port, dst_port, data):
 		"""
@@ -125,13 +209,14 @@ class ShortestForwarding(app_manager.RyuApp):
 		"""
 			Get access port of dst host.
 			access_table = {(sw,port):(ip, mac),}
+			The lookup goes through the ip index of network awareness
+			instead of scanning access_table.
 		"""
 		if access_table:
-			if isinstance(access_table.values()[0], tuple):
-				for key in access_table.keys():
-					if dst_ip == access_table[key][0]:   # Use the IP address only, not the MAC address. (hmc)
-						dst_port = key[1]
-						return dst_port
+			location = self.awareness.ip_to_location.get(dst_ip)   # Use the IP address only, not the MAC address. (hmc)
+			if location in access_table:
+				dst_port = location[1]
+				return dst_port
 		return None
 
 	def get_port_pair_from_link(self, link_to_port, src_dpid, dst_dpid):
@@ -157,7 +242,7 @@ class ShortestForwarding(app_manager.RyuApp):
 
 		for dpid in self.awareness.access_ports:
 			for port in self.awareness.access_ports[dpid]:
-				if (dpid, port) not in self.awareness.access_table.keys():
+				if (dpid, port) not in self.awareness.access_table:
 					datapath = self.datapaths[dpid]
 					out = self._build_packet_out(
 						datapath, ofproto.OFP_NO_BUFFER,
@@ -208,24 +293,23 @@ class ShortestForwarding(app_manager.RyuApp):
             Syntax
             dictionary.get(keyname, value)
 		"""
+		# Paths of the pair are computed on the first lookup, then cached.
+		paths = self.awareness.get_shortest_paths(src, dst)
+		if not paths:
+			self.logger.info("No path between %s and %s" % (src, dst))
+			return None
 		shortest_paths = self.awareness.shortest_paths      # {dpid:{dpid:[[path],],},}
 		# Create bandwidth-sensitive datapath graph.
 		graph = self.awareness.graph
 
 		if weight == self.WEIGHT_MODEL['hop']:
-			print("weight")
-			print("src switch = ",src, " shortest_paths.get(src) as # {dpid:{dpid:[[path],],},} \n",shortest_paths.get(src))
-			print("dst switch = ",dst, " shortest_paths.get(dst) ",shortest_paths.get(dst))
-			print("src dst switch  shortest_paths.get(src).get(dst)  ",shortest_paths.get(src).get(dst))
-			print("src dst switch  shortest_paths.get(src).get(dst)[0]  ",shortest_paths.get(src).get(dst)[0])
-			return shortest_paths.get(src).get(dst)[0]
+			return paths[0]
 		elif weight == self.WEIGHT_MODEL['bw']:
-			print("bw")
 			# Because all paths will be calculated when we call self.monitor.get_best_path_by_bw,
 			# so we just need to call it once in a period, and then, we can get path directly.
 			# If path is existed just return it, else calculate and return it.
 			try:
-				path = self.monitor.best_paths.get(src).get(dst)
+				path = self.monitor.best_paths.get(src)[dst]
 				return path
 			except:
 				result = self.monitor.get_best_path_by_bw(graph, shortest_paths)
@@ -256,16 +340,18 @@ class ShortestForwarding(app_manager.RyuApp):
 		else:
 			return None
 
-	def send_flow_mod(self, datapath, flow_info, src_port, dst_port):
+	def send_flow_mod(self, datapath, flow_info, src_port, dst_port, batch=None, actions=None):
 		"""
 			Build flow entry, and send it to datapath.
 			flow_info = (eth_type, src_ip, dst_ip, in_port)
 			or
 			flow_info = (eth_type, src_ip, dst_ip, in_port, ip_proto, Flag, L4_port)
+			The entry outputs to dst_port, unless other actions are given.
 		"""
 		parser = datapath.ofproto_parser
-		actions = []
-		actions.append(parser.OFPActionOutput(dst_port))
+		if actions is None:
+			actions = []
+			actions.append(parser.OFPActionOutput(dst_port))
 		if len(flow_info) == 7:
 			if flow_info[-3] == 6:
 				if flow_info[-2] == 'src':
@@ -301,7 +387,7 @@ class ShortestForwarding(app_manager.RyuApp):
 			pass
 
 		self.add_flow(datapath, 30, match, actions,
-					  idle_timeout=5, hard_timeout=10)
+					  idle_timeout=5, hard_timeout=10, batch=batch)
 
 	def install_flow(self, datapaths, link_to_port, path, flow_info, buffer_id, data=None):
 		'''
@@ -317,6 +403,8 @@ class ShortestForwarding(app_manager.RyuApp):
 		in_port = flow_info[3]
 		first_dp = datapaths[path[0]]
 		out_port = first_dp.ofproto.OFPP_LOCAL
+		# Flow mods are collected per datapath and sent together.
+		batch = {}
 
 		# Install flow entry for intermediate datapaths.
 		for i in range(1, int((len(path) - 1) / 2)):
@@ -325,7 +413,7 @@ class ShortestForwarding(app_manager.RyuApp):
 			if port and port_next:
 				src_port, dst_port = port[1], port_next[0]
 				datapath = datapaths[path[i]]
-				self.send_flow_mod(datapath, flow_info, src_port, dst_port)
+				self.send_flow_mod(datapath, flow_info, src_port, dst_port, batch=batch)
 
 		#  Install flow entry for the first datapath.
 		print("link_to_port ",link_to_port)#," path[0] ", path[0], " path[1] ",path[1])
@@ -351,19 +439,260 @@ class ShortestForwarding(app_manager.RyuApp):
 				actions=[]
 				actions.append(parser.OFPActionOutput(port_local))                    
 				self.add_flow(datapaths[sw_id_local], 77, match_ip, actions,
-                        idle_timeout=60, hard_timeout=0)                    
+                        idle_timeout=60, hard_timeout=0, batch=batch)
 				self.add_flow(datapaths[sw_id_local], 77, match_arp, actions,
-                        idle_timeout=60, hard_timeout=0)  
+                        idle_timeout=60, hard_timeout=0, batch=batch)
+			self.send_batch(datapaths, batch)
 			return
 		port_pair = self.get_port_pair_from_link(link_to_port, path[0], path[1])
 		if port_pair is None:
 			self.logger.info("Port not found in first hop.")
+			self.send_batch(datapaths, batch)
 			return
 		out_port = port_pair[0]
-		self.send_flow_mod(first_dp, flow_info, in_port, out_port)
+		self.send_flow_mod(first_dp, flow_info, in_port, out_port, batch=batch)
+		self.send_batch(datapaths, batch)
 		# Send packet_out to the first datapath.
 		self.send_packet_out(first_dp, buffer_id, in_port, out_port, data)
 
+	def get_next_hops(self, dst_sw):
+		"""
+			Get the output port of every switch towards dst_sw.
+			Next hops come from one shortest path tree per destination switch,
+			so the tables of all switches agree and don't loop.
+			They are cached until the topology changes.
+		"""
+		if self.next_hops_version != self.awareness.topology_version:
+			self.next_hops = {}
+			self.next_hops_version = self.awareness.topology_version
+		next_hops = self.next_hops.get(dst_sw)
+		if next_hops is None:
+			next_hops = {}
+			graph = self.awareness.graph
+			link_to_port = self.awareness.link_to_port
+			if dst_sw in graph:
+				# Paths from dst_sw in the reversed graph end at each switch.
+				paths = nx.single_source_dijkstra_path(
+					graph.reverse(copy=False), dst_sw, weight='weight')
+				for dpid, path in paths.items():
+					if len(path) > 1 and (dpid, path[-2]) in link_to_port:
+						next_hops[dpid] = link_to_port[(dpid, path[-2])][0]
+			self.next_hops[dst_sw] = next_hops
+		return next_hops
+
+	def compile_forwarding_tables(self, ips=None):
+		"""
+			Compile destination-based forwarding tables for all switches,
+			two-level like fat-tree routing tables:
+			hosts are reached through their access port on their own switch,
+			elsewhere through the next hop towards their switch.
+			With ips, only the entries of these hosts are compiled.
+			tables = {dpid:{ip_dst:out_port,},}
+		"""
+		tables = dict((dpid, {}) for dpid in self.awareness.switches)
+		if ips is None:
+			hosts = [(location, ip) for location, (ip, mac)
+					 in self.awareness.access_table.items()]
+		else:
+			ip_to_location = self.awareness.ip_to_location
+			hosts = [(ip_to_location[ip], ip) for ip in ips if ip in ip_to_location]
+		for (dst_sw, port), ip in hosts:
+			if dst_sw not in tables:
+				continue
+			tables[dst_sw][ip] = port
+			for dpid, out_port in self.get_next_hops(dst_sw).items():
+				if dpid in tables:
+					tables[dpid][ip] = out_port
+		return tables
+
+	def update_forwarding_tables(self):
+		"""
+			Install the compiled forwarding tables in bulk.
+			Only entries which differ from the installed ones are sent,
+			so a link change only rewrites the routes it moved.
+			When only hosts were learned or moved since the installed
+			tables, only their entries are compiled and compared.
+		"""
+		version = (self.awareness.topology_version, self.awareness.access_version)
+		if version == self.tables_version:
+			return
+		changed = None
+		if self.tables_version is not None and self.tables_version[0] == version[0]:
+			changed = self.awareness.get_access_changes(self.tables_version[1])
+		tables = self.compile_forwarding_tables(changed)
+		batch = {}
+		installed_tables = {}
+		for dpid, table in tables.items():
+			datapath = self.datapaths.get(dpid)
+			if datapath is None:
+				continue
+			parser = datapath.ofproto_parser
+			installed = self.forwarding_tables.get(dpid, {})
+			if changed is None:
+				ips = set(table) | set(installed)
+			else:
+				ips = changed
+			for ip in ips:
+				out_port = table.get(ip)
+				if out_port is None:
+					if installed.pop(ip, None) is not None:
+						match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=ip)
+						self.del_flow(datapath, self.PROACTIVE_PRIORITY, match, batch=batch)
+				elif installed.get(ip) != out_port:
+					match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=ip)
+					actions = [parser.OFPActionOutput(out_port)]
+					self.add_flow(datapath, self.PROACTIVE_PRIORITY, match, actions, batch=batch)
+					installed[ip] = out_port
+			installed_tables[dpid] = installed
+		self.send_batch(self.datapaths, batch)
+		self.forwarding_tables = installed_tables
+		self.tables_version = version
+		self.logger.info("[PROACTIVE] %d flow entries sent to %d switches",
+						 sum(len(msgs) - 1 for msgs in batch.values()), len(batch))
+
+	def proactive_forwarding(self, msg, ip_dst):
+		"""
+			Forward a packet which raced the proactive entries of its destination.
+			Return False if the destination is not routed yet.
+		"""
+		self.update_forwarding_tables()
+		datapath = msg.datapath
+		out_port = self.forwarding_tables.get(datapath.id, {}).get(ip_dst)
+		if out_port is None:
+			return False
+		self.send_packet_out(datapath, msg.buffer_id, msg.match['in_port'],
+							 out_port, msg.data)
+		return True
+
+	def get_ecmp_paths(self, src, dst):
+		"""
+			Get the equal-cost paths among the k shortest paths from src to dst.
+		"""
+		paths = self.awareness.get_shortest_paths(src, dst)
+		if not paths or src == dst:
+			return paths[:1]
+		return [path for path in paths if len(path) == len(paths[0])]
+
+	def get_bucket_weights(self, dpid, out_ports):
+		"""
+			Get bucket weights of a select group. With bandwidth monitoring
+			they follow the free bandwidth of the ports, quantized to
+			setting.ECMP_WEIGHT_LEVELS levels so that small load changes
+			don't rewrite the group; otherwise all buckets are equal.
+		"""
+		if self.weight != self.WEIGHT_MODEL['bw']:
+			return tuple(1 for port in out_ports)
+		free_bandwidth = self.monitor.free_bandwidth.get(dpid, {})
+		bws = [free_bandwidth.get(port) or 0 for port in out_ports]
+		if not max(bws):
+			return tuple(1 for port in out_ports)
+		return tuple(max(1, int(round(setting.ECMP_WEIGHT_LEVELS * bw / max(bws))))
+					 for bw in bws)
+
+	def send_group_mod(self, datapath, command, group_id, out_ports, weights, batch=None):
+		"""
+			Build a select group with one bucket per output port, and send it to datapath.
+			Buckets watch their port, so traffic leaves dead ports at once.
+		"""
+		ofproto = datapath.ofproto
+		parser = datapath.ofproto_parser
+		buckets = [parser.OFPBucket(weight=weight, watch_port=port,
+									actions=[parser.OFPActionOutput(port)])
+				   for port, weight in zip(out_ports, weights)]
+		mod = parser.OFPGroupMod(datapath, command, ofproto.OFPGT_SELECT,
+								 group_id, buckets)
+		if batch is None:
+			datapath.send_msg(mod)
+		else:
+			batch.setdefault(datapath.id, []).append(mod)
+
+	def get_ecmp_actions(self, datapath, out_ports, batch=None):
+		"""
+			Get actions spreading packets over out_ports.
+			A select group is created for each set of output ports of a datapath,
+			and shared by all flows leaving through that set.
+		"""
+		parser = datapath.ofproto_parser
+		if len(out_ports) == 1:
+			return [parser.OFPActionOutput(out_ports[0])]
+		key = tuple(sorted(out_ports))
+		groups = self.groups.setdefault(datapath.id, {})
+		weights = self.get_bucket_weights(datapath.id, key)
+		if key not in groups:
+			groups[key] = [len(groups) + 1, weights]
+			self.send_group_mod(datapath, datapath.ofproto.OFPGC_ADD,
+								groups[key][0], key, weights, batch=batch)
+		elif groups[key][1] != weights:
+			groups[key][1] = weights
+			self.send_group_mod(datapath, datapath.ofproto.OFPGC_MODIFY,
+								groups[key][0], key, weights, batch=batch)
+		return [parser.OFPActionGroup(groups[key][0])]
+
+	def _group_weight_loop(self):
+		"""
+			Follow the free bandwidth of ports with the bucket weights of
+			ECMP groups.
+		"""
+		while self.ecmp and self.weight == self.WEIGHT_MODEL['bw']:
+			hub.sleep(setting.MONITOR_PERIOD)
+			batch = {}
+			for dpid, groups in self.groups.items():
+				datapath = self.datapaths.get(dpid)
+				if datapath is None:
+					continue
+				for key in list(groups):
+					self.get_ecmp_actions(datapath, key, batch=batch)
+			self.send_batch(self.datapaths, batch)
+
+	def install_ecmp_flow(self, datapaths, link_to_port, paths, flow_info, buffer_id, data=None):
+		"""
+			Install flow entries along all equal-cost paths.
+			Where the paths fork, the entry points to a select group,
+			so the data plane spreads traffic without further packet-ins.
+			paths=[[dpid1, dpid2, ...],]
+			Return False if a link of the paths is unknown.
+		"""
+		next_hops = {}   # next_hops = {dpid:[next_dpid,],}
+		in_ports = {paths[0][0]: set([flow_info[3]])}   # in_ports = {dpid:set(port_no,),}
+		for path in paths:
+			for i in range(len(path) - 1):
+				port_pair = link_to_port.get((path[i], path[i+1]))
+				if port_pair is None:
+					return False
+				hops = next_hops.setdefault(path[i], [])
+				if path[i+1] not in hops:
+					hops.append(path[i+1])
+				in_ports.setdefault(path[i+1], set()).add(port_pair[1])
+
+		batch = {}
+		first_actions = None
+		for dpid, hops in next_hops.items():
+			datapath = datapaths[dpid]
+			out_ports = [link_to_port[(dpid, hop)][0] for hop in hops]
+			actions = self.get_ecmp_actions(datapath, out_ports, batch=batch)
+			for in_port in in_ports[dpid]:
+				self.send_flow_mod(datapath, flow_info, in_port, None,
+								   batch=batch, actions=actions)
+			if dpid == paths[0][0]:
+				first_actions = actions
+		# Deliver to the destination host from the last datapath.
+		last = paths[0][-1]
+		dst_port = self.get_port(flow_info[2], self.awareness.access_table)
+		if dst_port:
+			for in_port in in_ports[last]:
+				self.send_flow_mod(datapaths[last], flow_info, in_port, dst_port, batch=batch)
+		self.send_batch(datapaths, batch)
+
+		# Send packet_out to the first datapath, through its group.
+		first_dp = datapaths[paths[0][0]]
+		if buffer_id != first_dp.ofproto.OFP_NO_BUFFER or data is not None:
+			out = first_dp.ofproto_parser.OFPPacketOut(
+				datapath=first_dp, buffer_id=buffer_id, in_port=flow_info[3],
+				actions=first_actions,
+				data=data if buffer_id == first_dp.ofproto.OFP_NO_BUFFER else None)
+			first_dp.send_msg(out)
+		return True
+
 	def get_L4_info(self, tcp_pkt, udp_pkt, ip_proto, L4_port, Flag):
 		"""
 			Get ip_proto and L4 port number.
@@ -398,10 +727,13 @@ class ShortestForwarding(app_manager.RyuApp):
 			flow_info = (eth_type, src_ip, dst_ip, in_port)
 			or
 			flow_info = (eth_type, ip_src, ip_dst, in_port, ip_proto, Flag, L4_port)
+			In proactive mode, no per-flow entries are installed.
 		"""
+		if self.proactive and self.proactive_forwarding(msg, ip_dst):
+			return
 		datapath = msg.datapath
 		in_port = msg.match['in_port']
-		pkt = packet.Packet(msg.data)
+		pkt = packet.get_packet(msg)
 		tcp_pkt = pkt.get_protocol(tcp.tcp)
 		udp_pkt = pkt.get_protocol(udp.udp)
 		ip_proto = None
@@ -429,6 +761,13 @@ class ShortestForwarding(app_manager.RyuApp):
 				else:
 					self.logger.info("[PATH]%s<-->%s: %s" % (ip_src, ip_dst, path))
 					flow_info = (eth_type, ip_src, ip_dst, in_port)
+				# Spread the flow over equal-cost paths if there are several.
+				if self.ecmp:
+					paths = self.get_ecmp_paths(src_sw, dst_sw)
+					if len(paths) > 1 and self.install_ecmp_flow(
+							self.datapaths, self.awareness.link_to_port,
+							paths, flow_info, msg.buffer_id, msg.data):
+						return
 				# Install flow entries to datapaths along the path.
 				self.install_flow(self.datapaths,
 								  self.awareness.link_to_port,
@@ -9,3 +9,18 @@ MONITOR_PERIOD = 5   # For monitoring traffic
 TOSHOW = True	   # For showing information in terminal
 
 MAX_CAPACITY = 10000   # Max capacity of link, Kbit/s
+
+STATS_WINDOW = 5   # Samples kept per port and per flow
+
+MONITOR_JITTER = 0.2   # Randomize stats requests by this fraction of their slot
+
+POLL_INTERVAL_MAX = 4   # Max poll cycles between stats requests of a steady port
+
+POLL_VARIATION = 0.1   # Speed variation above which a port is polled every cycle
+
+METRICS_WINDOW = 100   # Samples kept of reply latency and poll cycle duration
+
+STATS_IDLE_TIMEOUT = (POLL_INTERVAL_MAX + 2) * MONITOR_PERIOD   # Forget flows unseen for this long
+
+ECMP_WEIGHT_LEVELS = 10   # Levels of bucket weights of bandwidth-weighted ECMP groups
+ACCESS_CHANGES_MAX = 1024   # Access table changes kept for get_access_changes
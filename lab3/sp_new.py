@@ -13,7 +13,7 @@ from ryu.lib.packet import packet
 from ryu.lib.packet import ethernet
 from ryu.lib.packet import ipv4
 
-from ryu.topology.api import get_switch, get_link
+from ryu.topology.api import get_topology
 from ryu.app.wsgi import ControllerBase
 from ryu.topology import event, switches
 
@@ -30,7 +30,9 @@ class TopoLearning(app_manager.RyuApp):
         self.topo_list = []
         self.datapaths = {}
         self.link_to_port = {}
+        self.topology_version = None
         self.access_table = {} #{sw :[host1_ip,host2_ip,host3_ip,host4_ip]}
+        self.ip_to_location = {} #{host_ip:(sw, port)}
         self.ARP_table = {}
    
     @set_ev_cls(ofp_event.EventOFPStateChange,
@@ -71,15 +73,15 @@ class TopoLearning(app_manager.RyuApp):
 
     @set_ev_cls(event.EventSwitchEnter)
     def get_topology_data(self, ev):
-        switch_list = get_switch(self.topology_api_app, None)  
-        self.switches=[switch.dp.id for switch in switch_list]
+        topology = get_topology(self.topology_api_app)
+        if topology.version == self.topology_version:
+            return
+        self.topology_version = topology.version
+        self.switches = list(topology.switches)
         #print "switches"
         #print self.switches
        
-        links_list = get_link(self.topology_api_app, None)
-        #print "links_list"
-        #print links_list
-        links={(link.src.dpid,link.dst.dpid):(link.src.port_no,link.dst.port_no) for link in links_list}
+        links = dict(topology.link_ports)
         #print "links"
         #print links
         self.link_to_port = links
@@ -117,6 +119,7 @@ class TopoLearning(app_manager.RyuApp):
             self.ARP_table[ip_list[i]] = mac_list[i]
         for sw in switch_list:
             self.access_table[(sw, 1)] = ip_list[sw - 1]
+            self.ip_to_location[ip_list[sw - 1]] = (sw, 1)
         return self.access_table
 
  
@@ -190,10 +193,7 @@ class TopoLearning(app_manager.RyuApp):
             actions = []
             src_port = self.get_link2port(path[-2], path[-1])[1]
 
-            for key in self.access_table.keys():
-                if flow_info[2] == self.access_table[key]:
-                    dst_port = key[1]
-                    break
+            dst_port = self.ip_to_location[flow_info[2]][1]
             actions.append(parser.OFPActionOutput(dst_port))
             match = parser.OFPMatch(
                 in_port=src_port,
@@ -214,10 +214,8 @@ class TopoLearning(app_manager.RyuApp):
 
             datapath_first.send_msg(out)
         else:
-            for key in self.access_table.keys():
-                if flow_info[2] == self.access_table[key]:
-                    out_port = key[1]
-                    break
+            if flow_info[2] in self.ip_to_location:
+                out_port = self.ip_to_location[flow_info[2]][1]
             actions.append(parser.OFPActionOutput(out_port))
             match = parser.OFPMatch(
                 in_port=in_port,
@@ -285,9 +283,9 @@ class TopoLearning(app_manager.RyuApp):
         return path
 
     def findEdgeSwitch(self,host_ip):#get tor_dpid
-        for key in self.access_table.keys():
-            if self.access_table[key] == host_ip:
-                return key[0]
+        location = self.ip_to_location.get(host_ip)
+        if location:
+            return location[0]
 #####################################################################
        
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)    
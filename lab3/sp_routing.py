@@ -24,7 +24,7 @@ from ryu.controller.handler import set_ev_cls
 from ryu.lib.packet import packet, ethernet, ipv4, arp, ether_types
 from ryu.ofproto import ofproto_v1_3
 from ryu.topology import event, switches
-from ryu.topology.api import get_switch, get_link
+from ryu.topology.api import get_topology
 from collections import defaultdict, deque
 
 import network_awareness
@@ -46,14 +46,17 @@ class SPRouter(app_manager.RyuApp):
         self.mac_to_port = {}
         self.switches = {}
         self.network = defaultdict(dict)
+        self.topology_version = None
         self.arp_table = {}  # ARP table for IP to MAC resolution
 
     @set_ev_cls(event.EventSwitchEnter)
     def get_topology_data(self, ev):
-        switch_list = get_switch(self, None)
-        self.switches = {switch.dp.id: switch.dp for switch in switch_list}
-        links_list = get_link(self, None)
-        self.network = self.create_network(links_list)
+        topology = get_topology(self)
+        if topology.version == self.topology_version:
+            return
+        self.topology_version = topology.version
+        self.switches = {dpid: switch.dp for dpid, switch in topology.switches.items()}
+        self.network = self.create_network(topology.links)
         logging.info("Topology data acquired: %s", self.network)
 
     def create_network(self, links_list):
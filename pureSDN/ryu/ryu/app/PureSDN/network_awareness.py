@@ -16,12 +16,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import deque
+
 import networkx as nx
 import matplotlib.pyplot as plt
 import time
 
 from ryu import cfg
 from ryu.base import app_manager
+from ryu.controller import event as ryu_event
 from ryu.controller import ofp_event
 from ryu.controller.handler import MAIN_DISPATCHER
 from ryu.controller.handler import CONFIG_DISPATCHER
@@ -33,7 +36,8 @@ from ryu.lib.packet import ipv4
 from ryu.lib.packet import arp
 from ryu.lib import hub
 from ryu.topology import event
-from ryu.topology.api import get_switch, get_link
+from ryu.topology.api import get_topology as get_topology_snapshot
+from ryu.topology.api import get_topology_changes
 
 import setting
 
@@ -41,6 +45,157 @@ import setting
 CONF = cfg.CONF
 
 
+class PathStore(object):
+	"""
+		PathStore caches k shortest paths between datapaths.
+		Paths of a (src, dst) pair are computed on the first lookup, and
+		a topology change only drops the pairs it can affect:
+		- a removed link or node drops the pairs whose paths traverse it,
+		- an added link drops the pairs it could offer a shorter path to.
+		Dropped pairs are recomputed on their next lookup.
+		self.paths = {dpid:{dpid:[[path],],},}
+		self.stats = {'hit': n, 'miss': n, 'recompute': n}
+		self.version is bumped whenever pairs are added or dropped.
+		self.added lists the pairs added since the last update, in order.
+	"""
+
+	def __init__(self, compute, k, weight='weight'):
+		self.compute = compute      # compute(graph, src, dst) -> [[path],]
+		self.k = k
+		self.weight = weight
+		self.graph = nx.DiGraph()
+		self.paths = {}
+		self.link_index = {}        # {(src_dpid,dst_dpid):set((src,dst),),}
+		self.node_index = {}        # {dpid:set((src,dst),),}
+		self.dirty = set()          # Pairs dropped by a topology change.
+		self.stats = {'hit': 0, 'miss': 0, 'recompute': 0}
+		self.version = 0
+		self.added = []
+
+	def get(self, src, dst):
+		"""
+			Get k shortest paths from src to dst, computing them if needed.
+		"""
+		if src not in self.graph or dst not in self.graph:
+			return []
+		pair_paths = self.paths.get(src, {}).get(dst)
+		if pair_paths is not None:
+			self.stats['hit'] += 1
+			return pair_paths
+		if (src, dst) in self.dirty:
+			self.dirty.discard((src, dst))
+			self.stats['recompute'] += 1
+		else:
+			self.stats['miss'] += 1
+		if src == dst:
+			pair_paths = [[src] for i in range(self.k)]
+		else:
+			pair_paths = self.compute(self.graph, src, dst) or []
+		self._add(src, dst, pair_paths)
+		return pair_paths
+
+	def update(self, graph):
+		"""
+			Replace the graph and drop the pairs affected by the difference
+			between the old and the new graph.
+		"""
+		self.added = []
+		old_graph = self.graph
+		self.graph = graph
+		removed_nodes = [node for node in old_graph if node not in graph]
+		removed_links = [(src, dst) for (src, dst) in old_graph.edges()
+						 if src != dst and not graph.has_edge(src, dst)]
+		added_links = [(src, dst) for (src, dst) in graph.edges()
+					   if src != dst and not old_graph.has_edge(src, dst)]
+
+		for node in removed_nodes:
+			for pair in list(self.node_index.get(node, ())):
+				self._drop(pair)
+			for pair in [pair for pair in self.dirty if node in pair]:
+				self.dirty.discard(pair)
+		for link in removed_links:
+			for pair in list(self.link_index.get(link, ())):
+				self._drop(pair)
+		for link in added_links:
+			self._drop_improvable(link)
+
+	def _drop_improvable(self, link):
+		"""
+			Drop the pairs whose paths could be replaced by one through link.
+			A path src -> u -> v -> dst through link (u, v) can only enter
+			the k shortest paths if it is not longer than the k-th cached one.
+		"""
+		(u, v) = link
+		if not self.paths:
+			return
+		cost = self.graph[u][v].get(self.weight, 1)
+		to_u = nx.single_source_dijkstra_path_length(
+			self.graph.reverse(copy=False), u, weight=self.weight)
+		from_v = nx.single_source_dijkstra_path_length(
+			self.graph, v, weight=self.weight)
+		for src in list(self.paths.keys()):
+			if src not in to_u:
+				continue
+			for dst in list(self.paths[src].keys()):
+				if src == dst or dst not in from_v:
+					continue
+				pair_paths = self.paths[src][dst]
+				if len(pair_paths) < self.k:
+					self._drop((src, dst))
+				elif to_u[src] + cost + from_v[dst] <= self._cost(pair_paths[-1]):
+					self._drop((src, dst))
+
+	def _cost(self, path):
+		return sum(self.graph[path[i]][path[i+1]].get(self.weight, 1)
+				   for i in range(len(path) - 1)
+				   if self.graph.has_edge(path[i], path[i+1]))
+
+	def _add(self, src, dst, pair_paths):
+		self.version += 1
+		self.added.append((src, dst))
+		self.paths.setdefault(src, {})
+		self.paths[src][dst] = pair_paths
+		for path in pair_paths:
+			for node in path:
+				self.node_index.setdefault(node, set()).add((src, dst))
+			for i in range(len(path) - 1):
+				link = (path[i], path[i+1])
+				self.link_index.setdefault(link, set()).add((src, dst))
+
+	def _drop(self, pair):
+		(src, dst) = pair
+		pair_paths = self.paths.get(src, {}).pop(dst, None)
+		if pair_paths is None:
+			return
+		self.version += 1
+		if not self.paths[src]:
+			del self.paths[src]
+		for path in pair_paths:
+			for node in path:
+				self._unindex(self.node_index, node, pair)
+			for i in range(len(path) - 1):
+				self._unindex(self.link_index, (path[i], path[i+1]), pair)
+		if src in self.graph and dst in self.graph:
+			self.dirty.add(pair)
+
+	def _unindex(self, index, key, pair):
+		pairs = index.get(key)
+		if pairs is not None:
+			pairs.discard(pair)
+			if not pairs:
+				del index[key]
+
+
+class EventNetworkChanged(ryu_event.EventBase):
+	"""
+		Raised by NetworkAwareness after its topology or access table changed.
+	"""
+	def __init__(self, topology_version, access_version):
+		super(EventNetworkChanged, self).__init__()
+		self.topology_version = topology_version
+		self.access_version = access_version
+
+
 class NetworkAwareness(app_manager.RyuApp):
 	"""
 		NetworkAwareness is a Ryu app for discovering topology information.
@@ -49,6 +204,7 @@ class NetworkAwareness(app_manager.RyuApp):
 		interior_ports, topology graph and shortest paths.
 	"""
 	OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
+	_EVENTS = [EventNetworkChanged]
 
 	# List the event list should be listened.
 	events = [event.EventSwitchEnter,
@@ -62,11 +218,21 @@ class NetworkAwareness(app_manager.RyuApp):
 		self.name = "awareness"
 		self.link_to_port = {}                 # {(src_dpid,dst_dpid):(src_port,dst_port),}
 		self.access_table = {}                # {(sw,port):(ip, mac),}
+		self.access_version = 0               # bumped whenever access_table changes
+		# (access_version, (ip,)) of the latest access table changes
+		self.access_changes = deque(maxlen=setting.ACCESS_CHANGES_MAX)
+		self.ip_to_location = {}              # {ip:(sw,port),}
+		self.mac_to_location = {}             # {mac:(sw,port),}
 		self.switch_port_table = {}      # {dpid:set(port_num,),}
 		self.access_ports = {}                # {dpid:set(port_num,),}
 		self.interior_ports = {}              # {dpid:set(port_num,),}
 		self.switches = []                         # self.switches = [dpid,]
-		self.shortest_paths = {}            # {dpid:{dpid:[[path],],},}
+		self.topology_version = None               # version of the topology snapshot in use
+		self.topology_seen = None                  # version of the last topology snapshot read
+		# Paths are computed lazily by self.path_store, see get_shortest_paths.
+		self.path_store = PathStore(self._compute_k_shortest_paths,
+									CONF.k_paths, weight='weight')
+		self.shortest_paths = self.path_store.paths   # {dpid:{dpid:[[path],],},}
 		self.pre_link_to_port = {}
 		self.pre_access_table = {}
 
@@ -84,6 +250,7 @@ class NetworkAwareness(app_manager.RyuApp):
 		i = 0
 		while True:
 			self.show_topology()
+			self.logger.debug("path store stats: %s", self.path_store.stats)
 			if i == 2:   # Reload topology every 20 seconds.
 				self.get_topology(None)
 				i = 0
@@ -125,7 +292,7 @@ class NetworkAwareness(app_manager.RyuApp):
 		msg = ev.msg
 		datapath = msg.datapath
 		in_port = msg.match['in_port']
-		pkt = packet.Packet(msg.data)
+		pkt = packet.get_packet(msg)
 		arp_pkt = pkt.get_protocol(arp.arp)
 		ip_pkt = pkt.get_protocol(ipv4.ipv4)
 
@@ -136,7 +303,7 @@ class NetworkAwareness(app_manager.RyuApp):
 			self.register_access_info(datapath.id, in_port, arp_src_ip, mac)
 		elif ip_pkt:
 			ip_src_ip = ip_pkt.src
-			eth = pkt.get_protocols(ethernet.ethernet)[0]
+			eth = pkt.get_protocol(ethernet.ethernet)
 			mac = eth.src
 			# Record the access infomation.
 			self.register_access_info(datapath.id, in_port, ip_src_ip, mac)
@@ -154,33 +321,75 @@ class NetworkAwareness(app_manager.RyuApp):
 		if present_time - self.start_time < self.initiation_delay:
 			return
 
+		# Nothing to do if the topology has not changed since the last call.
+		topology = get_topology_snapshot(self.topology_api_app)
+		if topology.version == self.topology_seen:
+			return
+		changes = None
+		if self.topology_seen is not None:
+			changes = get_topology_changes(self.topology_api_app, self.topology_seen)
+		self.topology_seen = topology.version
+		# Hosts found by the switches app don't change the datapath graph.
+		if changes is not None and all(
+				isinstance(ev, (event.EventHostAdd, event.EventHostMove))
+				for ev in changes):
+			return
+		self.topology_version = topology.version
+
 		self.logger.info("[GET NETWORK TOPOLOGY]")
-		switch_list = get_switch(self.topology_api_app, None)
+		switch_list = list(topology.switches.values())
 		self.create_port_map(switch_list)
 		self.switches = [sw.dp.id for sw in switch_list]
-		links = get_link(self.topology_api_app, None)
-		self.create_interior_links(links)
+		self.create_interior_links(topology.links)
 		self.create_access_ports()
 		self.graph = self.get_graph(self.link_to_port.keys())
-		self.shortest_paths = self.all_k_shortest_paths(
-			self.graph, weight='weight', k=CONF.k_paths)
+		# Only the paths affected by the topology change are dropped,
+		# they are recomputed on their next lookup.
+		self.path_store.update(self.graph)
+		self.send_event_to_observers(
+			EventNetworkChanged(self.topology_version, self.access_version))
+
+	def get_shortest_paths(self, src, dst):
+		"""
+			Get k shortest paths from src to dst datapath.
+			Paths are computed on the first lookup and cached until
+			a topology change affects them.
+		"""
+		return self.path_store.get(src, dst)
+
+	def _compute_k_shortest_paths(self, graph, src, dst):
+		return self.k_shortest_paths(graph, src, dst,
+									 weight='weight', k=CONF.k_paths)
 
 	def get_host_location(self, host_ip):
 		"""
 			Get host location info ((datapath, port)) according to the host ip.
-			self.access_table = {(sw,port):(ip, mac),}
+			self.ip_to_location = {ip:(sw,port),}
 		"""
-		for key in self.access_table.keys():
-			if self.access_table[key][0] == host_ip:
-				return key
-		self.logger.info("%s location is not found." % host_ip)
-		return None
+		location = self.ip_to_location.get(host_ip)
+		if location is None:
+			self.logger.info("%s location is not found." % host_ip)
+		return location
+
+	def get_host_location_by_mac(self, host_mac):
+		"""
+			Get host location info ((datapath, port)) according to the host mac.
+			self.mac_to_location = {mac:(sw,port),}
+		"""
+		return self.mac_to_location.get(host_mac)
 
 	def get_graph(self, link_list):
 		"""
 			Get Adjacency matrix from link_to_port.
 		"""
 		_graph = self.graph.copy()
+		# Remove the links and switches which have gone away.
+		for (src, dst) in list(_graph.edges()):
+			if src != dst and (src, dst) not in link_list:
+				_graph.remove_edge(src, dst)
+		for node in list(_graph.nodes()):
+			if node not in self.switches:
+				_graph.remove_node(node)
 		for src in self.switches:
 			for dst in self.switches:
 				if src == dst:
@@ -191,6 +400,17 @@ class NetworkAwareness(app_manager.RyuApp):
 					pass
 		return _graph
 
+	@set_ev_cls(event.EventLinkDiscoveryConverged)
+	def discovery_converged_handler(self, ev):
+		"""
+			Link discovery has converged, so the topology can be read
+			without waiting for the rest of the initiation delay.
+		"""
+		self.logger.info("Topology discovered in %.2f s, %d links.",
+						 ev.time_to_topology, ev.links)
+		self.initiation_delay = 0
+		self.get_topology(None)
+
 	def get_initiation_delay(self, fanout):
 		"""
 			Get initiation delay.
@@ -222,6 +442,8 @@ class NetworkAwareness(app_manager.RyuApp):
 			Get links' srouce port to dst port  from link_list.
 			link_to_port = {(src_dpid,dst_dpid):(src_port,dst_port),}
 		"""
+		# Rebuild the table, so that deleted links are dropped.
+		self.link_to_port = {}
 		for link in link_list:
 			src = link.src
 			dst = link.dst
@@ -281,18 +503,56 @@ class NetworkAwareness(app_manager.RyuApp):
 	def register_access_info(self, dpid, in_port, ip, mac):
 		"""
 			Register access host info into access table.
+			ip_to_location and mac_to_location are kept consistent
+			with access_table, so that lookups need not scan it.
+			Observers get an EventNetworkChanged when the table changes.
 		"""
 		if in_port in self.access_ports[dpid]:
-			if (dpid, in_port) in self.access_table:
-				if self.access_table[(dpid, in_port)] == (ip, mac):
+			location = (dpid, in_port)
+			if location in self.access_table:
+				if self.access_table[location] == (ip, mac):
 					return
 				else:
-					self.access_table[(dpid, in_port)] = (ip, mac)
-					return
+					old_ip = self.access_table[location][0]
+					self._unindex_access_info(location)
+					self.access_table[location] = (ip, mac)
+					self._index_access_info(location)
+					ips = (old_ip, ip)
 			else:
-				self.access_table.setdefault((dpid, in_port), None)
-				self.access_table[(dpid, in_port)] = (ip, mac)
-				return
+				self.access_table[location] = (ip, mac)
+				self._index_access_info(location)
+				ips = (ip,)
+			self.access_version += 1
+			self.access_changes.append((self.access_version, ips))
+			self.send_event_to_observers(
+				EventNetworkChanged(self.topology_version, self.access_version))
+
+	def get_access_changes(self, version):
+		"""
+			Get the set of host IPs whose location changed since the
+			access table version, or None if the changes are no longer kept.
+		"""
+		if version == self.access_version:
+			return set()
+		changes = self.access_changes
+		if (version > self.access_version or not changes or
+				changes[0][0] > version + 1):
+			return None
+		return set(ip for (v, ips) in changes if v > version for ip in ips)
+
+	def _index_access_info(self, location):
+		(ip, mac) = self.access_table[location]
+		self.ip_to_location[ip] = location
+		self.mac_to_location[mac] = location
+
+	def _unindex_access_info(self, location):
+		# Only drop entries which still point to this location, the host
+		# may have been registered at another port since.
+		(ip, mac) = self.access_table[location]
+		if self.ip_to_location.get(ip) == location:
+			del self.ip_to_location[ip]
+		if self.mac_to_location.get(mac) == location:
+			del self.mac_to_location[mac]
 
 	def show_topology(self):
 		if self.pre_link_to_port != self.link_to_port and setting.TOSHOW:
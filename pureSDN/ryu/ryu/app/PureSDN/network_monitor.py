@@ -17,9 +17,13 @@
 # limitations under the License.
 
 from __future__ import division
-import copy
+import random
+import time
+from collections import deque
 from operator import attrgetter
 
+import numpy as np
+
 from ryu import cfg
 from ryu.base import app_manager
 from ryu.base.app_manager import lookup_service_brick
@@ -35,6 +39,277 @@ import setting
 CONF = cfg.CONF
 
 
+class StatsStore(object):
+	"""
+		Ring buffers of counter samples with one row per key.
+		Samples live in preallocated NumPy arrays, so memory only depends
+		on the number of live keys and the window. Rows of keys that stop
+		reporting are recycled by evict().
+	"""
+	def __init__(self, fields, window=5, capacity=1024):
+		self.fields = dict((field, i) for i, field in enumerate(fields))
+		self.window = window
+		self.rows = {}   # self.rows = {key:row,}
+		self.keys = []   # self.keys = [key or None,], indexed by row.
+		self.free_rows = []
+		self.values = np.zeros((capacity, window, len(fields)))
+		self.times = np.zeros((capacity, window))
+		self.head = np.zeros(capacity, dtype=np.intp)
+		self.count = np.zeros(capacity, dtype=np.intp)
+		self.last_seen = np.zeros(capacity)
+
+	def __len__(self):
+		return len(self.rows)
+
+	def __contains__(self, key):
+		return key in self.rows
+
+	def _grow(self):
+		capacity = 2 * len(self.head)
+		for name in ('values', 'times', 'head', 'count', 'last_seen'):
+			old = getattr(self, name)
+			new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+			new[:len(old)] = old
+			setattr(self, name, new)
+
+	def _row(self, key):
+		row = self.rows.get(key)
+		if row is None:
+			if self.free_rows:
+				row = self.free_rows.pop()
+				self.keys[row] = key
+			else:
+				row = len(self.keys)
+				if row == len(self.head):
+					self._grow()
+				self.keys.append(key)
+			self.rows[key] = row
+			self.head[row] = 0
+			self.count[row] = 0
+		return row
+
+	def update(self, keys, values, times, now):
+		"""
+			Append one sample per key and return the rows of the keys.
+			values holds one tuple per key in field order, times the
+			sample times in seconds and now the time of collection.
+		"""
+		rows = np.array([self._row(key) for key in keys], dtype=np.intp)
+		if len(rows):
+			pos = self.head[rows]
+			self.values[rows, pos] = values
+			self.times[rows, pos] = times
+			self.head[rows] = (pos + 1) % self.window
+			self.count[rows] = np.minimum(self.count[rows] + 1, self.window)
+			self.last_seen[rows] = now
+		return rows
+
+	def rates(self, rows, field, default_period=None):
+		"""
+			Rate of change of field between the two newest samples of each row.
+			Rows holding one sample are measured from zero over default_period.
+		"""
+		i = self.fields[field]
+		head = self.head[rows]
+		last = (head - 1) % self.window
+		prev = (head - 2) % self.window
+		now = self.values[rows, last, i]
+		single = self.count[rows] < 2
+		pre = np.where(single, 0, self.values[rows, prev, i])
+		period = np.where(single, default_period or 0,
+						  self.times[rows, last] - self.times[rows, prev])
+		with np.errstate(divide='ignore', invalid='ignore'):
+			return np.where(period != 0, (now - pre) / period, 0.0)
+
+	def variation(self, rows, field):
+		"""
+			Coefficient of variation of the rate of field over the window of
+			each row. Rows with fewer than three samples vary infinitely.
+		"""
+		i = self.fields[field]
+		order = (self.head[rows, None] + np.arange(self.window)) % self.window
+		values = self.values[rows[:, None], order, i]
+		times = self.times[rows[:, None], order]
+		valid = np.arange(self.window) >= (self.window - self.count[rows])[:, None]
+		elapsed = np.diff(times, axis=1)
+		pairs = valid[:, :-1] & (elapsed != 0)
+		rates = np.where(pairs, np.diff(values, axis=1) / np.where(pairs, elapsed, 1), 0)
+		n = np.maximum(pairs.sum(axis=1), 1)
+		mean = rates.sum(axis=1) / n
+		std = np.sqrt((np.where(pairs, rates - mean[:, None], 0) ** 2).sum(axis=1) / n)
+		with np.errstate(divide='ignore', invalid='ignore'):
+			cv = np.where(mean != 0, std / np.abs(mean), np.where(std == 0, 0, np.inf))
+		return np.where(pairs.sum(axis=1) >= 2, cv, np.inf)
+
+	def rate(self, key, field, period=None, default_period=None):
+		"""
+			Rate of change of field for key. With period, the rate is taken
+			over the oldest sample within period seconds of the newest one,
+			otherwise over the two newest samples.
+			Return None for unknown keys.
+		"""
+		row = self.rows.get(key)
+		if row is None:
+			return None
+		i = self.fields[field]
+		count = self.count[row]
+		last = (self.head[row] - 1) % self.window
+		if count < 2:
+			if default_period:
+				return self.values[row, last, i] / default_period
+			return 0.0
+		first = (last - 1) % self.window
+		if period is not None:
+			for n in range(count - 1, 1, -1):
+				oldest = (last - n) % self.window
+				if self.times[row, last] - self.times[row, oldest] <= period:
+					first = oldest
+					break
+		elapsed = self.times[row, last] - self.times[row, first]
+		if elapsed:
+			return (self.values[row, last, i] - self.values[row, first, i]) / elapsed
+		return 0.0
+
+	def samples(self, key):
+		"""
+			Return the samples of key, oldest first, as (time, values) pairs.
+		"""
+		row = self.rows.get(key)
+		if row is None:
+			return []
+		count = self.count[row]
+		order = (self.head[row] - count + np.arange(count)) % self.window
+		return list(zip(self.times[row, order].tolist(),
+						map(tuple, self.values[row, order].tolist())))
+
+	def evict(self, now, idle_timeout):
+		"""
+			Forget keys without samples in the last idle_timeout seconds.
+		"""
+		used = len(self.keys)
+		idle = np.nonzero(self.last_seen[:used] < now - idle_timeout)[0]
+		evicted = 0
+		for row in idle.tolist():
+			key = self.keys[row]
+			if key is not None:
+				del self.rows[key]
+				self.keys[row] = None
+				self.free_rows.append(row)
+				evicted += 1
+		return evicted
+
+
+class BestPathTable(object):
+	"""
+		Path-to-link incidence of the k candidate paths of datapath pairs,
+		used to pick the path with the largest bottleneck bandwidth.
+		self.index[row][path] lists the link columns of a path, padded with
+		a column of full capacity. Missing candidates only use a column of
+		no bandwidth. Bottlenecks of all paths are then one min-reduction of
+		the link bandwidth vector, and self.incidence = {row x column}
+		tells which pairs a bandwidth change can affect.
+		Rows are preallocated, so pairs whose paths are computed after the
+		table was built are appended by add() without recompiling the others.
+	"""
+	def __init__(self, paths, links, capacity, version=None, rows=64):
+		self.version = version
+		self.capacity = capacity
+		self.links = list(links)
+		self.columns = dict((link, i) for i, link in enumerate(self.links))
+		self.full, self.none = len(self.links), len(self.links) + 1
+		self.rows = {}     # self.rows = {(src, dst):row,}
+		self.pairs = []    # self.pairs = [(src, dst),], indexed by row.
+		self.paths = []    # self.paths = [[path],], indexed by row.
+		self.added = []    # Rows added since the last update.
+		self.index = np.full((rows, 1, 1), self.full, dtype=np.intp)
+		self.incidence = np.zeros((rows, self.none + 1), dtype=bool)
+		self.bandwidth = None
+		self.best = np.zeros(rows, dtype=np.intp)
+		self.capability = np.zeros(rows)
+		self.best_paths = {}      # self.best_paths = {src:{dst:path,},}
+		self.capabilities = {}    # self.capabilities = {src:{dst:bw,},}
+		self.add(paths, [(src, dst) for src in paths for dst in paths[src]])
+
+	def _grow(self, count, k, hops):
+		(rows, old_k, old_hops) = self.index.shape
+		if count <= rows and k <= old_k and hops <= old_hops:
+			return
+		while rows < count:
+			rows *= 2
+		(k, hops) = (max(k, old_k), max(hops, old_hops))
+		index = np.full((rows, k, hops), self.full, dtype=np.intp)
+		index[:len(self.pairs), old_k:] = self.none
+		index[:len(self.index), :old_k, :old_hops] = self.index
+		self.index = index
+		for name in ('incidence', 'best', 'capability'):
+			old = getattr(self, name)
+			new = np.zeros((rows,) + old.shape[1:], dtype=old.dtype)
+			new[:len(old)] = old
+			setattr(self, name, new)
+		if k > old_k:
+			self.incidence[:len(self.pairs), self.none] = True
+
+	def add(self, paths, pairs):
+		"""
+			Append rows for the pairs not in the table yet, their paths
+			are looked up in paths = {src:{dst:[[path],],},}. Pairs without
+			paths are skipped. Return the number of added pairs.
+		"""
+		new = []
+		for pair in pairs:
+			pair_paths = paths.get(pair[0], {}).get(pair[1])
+			if pair_paths and pair not in self.rows:
+				self.rows[pair] = len(self.pairs) + len(new)
+				new.append((pair, pair_paths))
+		if not new:
+			return 0
+		k = max(len(pair_paths) for (pair, pair_paths) in new)
+		hops = max(len(path) - 1 for (pair, pair_paths) in new
+				   for path in pair_paths)
+		self._grow(len(self.pairs) + len(new), k, hops)
+		for (pair, pair_paths) in new:
+			row = len(self.pairs)
+			self.pairs.append(pair)
+			self.paths.append(pair_paths)
+			self.index[row, len(pair_paths):] = self.none
+			for j, path in enumerate(pair_paths):
+				for h in range(len(path) - 1):
+					# Links unknown to the graph don't limit the path.
+					self.index[row, j, h] = self.columns.get((path[h], path[h+1]), self.full)
+			self.incidence[row, self.index[row].ravel()] = True
+			self.added.append(row)
+		return len(new)
+
+	def update(self, bandwidth):
+		"""
+			Pick best paths for the bandwidth vector of self.links.
+			Only the pairs with a path through a link whose bandwidth
+			changed and the pairs added since the last update are
+			recomputed. Return the number of updated pairs.
+		"""
+		bw = np.append(np.minimum(bandwidth, self.capacity), [self.capacity, -np.inf])
+		if self.bandwidth is None:
+			rows = np.arange(len(self.pairs))
+		else:
+			changed = np.nonzero(bw != self.bandwidth)[0]
+			rows = np.nonzero(self.incidence[:len(self.pairs), changed].any(axis=1))[0]
+			if self.added:
+				rows = np.union1d(rows, self.added)
+		self.bandwidth = bw
+		self.added = []
+		if not len(rows):
+			return 0
+		bottleneck = bw[self.index[rows]].min(axis=2)
+		self.best[rows] = bottleneck.argmax(axis=1)
+		self.capability[rows] = np.maximum(bottleneck.max(axis=1), 0)
+		for i, best, capability in zip(rows.tolist(), self.best[rows].tolist(),
+									   self.capability[rows].tolist()):
+			(src, dst) = self.pairs[i]
+			self.best_paths.setdefault(src, {})[dst] = self.paths[i][best]
+			self.capabilities.setdefault(src, {})[dst] = capability
+		return len(rows)
+
+
 class NetworkMonitor(app_manager.RyuApp):
 	"""
 		NetworkMonitor is a Ryu app for collecting traffic information.
@@ -45,17 +320,24 @@ class NetworkMonitor(app_manager.RyuApp):
 		super(NetworkMonitor, self).__init__(*args, **kwargs)
 		self.name = 'monitor'
 		self.datapaths = {}
-		self.port_stats = {}
-		self.port_speed = {}
-		self.flow_stats = {}
-		self.flow_speed = {}
+		self.port_stats = StatsStore(('tx_bytes', 'rx_bytes', 'rx_errors'),
+									 window=setting.STATS_WINDOW)
+		self.flow_stats = StatsStore(('packet_count', 'byte_count'),
+									 window=setting.STATS_WINDOW)
 		self.stats = {}
 		self.port_features = {}
 		self.free_bandwidth = {}   # self.free_bandwidth = {dpid:{port_no:free_bw,},} unit:Kbit/s
+		self.port_polls = {}   # self.port_polls = {(dpid, port_no):[interval, countdown],} unit:poll cycle
+		self.pending = {}   # self.pending = {(dpid, xid):(request_type, send_time),}
+		self.multipart = {}   # self.multipart = {(dpid, xid):[stats,],}
+		self.cycle = None   # self.cycle = {'start':time, 'waiting':set((dpid, xid)), 'sent':bool}
+		self.reply_latency = {}   # self.reply_latency = {request_type:deque([latency,]),} unit:s
+		self.poll_cycle_duration = deque(maxlen=setting.METRICS_WINDOW)   # unit:s
 		self.awareness = lookup_service_brick('awareness')
 		self.graph = None
 		self.capabilities = None
 		self.best_paths = None
+		self.path_table = None
 
 		# Start to green thread to monitor traffic and calculating
 		# free bandwidth of links respectively.
@@ -69,13 +351,27 @@ class NetworkMonitor(app_manager.RyuApp):
 		while CONF.weight == 'bw':
 			self.stats['flow'] = {}
 			self.stats['port'] = {}
-			for dp in self.datapaths.values():
+			self._expire_requests(time.time())
+			self.cycle = {'start': time.time(), 'waiting': set(), 'sent': False}
+			datapaths = list(self.datapaths.values())
+			if not datapaths:
+				hub.sleep(setting.MONITOR_PERIOD)
+			# Spread the requests over the period, so that the replies
+			# of all datapaths don't arrive as one burst.
+			slot = setting.MONITOR_PERIOD / max(len(datapaths), 1)
+			for dp in datapaths:
 				self.port_features.setdefault(dp.id, {})
 				self._request_stats(dp)
 				# Refresh data.
 				self.capabilities = None
 				self.best_paths = None
-			hub.sleep(setting.MONITOR_PERIOD)
+				hub.sleep(slot * random.uniform(1 - setting.MONITOR_JITTER,
+												1 + setting.MONITOR_JITTER))
+			self.cycle['sent'] = True
+			self._check_cycle(time.time())
+			now = time.time()
+			self.flow_stats.evict(now, setting.STATS_IDLE_TIMEOUT)
+			self.port_stats.evict(now, setting.STATS_IDLE_TIMEOUT)
 			if self.stats['flow'] or self.stats['port']:
 				self.show_stat('flow')
 				self.show_stat('port')
@@ -101,10 +397,16 @@ class NetworkMonitor(app_manager.RyuApp):
 			if not datapath.id in self.datapaths:
 				self.logger.debug('register datapath: %016x', datapath.id)
 				self.datapaths[datapath.id] = datapath
+				if CONF.weight == 'bw':
+					self.port_features.setdefault(datapath.id, {})
+					self._request_port_desc(datapath)
 		elif ev.state == DEAD_DISPATCHER:
 			if datapath.id in self.datapaths:
 				self.logger.debug('unregister datapath: %016x', datapath.id)
 				del self.datapaths[datapath.id]
+				for _dict in (self.pending, self.multipart, self.port_polls):
+					for key in [key for key in _dict if key[0] == datapath.id]:
+						del _dict[key]
 		else:
 			pass
 
@@ -112,77 +414,77 @@ class NetworkMonitor(app_manager.RyuApp):
 	def _flow_stats_reply_handler(self, ev):
 		"""
 			Save flow stats reply information into self.flow_stats.
-			Calculate flow speed and Save it.
-			(old) self.flow_stats = {dpid:{(in_port, ipv4_dst, out-port):[(packet_count, byte_count, duration_sec,  duration_nsec),],},}
-			(old) self.flow_speed = {dpid:{(in_port, ipv4_dst, out-port):[speed,],},}
-			(new) self.flow_stats = {dpid:{(priority, ipv4_src, ipv4_dst):[(packet_count, byte_count, duration_sec,  duration_nsec),],},}
-			(new) self.flow_speed = {dpid:{(priority, ipv4_src, ipv4_dst):[speed,],},}
-			Because the proactive flow entrys don't have 'in_port' and 'out-port' field.
+			self.flow_stats holds (packet_count, byte_count) samples keyed by
+			(dpid, priority, ipv4_src, ipv4_dst), because the proactive flow
+			entrys don't have 'in_port' and 'out-port' field.
+			Flow speed is computed from the samples when it is queried.
+			Multipart replies are only saved once the last part has arrived.
 			Note: table-miss, LLDP and ARP flow entries are not what we need, just filter them.
 		"""
-		body = ev.msg.body
+		body = self._reply_body(ev)
+		if body is None:
+			return
 		dpid = ev.msg.datapath.id
 		self.stats['flow'][dpid] = body
-		self.flow_stats.setdefault(dpid, {})
-		self.flow_speed.setdefault(dpid, {})
-		for stat in sorted([flow for flow in body if ((flow.priority not in [0, 65535]) and (flow.match.get('ipv4_src')) and (flow.match.get('ipv4_dst')))],
-						   key=lambda flow: (flow.priority, flow.match.get('ipv4_src'), flow.match.get('ipv4_dst'))):
-			key = (stat.priority, stat.match.get('ipv4_src'), stat.match.get('ipv4_dst'))
-			value = (stat.packet_count, stat.byte_count,
-					 stat.duration_sec, stat.duration_nsec)
-			self._save_stats(self.flow_stats[dpid], key, value, 5)
-
-			# Get flow's speed and Save it.
-			pre = 0
-			period = setting.MONITOR_PERIOD
-			tmp = self.flow_stats[dpid][key]
-			if len(tmp) > 1:
-				pre = tmp[-2][1]
-				period = self._get_period(tmp[-1][2], tmp[-1][3],
-										  tmp[-2][2], tmp[-2][3])
-			speed = self._get_speed(self.flow_stats[dpid][key][-1][1],
-									pre, period)
-			self._save_stats(self.flow_speed[dpid], key, speed, 5)
+		flows = [flow for flow in body if ((flow.priority not in [0, 65535]) and (flow.match.get('ipv4_src')) and (flow.match.get('ipv4_dst')))]
+		keys = [(dpid, flow.priority, flow.match.get('ipv4_src'), flow.match.get('ipv4_dst'))
+				for flow in flows]
+		values = [(flow.packet_count, flow.byte_count) for flow in flows]
+		times = [self._get_time(flow.duration_sec, flow.duration_nsec)
+				 for flow in flows]
+		self.flow_stats.update(keys, values, times, time.time())
 
 	@set_ev_cls(ofp_event.EventOFPPortStatsReply, MAIN_DISPATCHER)
 	def _port_stats_reply_handler(self, ev):
 		"""
 			Save port's stats information into self.port_stats.
-			Calculate port speed and Save it.
-			self.port_stats = {(dpid, port_no):[(tx_bytes, rx_bytes, rx_errors, duration_sec,  duration_nsec),],}
-			self.port_speed = {(dpid, port_no):[speed,],}
+			Calculate the speed and free bandwidth of all ports in the reply at once.
+			self.port_stats holds (tx_bytes, rx_bytes, rx_errors) samples keyed by (dpid, port_no).
+			Ports whose speed hardly varies are polled less often, see _due_ports.
 			Note: The transmit performance and receive performance are independent of a port.
 			We calculate the load of a port only using tx_bytes.
 		"""
-		body = ev.msg.body
+		body = self._reply_body(ev)
+		if body is None:
+			return
 		dpid = ev.msg.datapath.id
-		self.stats['port'][dpid] = body
+		self.stats['port'].setdefault(dpid, []).extend(body)
 		self.free_bandwidth.setdefault(dpid, {})
-		for stat in sorted(body, key=attrgetter('port_no')):
-			port_no = stat.port_no
-			if port_no != ofproto_v1_3.OFPP_LOCAL:
-				key = (dpid, port_no)
-				value = (stat.tx_bytes, stat.rx_bytes, stat.rx_errors,
-						 stat.duration_sec, stat.duration_nsec)
-				self._save_stats(self.port_stats, key, value, 5)
-
-				# Get port speed and Save it.
-				pre = 0
-				period = setting.MONITOR_PERIOD
-				tmp = self.port_stats[key]
-				if len(tmp) > 1:
-					# Calculate only the tx_bytes, not the rx_bytes. (hmc)
-					pre = tmp[-2][0]
-					period = self._get_period(tmp[-1][3], tmp[-1][4], tmp[-2][3], tmp[-2][4])
-				speed = self._get_speed(self.port_stats[key][-1][0], pre, period)
-				self._save_stats(self.port_speed, key, speed, 5)
-				self._save_freebandwidth(dpid, port_no, speed)
+		ports = [stat for stat in body if stat.port_no != ofproto_v1_3.OFPP_LOCAL]
+		keys = [(dpid, stat.port_no) for stat in ports]
+		values = [(stat.tx_bytes, stat.rx_bytes, stat.rx_errors) for stat in ports]
+		times = [self._get_time(stat.duration_sec, stat.duration_nsec)
+				 for stat in ports]
+		rows = self.port_stats.update(keys, values, times, time.time())
+		speeds = self.port_stats.rates(rows, 'tx_bytes', setting.MONITOR_PERIOD)
+		# The true bandwidth of link, instead of 'curr_speed'.
+		free_bws = self._get_free_bw(setting.MAX_CAPACITY, speeds)
+		port_features = self.port_features.get(dpid, {})
+		for stat, free_bw in zip(ports, free_bws.tolist()):
+			if port_features.get(stat.port_no):
+				self.free_bandwidth[dpid][stat.port_no] = free_bw
+			else:
+				self.logger.info("Port is Down")
+
+		# Adapt the poll interval of ports to the variation of their speed.
+		variations = self.port_stats.variation(rows, 'tx_bytes')
+		for stat, variation in zip(ports, variations.tolist()):
+			poll = self.port_polls.setdefault((dpid, stat.port_no), [1, 1])
+			if variation > setting.POLL_VARIATION:
+				poll[0] = 1
+				poll[1] = min(poll[1], 1)
+			else:
+				poll[0] = min(poll[0] * 2, setting.POLL_INTERVAL_MAX)
 
 	@set_ev_cls(ofp_event.EventOFPPortDescStatsReply, MAIN_DISPATCHER)
 	def port_desc_stats_reply_handler(self, ev):
 		"""
 			Save port description info.
+			It is requested when a datapath connects and when its ports change.
 		"""
+		body = self._reply_body(ev)
+		if body is None:
+			return
 		msg = ev.msg
 		dpid = msg.datapath.id
 		ofproto = msg.datapath.ofproto
@@ -197,7 +499,8 @@ class NetworkMonitor(app_manager.RyuApp):
 					  ofproto.OFPPS_LIVE: "Live"}
 
 		ports = []
-		for p in ev.msg.body:
+		port_features = {}
+		for p in body:
 			ports.append('port_no=%d hw_addr=%s name=%s config=0x%08x '
 						 'state=0x%08x curr=0x%08x advertised=0x%08x '
 						 'supported=0x%08x peer=0x%08x curr_speed=%d '
@@ -220,7 +523,8 @@ class NetworkMonitor(app_manager.RyuApp):
 
 			# Recording data.
 			port_feature = (config, state, p.curr_speed)
-			self.port_features[dpid][p.port_no] = port_feature
+			port_features[p.port_no] = port_feature
+		self.port_features[dpid] = port_features
 
 	@set_ev_cls(ofp_event.EventOFPPortStatus, MAIN_DISPATCHER)
 	def _port_status_handler(self, ev):
@@ -242,6 +546,11 @@ class NetworkMonitor(app_manager.RyuApp):
 		else:
 			print("switch%d: Illeagal port state %s %s" % (dpid, port_no, reason))
 
+		if reason == ofproto.OFPPR_DELETE:
+			self.port_polls.pop((dpid, port_no), None)
+		if CONF.weight == 'bw' and dpid in self.datapaths:
+			self._request_port_desc(msg.datapath)
+
 	def _request_stats(self, datapath):
 		"""
 			Sending request msg to datapath
@@ -249,12 +558,118 @@ class NetworkMonitor(app_manager.RyuApp):
 		self.logger.debug('send stats request: %016x', datapath.id)
 		ofproto = datapath.ofproto
 		parser = datapath.ofproto_parser
-		req = parser.OFPPortDescStatsRequest(datapath, 0)
-		datapath.send_msg(req)
-		req = parser.OFPPortStatsRequest(datapath, 0, ofproto.OFPP_ANY)
-		datapath.send_msg(req)
-		req = parser.OFPFlowStatsRequest(datapath)
-		datapath.send_msg(req)
+		reqs = [parser.OFPFlowStatsRequest(datapath)]
+		ports = self._due_ports(datapath.id)
+		if ports is None:
+			reqs.append(parser.OFPPortStatsRequest(datapath, 0, ofproto.OFPP_ANY))
+		else:
+			for port_no in ports:
+				reqs.append(parser.OFPPortStatsRequest(datapath, 0, port_no))
+		keys = self._send_requests(datapath, reqs)
+		if self.cycle is not None:
+			self.cycle['waiting'].update(keys)
+
+	def _request_port_desc(self, datapath):
+		parser = datapath.ofproto_parser
+		self._send_requests(datapath, [parser.OFPPortDescStatsRequest(datapath, 0)])
+
+	def _send_requests(self, datapath, reqs):
+		"""
+			Send requests at once and remember when they were sent.
+			Return the (dpid, xid) keys of the requests.
+		"""
+		datapath.send_msgs(reqs)
+		now = time.time()
+		keys = []
+		for req in reqs:
+			key = (datapath.id, req.xid)
+			self.pending[key] = (req.__class__.__name__, now)
+			keys.append(key)
+		return keys
+
+	def _due_ports(self, dpid):
+		"""
+			Count down the poll intervals of the ports of datapath.
+			Return the ports due for a port stats request, or None when
+			it is cheaper to request the stats of all ports.
+		"""
+		ports = [port_no for port_no in self.port_features.get(dpid, {})
+				 if port_no != ofproto_v1_3.OFPP_LOCAL]
+		due = []
+		for port_no in ports:
+			poll = self.port_polls.setdefault((dpid, port_no), [1, 0])
+			poll[1] -= 1
+			if poll[1] <= 0:
+				poll[1] = poll[0]
+				due.append(port_no)
+		if len(due) * 2 > len(ports) or not ports:
+			return None
+		return due
+
+	def _reply_body(self, ev):
+		"""
+			Reassemble multipart replies flagged with OFPMPF_REPLY_MORE.
+			Return the whole body once the last part has arrived, else None.
+		"""
+		msg = ev.msg
+		key = (msg.datapath.id, msg.xid)
+		if msg.flags & msg.datapath.ofproto.OFPMPF_REPLY_MORE:
+			self.multipart.setdefault(key, []).extend(msg.body)
+			return None
+		body = self.multipart.pop(key, None)
+		if body is None:
+			body = msg.body
+		else:
+			body.extend(msg.body)
+		self._request_done(key, time.time())
+		return body
+
+	def _request_done(self, key, now):
+		pending = self.pending.pop(key, None)
+		if pending is None:
+			return
+		request_type, send_time = pending
+		if request_type not in self.reply_latency:
+			self.reply_latency[request_type] = deque(maxlen=setting.METRICS_WINDOW)
+		self.reply_latency[request_type].append(now - send_time)
+		if self.cycle is not None and key in self.cycle['waiting']:
+			self.cycle['waiting'].discard(key)
+			self._check_cycle(now)
+
+	def _check_cycle(self, now):
+		"""
+			Record the duration of the poll cycle once all its requests
+			are sent and replied.
+		"""
+		cycle = self.cycle
+		if cycle['sent'] and not cycle['waiting']:
+			self.poll_cycle_duration.append(now - cycle['start'])
+			self.logger.debug('poll cycle took %.3fs', now - cycle['start'])
+			self.cycle = None
+
+	def _expire_requests(self, now):
+		"""
+			Forget requests that were never replied.
+		"""
+		for key, (request_type, send_time) in list(self.pending.items()):
+			if now - send_time > setting.STATS_IDLE_TIMEOUT:
+				del self.pending[key]
+				self.multipart.pop(key, None)
+
+	def get_poll_metrics(self):
+		"""
+			Return mean and max reply latency per request type and of
+			the poll cycle duration, in seconds.
+		"""
+		def summary(samples):
+			if not samples:
+				return None
+			return {'mean': sum(samples) / len(samples), 'max': max(samples),
+					'count': len(samples)}
+
+		return {'reply_latency': dict((request_type, summary(samples))
+									  for request_type, samples in self.reply_latency.items()),
+				'poll_cycle': summary(self.poll_cycle_duration)}
 
 	def get_min_bw_of_links(self, graph, path, min_bw):
 		"""
@@ -278,34 +693,34 @@ class NetworkMonitor(app_manager.RyuApp):
 	def get_best_path_by_bw(self, graph, paths):
 		"""
 			Get best path by comparing paths.
+			The candidate paths are compiled into a BestPathTable once per
+			topology, pairs whose paths were computed later are appended to
+			it and later calls only recompute the pairs whose links changed
+			bandwidth.
 			Note: This function is called in EFattree module.
 		"""
-		capabilities = {}
-		best_paths = copy.deepcopy(paths)
-
-		for src in paths:
-			for dst in paths[src]:
-				if src == dst:
-					best_paths[src][src] = [src]
-					capabilities.setdefault(src, {src: setting.MAX_CAPACITY})
-					capabilities[src][src] = setting.MAX_CAPACITY
-				else:
-					max_bw_of_paths = 0
-					best_path = paths[src][dst][0]
-					for path in paths[src][dst]:
-						min_bw = setting.MAX_CAPACITY
-						min_bw = self.get_min_bw_of_links(graph, path, min_bw)
-						if min_bw > max_bw_of_paths:
-							max_bw_of_paths = min_bw
-							best_path = path
-					best_paths[src][dst] = best_path
-					capabilities.setdefault(src, {dst: max_bw_of_paths})
-					capabilities[src][dst] = max_bw_of_paths
+		if self.awareness is None:
+			self.awareness = lookup_service_brick('awareness')
+		topology_version = self.awareness.topology_version
+		added = self.awareness.path_store.added
+		table = self.path_table
+		# table.version = (topology_version, number of added pairs in table)
+		if (table is None or table.version[0] != topology_version or
+				table.version[1] > len(added)):
+			links = [(src, dst) for (src, dst) in graph.edges() if src != dst]
+			table = BestPathTable(paths, links, setting.MAX_CAPACITY,
+								  (topology_version, len(added)))
+			self.path_table = table
+		elif table.version[1] < len(added):
+			table.add(paths, added[table.version[1]:])
+			table.version = (topology_version, len(added))
+		table.update([graph[src][dst].get('bandwidth', setting.MAX_CAPACITY)
+					  for (src, dst) in table.links])
 
 		# self.capabilities and self.best_paths have no actual utility in this module.
-		self.capabilities = capabilities
-		self.best_paths = best_paths
-		return capabilities, best_paths
+		self.capabilities = table.capabilities
+		self.best_paths = table.best_paths
+		return self.capabilities, self.best_paths
 
 	def create_bw_graph(self, bw_dict):
 		"""
@@ -340,45 +755,13 @@ class NetworkMonitor(app_manager.RyuApp):
 				self.awareness = lookup_service_brick('awareness')
 			return self.awareness.graph
 
-	def _save_freebandwidth(self, dpid, port_no, speed):
-		"""
-			Calculate free bandwidth of port and Save it.
-			port_feature = (config, state, p.curr_speed)
-			self.port_features[dpid][p.port_no] = port_feature
-			self.free_bandwidth = {dpid:{port_no:free_bw,},}
-		"""
-		port_state = self.port_features.get(dpid).get(port_no)
-		if port_state:
-			capacity = 10000   # The true bandwidth of link, instead of 'curr_speed'.
-			free_bw = self._get_free_bw(capacity, speed)
-			self.free_bandwidth[dpid].setdefault(port_no, None)
-			self.free_bandwidth[dpid][port_no] = free_bw
-		else:
-			self.logger.info("Port is Down")
-
-	def _save_stats(self, _dict, key, value, length=5):
-		if key not in _dict:
-			_dict[key] = []
-		_dict[key].append(value)
-		if len(_dict[key]) > length:
-			_dict[key].pop(0)
-
-	def _get_speed(self, now, pre, period):
-		if period:
-			return (now - pre) / (period)
-		else:
-			return 0
-
 	def _get_free_bw(self, capacity, speed):
 		# freebw: Kbit/s
-		return max(capacity - speed * 8 / 1000.0, 0)
+		return np.maximum(capacity - speed * 8 / 1000.0, 0)
 
 	def _get_time(self, sec, nsec):
 		return sec + nsec / 1000000000.0
 
-	def _get_period(self, n_sec, n_nsec, p_sec, p_nsec):
-		return self._get_time(n_sec, n_nsec) - self._get_time(p_sec, p_nsec)
-
 	def show_stat(self, _type):
 		'''
 			Show statistics information according to data type.
@@ -403,7 +786,8 @@ class NetworkMonitor(app_manager.RyuApp):
 						dpid,
 						stat.priority, stat.match.get('ipv4_src'), stat.match.get('ipv4_dst'),
 						stat.packet_count, stat.byte_count,
-						abs(self.flow_speed[dpid][(stat.priority, stat.match.get('ipv4_src'), stat.match.get('ipv4_dst'))][-1])*8/1000.0))
+						abs(self.flow_stats.rate((dpid, stat.priority, stat.match.get('ipv4_src'), stat.match.get('ipv4_dst')),
+											'byte_count', default_period=setting.MONITOR_PERIOD))*8/1000.0))
 			print()
 
 		if _type == 'port':
@@ -424,7 +808,8 @@ class NetworkMonitor(app_manager.RyuApp):
 							stat.rx_packets, stat.rx_bytes,
 							stat.tx_packets, stat.tx_bytes,
 							10000,
-							abs(self.port_speed[(dpid, stat.port_no)][-1] * 8),
+							abs(self.port_stats.rate((dpid, stat.port_no), 'tx_bytes',
+												   default_period=setting.MONITOR_PERIOD) * 8),
 							self.free_bandwidth[dpid][stat.port_no],
 							self.port_features[dpid][stat.port_no][0],
 							self.port_features[dpid][stat.port_no][1]))
@@ -39,6 +39,13 @@ from ryu.app.wsgi import WSGIApplication
 
 LOG = logging.getLogger('ryu.app.ofctl_rest')
 
+# Size of the chunks of streamed stats responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Query parameters accepted as filters by GET /stats/flow/<dpid>
+FLOW_STATS_FILTERS = ('table_id', 'cookie', 'cookie_mask', 'out_port',
+                      'out_group', 'priority')
+
 # supported ofctl versions in this restful app
 supported_ofctl = {
     ofproto_v1_0.OFP_VERSION: ofctl_v1_0,
@@ -71,6 +78,11 @@ supported_ofctl = {
 # get flows stats of the switch filtered by the fields
 # POST /stats/flow/<dpid>
 #
+# Flow stats are streamed to the client as the multipart replies arrive
+# (OpenFlow 1.3), and can also be filtered by the query parameters
+# table_id, cookie, cookie_mask, out_port, out_group and priority.
+# GET /stats/flow/<dpid>?table_id=<table_id>&priority=<priority>
+#
 # get aggregate flows stats of the switch
 # GET /stats/aggregateflow/<dpid>
 #
@@ -215,6 +227,8 @@ def stats_method(method):
         # Invoke StatsController method
         try:
             ret = method(self, req, dp, ofctl, *args, **kwargs)
+            if isinstance(ret, Response):
+                return ret
             return Response(content_type='application/json',
                             body=json.dumps(ret))
         except ValueError:
@@ -228,6 +242,25 @@ def stats_method(method):
     return wrapper
 
 
+def json_list_stream(key, entries, chunk_size=STREAM_CHUNK_SIZE):
+    # Encodes {key: [entry, ...]} the same way as json.dumps(), yielding
+    # chunks of about chunk_size bytes while entries is consumed.
+    chunk = ['{%s: [' % json.dumps(key)]
+    size = 0
+    sep = ''
+    for entry in entries:
+        data = sep + json.dumps(entry)
+        chunk.append(data)
+        size += len(data)
+        sep = ', '
+        if size >= chunk_size:
+            yield ''.join(chunk).encode('utf-8')
+            chunk = []
+            size = 0
+    chunk.append(']}')
+    yield ''.join(chunk).encode('utf-8')
+
+
 def command_method(method):
     def wrapper(self, req, *args, **kwargs):
         # Parse request json body
@@ -315,6 +348,13 @@ class StatsController(ControllerBase):
     @stats_method
     def get_flow_stats(self, req, dp, ofctl, **kwargs):
         flow = req.json if req.body else {}
+        for key in FLOW_STATS_FILTERS:
+            if key in req.GET:
+                flow.setdefault(key, req.GET[key])
+        if hasattr(ofctl, 'iter_flow_stats'):
+            flows = ofctl.iter_flow_stats(dp, self.waiters, flow)
+            return Response(content_type='application/json',
+                            app_iter=json_list_stream(str(dp.id), flows))
         return ofctl.get_flow_stats(dp, self.waiters, flow)
 
     @stats_method
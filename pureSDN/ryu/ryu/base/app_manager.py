@@ -88,6 +88,40 @@ def require_app(app_name, api_style=False):
     LOG.debug('require_app: %s is required by %s', app_name, m.__name__)
 
 
+def _handler_states(handler, ev_cls):
+    if not hasattr(handler, 'callers') or ev_cls not in handler.callers:
+        # dynamically registered handlers does not have
+        # h.callers element for the event.
+        return ()
+    return handler.callers[ev_cls].dispatchers
+
+
+class _DispatchTable(object):
+    """
+    Handlers or observers of one event class, grouped by state.
+
+    Built from (item, states) pairs whenever they are (un)registered, so
+    that dispatching an event is a dict lookup. Empty states means all
+    states.
+    """
+
+    __slots__ = ('all', 'default', 'by_state')
+
+    def __init__(self, entries):
+        self.all = tuple(item for item, _states in entries)
+        self.default = tuple(item for item, states in entries if not states)
+        known = set()
+        for _item, states in entries:
+            known.update(states)
+        self.by_state = dict(
+            (state, tuple(item for item, states in entries
+                          if not states or state in states))
+            for state in known)
+
+    def get(self, state):
+        return self.by_state.get(state, self.default)
+
+
 class RyuApp(object):
     """
     The base class for Ryu applications.
@@ -155,6 +189,8 @@ class RyuApp(object):
         self.name = self.__class__.__name__
         self.event_handlers = {}        # ev_cls -> handlers:list
         self.observers = {}     # ev_cls -> observer-name -> states:set
+        self._handler_tables = {}   # ev_cls -> _DispatchTable
+        self._observer_tables = {}  # ev_cls -> _DispatchTable
         self.threads = []
         self.main_thread = None
         self.events = hub.Queue(128)
@@ -196,25 +232,46 @@ class RyuApp(object):
         assert callable(handler)
         self.event_handlers.setdefault(ev_cls, [])
         self.event_handlers[ev_cls].append(handler)
+        self._compile_handlers(ev_cls)
 
     def unregister_handler(self, ev_cls, handler):
         assert callable(handler)
         self.event_handlers[ev_cls].remove(handler)
         if not self.event_handlers[ev_cls]:
             del self.event_handlers[ev_cls]
+        self._compile_handlers(ev_cls)
+
+    def _compile_handlers(self, ev_cls):
+        handlers = self.event_handlers.get(ev_cls)
+        if not handlers:
+            self._handler_tables.pop(ev_cls, None)
+            return
+        self._handler_tables[ev_cls] = _DispatchTable(
+            [(h, _handler_states(h, ev_cls)) for h in handlers])
 
     def register_observer(self, ev_cls, name, states=None):
         states = states or set()
         ev_cls_observers = self.observers.setdefault(ev_cls, {})
         ev_cls_observers.setdefault(name, set()).update(states)
+        self._compile_observers(ev_cls)
 
     def unregister_observer(self, ev_cls, name):
         observers = self.observers.get(ev_cls, {})
         observers.pop(name)
+        self._compile_observers(ev_cls)
 
     def unregister_observer_all_event(self, name):
-        for observers in self.observers.values():
-            observers.pop(name, None)
+        for ev_cls, observers in self.observers.items():
+            if observers.pop(name, None) is not None:
+                self._compile_observers(ev_cls)
+
+    def _compile_observers(self, ev_cls):
+        observers = self.observers.get(ev_cls)
+        if not observers:
+            self._observer_tables.pop(ev_cls, None)
+            return
+        self._observer_tables[ev_cls] = _DispatchTable(
+            list(observers.items()))
 
     def observe_event(self, ev_cls, states=None):
         brick = _lookup_service_brick_by_ev_cls(ev_cls)
@@ -227,7 +284,7 @@ class RyuApp(object):
             brick.unregister_observer(ev_cls, self.name)
 
     def get_handlers(self, ev, state=None):
-        """Returns a list of handlers for the specific event.
+        """Returns a sequence of handlers for the specific event.
 
         :param ev: The event to handle.
         :param state: The current state. ("dispatcher")
@@ -236,31 +293,20 @@ class RyuApp(object):
                       in the specified state.
                       The default is None.
         """
-        ev_cls = ev.__class__
-        handlers = self.event_handlers.get(ev_cls, [])
+        table = self._handler_tables.get(ev.__class__)
+        if table is None:
+            return ()
         if state is None:
-            return handlers
-
-        def test(h):
-            if not hasattr(h, 'callers') or ev_cls not in h.callers:
-                # dynamically registered handlers does not have
-                # h.callers element for the event.
-                return True
-            states = h.callers[ev_cls].dispatchers
-            if not states:
-                # empty states means all states
-                return True
-            return state in states
-
-        return filter(test, handlers)
+            return table.all
+        return table.get(state)
 
     def get_observers(self, ev, state):
-        observers = []
-        for k, v in self.observers.get(ev.__class__, {}).items():
-            if not state or not v or state in v:
-                observers.append(k)
-
-        return observers
+        table = self._observer_tables.get(ev.__class__)
+        if table is None:
+            return ()
+        if not state:
+            return table.all
+        return table.get(state)
 
     def send_request(self, req):
         """
@@ -53,6 +53,9 @@ LOG = logging.getLogger('ryu.controller.controller')
 
 DEFAULT_OFP_HOST = '0.0.0.0'
 DEFAULT_OFP_SW_CON_INTERVAL = 1
+DEFAULT_OFP_RECV_BUFFER_SIZE = 64 * 1024
+DEFAULT_OFP_SEND_QUEUE_DEPTH = 16
+DEFAULT_OFP_SEND_BATCH_SIZE = 64 * 1024
 
 CONF = cfg.CONF
 CONF.register_cli_opts([
@@ -86,7 +89,25 @@ CONF.register_opts([
     cfg.IntOpt('maximum-unreplied-echo-requests',
                default=0,
                min=0,
-               help='Maximum number of unreplied echo requests before datapath is disconnected.')
+               help='Maximum number of unreplied echo requests before datapath is disconnected.'),
+    cfg.IntOpt('ofp-recv-buffer-size',
+               default=DEFAULT_OFP_RECV_BUFFER_SIZE,
+               min=ofproto_common.OFP_HEADER_SIZE,
+               help='Initial size, in bytes, of the receive buffer of a datapath '
+                    '(default %d). The buffer grows to fit larger messages.'
+                    % DEFAULT_OFP_RECV_BUFFER_SIZE),
+    cfg.IntOpt('ofp-send-queue-depth',
+               default=DEFAULT_OFP_SEND_QUEUE_DEPTH,
+               min=1,
+               help='Number of pending sends queued per datapath before '
+                    'senders block (default %d).'
+                    % DEFAULT_OFP_SEND_QUEUE_DEPTH),
+    cfg.IntOpt('ofp-send-batch-size',
+               default=DEFAULT_OFP_SEND_BATCH_SIZE,
+               min=0,
+               help='Maximum number of bytes of queued messages coalesced '
+                    'into one socket write (default %d).'
+                    % DEFAULT_OFP_SEND_BATCH_SIZE)
 ])
 
 
@@ -284,7 +305,8 @@ class Datapath(ofproto_protocol.ProtocolDesc):
 
         # The limit is arbitrary. We need to limit queue size to
         # prevent it from eating memory up.
-        self.send_q = hub.Queue(16)
+        self.send_q = hub.Queue(CONF.ofp_send_queue_depth)
+        self.send_batch_size = CONF.ofp_send_batch_size
         self._send_q_sem = hub.BoundedSemaphore(self.send_q.maxsize)
 
         self.echo_request_interval = CONF.echo_request_interval
@@ -323,16 +345,35 @@ class Datapath(ofproto_protocol.ProtocolDesc):
     # Low level socket handling layer
     @_deactivate
     def _recv_loop(self):
-        buf = bytearray()
+        # Received data is kept in buf[start:end]. The socket reads into
+        # the free tail of buf, headers are parsed in place and consumed
+        # messages only advance start, so a backlog of messages is never
+        # copied over and over. Each message gets one copy of its own
+        # bytes, because parsed messages keep a reference to them.
+        buf = bytearray(max(CONF.ofp_recv_buffer_size,
+                            ofproto_common.OFP_HEADER_SIZE))
+        view = memoryview(buf)
+        start = end = 0
         count = 0
-        min_read_len = remaining_read_len = ofproto_common.OFP_HEADER_SIZE
+        min_read_len = ofproto_common.OFP_HEADER_SIZE
+        required_len = min_read_len
 
         while self.state != DEAD_DISPATCHER:
+            if len(buf) - start < required_len:
+                # Make room for the pending message; only its partial
+                # data is moved.
+                pending = end - start
+                if len(buf) < required_len:
+                    new_buf = bytearray(max(required_len, 2 * len(buf)))
+                    new_buf[:pending] = view[start:end]
+                    view.release()
+                    buf = new_buf
+                    view = memoryview(buf)
+                else:
+                    view[:pending] = view[start:end]
+                start, end = 0, pending
             try:
-                read_len = min_read_len
-                if remaining_read_len > min_read_len:
-                    read_len = remaining_read_len
-                ret = self.socket.recv(read_len)
+                ret = self.socket.recv_into(view[end:])
             except SocketTimeout:
                 continue
             except ssl.SSLError:
@@ -345,39 +386,33 @@ class Datapath(ofproto_protocol.ProtocolDesc):
             if not ret:
                 break
 
-            buf += ret
-            buf_len = len(buf)
-            while buf_len >= min_read_len:
-                (version, msg_type, msg_len, xid) = ofproto_parser.header(buf)
+            end += ret
+            required_len = min_read_len
+            while end - start >= min_read_len:
+                (version, msg_type, msg_len, xid) = ofproto_parser.header(
+                    buf, start)
                 if msg_len < min_read_len:
                     # Someone isn't playing nicely; log it, and try something sane.
                     LOG.debug("Message with invalid length %s received from switch at address %s",
                               msg_len, self.address)
                     msg_len = min_read_len
-                if buf_len < msg_len:
-                    remaining_read_len = (msg_len - buf_len)
+                if end - start < msg_len:
+                    required_len = msg_len
                     break
 
                 msg = ofproto_parser.msg(
-                    self, version, msg_type, msg_len, xid, buf[:msg_len])
+                    self, version, msg_type, msg_len, xid,
+                    buf[start:start + msg_len])
                 # LOG.debug('queue msg %s cls %s', msg, msg.__class__)
                 if msg:
                     ev = ofp_event.ofp_msg_to_ev(msg)
                     if self.ofp_brick is not None:
                         self.ofp_brick.send_event_to_observers(ev, self.state)
-
-                        def dispatchers(x):
-                            return x.callers[ev.__class__].dispatchers
-
-                        handlers = [handler for handler in
-                                    self.ofp_brick.get_handlers(ev) if
-                                    self.state in dispatchers(handler)]
-                        for handler in handlers:
+                        for handler in self.ofp_brick.get_handlers(
+                                ev, self.state):
                             handler(ev)
 
-                buf = buf[msg_len:]
-                buf_len = len(buf)
-                remaining_read_len = min_read_len
+                start += msg_len
 
                 # We need to schedule other greenlets. Otherwise, ryu
                 # can't accept new switches or handle the existing
@@ -388,12 +423,30 @@ class Datapath(ofproto_protocol.ProtocolDesc):
                     count = 0
                     hub.sleep(0)
 
+            if start == end:
+                start = end = 0
+
     def _send_loop(self):
         try:
             while self.state != DEAD_DISPATCHER:
                 buf, close_socket = self.send_q.get()
                 self._send_q_sem.release()
-                self.socket.sendall(buf)
+                # Coalesce the other queued buffers into the same write,
+                # up to send_batch_size bytes.
+                bufs = [buf]
+                size = len(buf)
+                while not close_socket and size < self.send_batch_size:
+                    try:
+                        buf, close_socket = self.send_q.get(block=False)
+                    except hub.QueueEmpty:
+                        break
+                    self._send_q_sem.release()
+                    bufs.append(buf)
+                    size += len(buf)
+                if len(bufs) == 1:
+                    self.socket.sendall(bufs[0])
+                else:
+                    self.socket.sendall(b''.join(bufs))
                 if close_socket:
                     break
         except SocketTimeout:
@@ -445,6 +498,25 @@ class Datapath(ofproto_protocol.ProtocolDesc):
         # LOG.debug('send_msg %s', msg)
         return self.send(msg.buf, close_socket=close_socket)
 
+    def send_msgs(self, msgs, close_socket=False):
+        """
+        Send several messages as one entry of the send queue.
+
+        The messages are serialized back to back and written to the
+        socket at once, e.g. the flow mods of a path followed by a
+        barrier request.
+        """
+        bufs = []
+        for msg in msgs:
+            assert isinstance(msg, self.ofproto_parser.MsgBase)
+            if msg.xid is None:
+                self.set_xid(msg)
+            msg.serialize()
+            bufs.append(msg.buf)
+        if not bufs:
+            return True
+        return self.send(b''.join(bufs), close_socket=close_socket)
+
     def _echo_request_loop(self):
         if not self.max_unreplied_echo_requests:
             return
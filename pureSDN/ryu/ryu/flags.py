@@ -132,4 +132,8 @@ CONF.register_cli_opts([
     # k_shortest_forwarding
     cfg.IntOpt('k_paths', default=4, help='number of candidate paths of KSP.'),
     cfg.StrOpt('weight', default='bw', help='weight type of computing shortest path.'),
-    cfg.IntOpt('fanout', default=4, help='switch fanout number.')])
\ No newline at end of file
+    cfg.IntOpt('fanout', default=4, help='switch fanout number.'),
+    cfg.BoolOpt('proactive', default=False,
+                help='install destination-based flow entries ahead of traffic.'),
+    cfg.BoolOpt('ecmp', default=False,
+                help='spread flows over equal-cost paths with select groups.')])
\ No newline at end of file
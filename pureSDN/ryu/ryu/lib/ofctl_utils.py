@@ -262,6 +262,58 @@ def send_stats_request(dp, stats, waiters, msgs, logger=None):
         del waiters_per_dp[stats.xid]
 
 
+class _StatsReplyQueue(object):
+    # Takes the place of the message list of send_stats_request() in
+    # the waiters, so that each reply part can be handed over as soon
+    # as the reply handler appends it.
+    def __init__(self):
+        self.queue = hub.Queue()
+
+    def append(self, msg):
+        self.queue.put(msg)
+
+
+def iter_stats_reply(dp, stats, waiters, logger=None):
+    """
+    Sends a stats request and yields its reply messages one by one as
+    the multipart parts arrive, instead of collecting them into a list.
+
+    The reply handler is expected to treat the waiters the same way as
+    for send_stats_request(). The iteration ends after the last part or
+    when no part arrives within DEFAULT_TIMEOUT.
+    """
+    dp.set_xid(stats)
+    waiters_per_dp = waiters.setdefault(dp.id, {})
+    lock = hub.Event()
+    msgs = _StatsReplyQueue()
+    waiters_per_dp[stats.xid] = (lock, msgs)
+    try:
+        send_msg(dp, stats, logger)
+        while True:
+            try:
+                msg = msgs.queue.get(timeout=DEFAULT_TIMEOUT)
+            except hub.QueueEmpty:
+                return
+            yield msg
+            # The handler sets the lock right after appending the last
+            # part.
+            if lock.is_set() and msgs.queue.empty():
+                return
+    finally:
+        if not lock.is_set():
+            waiters_per_dp.pop(stats.xid, None)
+
+
+def iter_stats(dp, stats, waiters, logger=None):
+    """
+    Sends a stats request and yields the entries of the reply bodies
+    one by one as the multipart parts arrive.
+    """
+    for msg in iter_stats_reply(dp, stats, waiters, logger):
+        for entry in msg.body:
+            yield entry
+
+
 def str_to_int(str_num):
     return int(str(str_num), 0)
 
@@ -437,8 +437,7 @@ def get_queue_config(dp, waiters, port=None, to_user=True):
     return wrap_dpid_dict(dp, configs, to_user)
 
 
-def get_flow_stats(dp, waiters, flow=None, to_user=True):
-    flow = flow if flow else {}
+def _flow_stats_request(dp, flow):
     table_id = UTIL.ofp_table_from_user(
         flow.get('table_id', dp.ofproto.OFPTT_ALL))
     flags = str_to_int(flow.get('flags', 0))
@@ -456,6 +455,59 @@ def get_flow_stats(dp, waiters, flow=None, to_user=True):
     stats = dp.ofproto_parser.OFPFlowStatsRequest(
         dp, flags, table_id, out_port, out_group, cookie, cookie_mask,
         match)
+    return stats, priority
+
+
+def _flow_stats_to_dict(stats, to_user):
+    s = {'priority': stats.priority,
+         'cookie': stats.cookie,
+         'idle_timeout': stats.idle_timeout,
+         'hard_timeout': stats.hard_timeout,
+         'byte_count': stats.byte_count,
+         'duration_sec': stats.duration_sec,
+         'duration_nsec': stats.duration_nsec,
+         'packet_count': stats.packet_count,
+         'length': stats.length,
+         'flags': stats.flags}
+
+    if to_user:
+        s['actions'] = actions_to_str(stats.instructions)
+        s['match'] = match_to_str(stats.match)
+        s['table_id'] = UTIL.ofp_table_to_user(stats.table_id)
+
+    else:
+        s['actions'] = stats.instructions
+        s['instructions'] = stats.instructions
+        s['match'] = stats.match
+        s['table_id'] = stats.table_id
+
+    return s
+
+
+def _iter_flow_stats(dp, waiters, stats, priority, to_user):
+    for stats in ofctl_utils.iter_stats(dp, stats, waiters, LOG):
+        if 0 <= priority != stats.priority:
+            continue
+        yield _flow_stats_to_dict(stats, to_user)
+
+
+def iter_flow_stats(dp, waiters, flow=None, to_user=True):
+    """
+    Returns an iterator over the flow stats entries of dp, in the same
+    form as the list returned by get_flow_stats().
+
+    Each entry is converted as soon as its multipart reply part arrives,
+    so the whole reply is never held in memory. The filters of flow are
+    validated before returning, which raises ValueError on bad input.
+    """
+    flow = flow if flow else {}
+    stats, priority = _flow_stats_request(dp, flow)
+    return _iter_flow_stats(dp, waiters, stats, priority, to_user)
+
+
+def get_flow_stats(dp, waiters, flow=None, to_user=True):
+    flow = flow if flow else {}
+    stats, priority = _flow_stats_request(dp, flow)
 
     msgs = []
     ofctl_utils.send_stats_request(dp, stats, waiters, msgs, LOG)
@@ -465,30 +517,7 @@ def get_flow_stats(dp, waiters, flow=None, to_user=True):
         for stats in msg.body:
             if 0 <= priority != stats.priority:
                 continue
-
-            s = {'priority': stats.priority,
-                 'cookie': stats.cookie,
-                 'idle_timeout': stats.idle_timeout,
-                 'hard_timeout': stats.hard_timeout,
-                 'byte_count': stats.byte_count,
-                 'duration_sec': stats.duration_sec,
-                 'duration_nsec': stats.duration_nsec,
-                 'packet_count': stats.packet_count,
-                 'length': stats.length,
-                 'flags': stats.flags}
-
-            if to_user:
-                s['actions'] = actions_to_str(stats.instructions)
-                s['match'] = match_to_str(stats.match)
-                s['table_id'] = UTIL.ofp_table_to_user(stats.table_id)
-
-            else:
-                s['actions'] = stats.instructions
-                s['instructions'] = stats.instructions
-                s['match'] = stats.match
-                s['table_id'] = stats.table_id
-
-            flows.append(s)
+            flows.append(_flow_stats_to_dict(stats, to_user))
 
     return wrap_dpid_dict(dp, flows, to_user)
 
@@ -40,6 +40,7 @@ class ethernet(packet_base.PacketBase):
 
     _PACK_STR = '!6s6sH'
     _MIN_LEN = struct.calcsize(_PACK_STR)
+    _SERIALIZE_PAYLOAD_LEN_ONLY = True
     _MIN_PAYLOAD_LEN = 46
     _TYPE = {
         'ascii': [
@@ -71,6 +71,7 @@ class ipv4(packet_base.PacketBase):
 
     _PACK_STR = '!BBHHHBBH4s4s'
     _MIN_LEN = struct.calcsize(_PACK_STR)
+    _SERIALIZE_PAYLOAD_LEN_ONLY = True
     _TYPE = {
         'ascii': [
             'src', 'dst'
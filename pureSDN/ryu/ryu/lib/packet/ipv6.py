@@ -61,6 +61,7 @@ class ipv6(packet_base.PacketBase):
 
     _PACK_STR = '!IHBB16s16s'
     _MIN_LEN = struct.calcsize(_PACK_STR)
+    _SERIALIZE_PAYLOAD_LEN_ONLY = True
     _IPV6_EXT_HEADER_TYPE = {}
     _TYPE = {
         'ascii': [
@@ -43,6 +43,7 @@ class mpls(packet_base.PacketBase):
 
     _PACK_STR = '!I'
     _MIN_LEN = struct.calcsize(_PACK_STR)
+    _SERIALIZE_PAYLOAD_LEN_ONLY = True
 
     def __init__(self, label=0, exp=0, bsb=1, ttl=255):
         super(mpls, self).__init__()
@@ -39,6 +39,73 @@ for _, m in mod:
 PKT_CLS_DICT = dict(cls_list)
 
 
+def _is_padding(buf):
+    # True if buf is empty or all zeros, without copying bytes and
+    # bytearray. Other buffers (memoryview, ...) have no count().
+    try:
+        return buf.count(b'\x00') == len(buf)
+    except AttributeError:
+        return not any(bytearray(buf))
+
+
+def _header_len(proto):
+    # Only an estimate, _serialize_layers() grows its buffer if it is short.
+    try:
+        return len(proto)
+    except (AttributeError, TypeError):
+        return proto._MIN_LEN
+
+
+def _serialize_layers(protocols):
+    """Encode *protocols* into a single buffer.
+
+    The buffer is sized from the header lengths up front and each layer
+    is written in front of its payload, inner-most first, so no layer
+    is copied more than once. Every layer sees its payload as a
+    memoryview over the buffer, which is all checksum calculations need.
+
+    Returns the encoded bytearray and, for each layer, the tuple
+    (offset, payload_end) of its header and payload in it.
+    """
+    r = protocols[::-1]
+    size = tailroom = 0
+    for p in r:
+        if isinstance(p, packet_base.PacketBase):
+            size += _header_len(p)
+            tailroom = max(tailroom, p._MIN_PAYLOAD_LEN)
+        else:
+            size += len(p)
+    start = end = size
+    buf = bytearray(size + tailroom)
+    view = memoryview(buf)
+    spans = []
+    for i, p in enumerate(r):
+        if isinstance(p, packet_base.PacketBase):
+            if i == len(r) - 1:
+                prev = None
+            else:
+                prev = r[i + 1]
+            # Reserve the zero padding a layer such as ethernet would
+            # append to a short payload.
+            end = max(end, start + p._MIN_PAYLOAD_LEN)
+            data = p.serialize(view[start:end], prev)
+        else:
+            data = six.binary_type(p)
+        length = len(data)
+        if length > start:
+            grow = length - start
+            buf = bytearray(grow) + buf
+            view = memoryview(buf)
+            start += grow
+            end += grow
+            spans = [(o + grow, e + grow) for o, e in spans]
+        start -= length
+        view[start:start + length] = data
+        spans.append((start, end))
+    spans = [(o - start, e - start) for o, e in reversed(spans)]
+    return buf[start:end], spans
+
+
 class Packet(StringifyMixin):
     """A packet decoder/encoder class.
 
@@ -70,7 +137,7 @@ class Packet(StringifyMixin):
         rest_data = self.data
         while cls:
             # Ignores an empty buffer
-            if not six.binary_type(rest_data).strip(b'\x00'):
+            if _is_padding(rest_data):
                 break
             try:
                 proto, cls, rest_data = cls.parser(rest_data)
@@ -79,7 +146,7 @@ class Packet(StringifyMixin):
             if proto:
                 self.protocols.append(proto)
         # If rest_data is all padding, we ignore rest_data
-        if rest_data and six.binary_type(rest_data).strip(b'\x00'):
+        if rest_data and not _is_padding(rest_data):
             self.protocols.append(rest_data)
 
     def serialize(self):
@@ -88,18 +155,7 @@ class Packet(StringifyMixin):
         This method is legal only when encoding a packet.
         """
 
-        self.data = bytearray()
-        r = self.protocols[::-1]
-        for i, p in enumerate(r):
-            if isinstance(p, packet_base.PacketBase):
-                if i == len(r) - 1:
-                    prev = None
-                else:
-                    prev = r[i + 1]
-                data = p.serialize(self.data, prev)
-            else:
-                data = six.binary_type(p)
-            self.data = bytearray(data + self.data)
+        self.data = _serialize_layers(self.protocols)[0]
 
     @classmethod
     def from_jsondict(cls, dict_, decode_string=base64.b64decode,
@@ -178,6 +234,189 @@ class Packet(StringifyMixin):
     __repr__ = __str__  # note: str(list) uses __repr__ for elements
 
 
+class LazyPacket(Packet):
+    """A packet decoder class decoding protocol headers on demand.
+
+    Same as Packet, except that *data* is decoded only as far as needed:
+    get_protocol() decodes headers in on-wire order until it finds the
+    requested one. get_protocols(), iteration and the protocols
+    attribute decode the whole packet.
+
+    Use get_packet() to share one instance among the applications
+    handling the same message.
+    """
+
+    def __init__(self, data, parse_cls=ethernet.ethernet):
+        self._cls = None
+        self._rest_data = None
+        super(LazyPacket, self).__init__(data, parse_cls=parse_cls)
+
+    @property
+    def protocols(self):
+        while self._decode():
+            pass
+        return self._protocols
+
+    @protocols.setter
+    def protocols(self, protocols):
+        self._protocols = protocols
+
+    def _parser(self, cls):
+        self._cls = cls
+        self._rest_data = self.data
+
+    def _decode(self):
+        # Decodes the next header, returns False once all are decoded.
+        rest_data = self._rest_data
+        if rest_data is None:
+            return False
+        cls = self._cls
+        while cls:
+            # Ignores an empty buffer
+            if _is_padding(rest_data):
+                break
+            try:
+                proto, cls, rest_data = cls.parser(rest_data)
+            except struct.error:
+                break
+            if proto:
+                self._protocols.append(proto)
+                self._cls = cls
+                self._rest_data = rest_data
+                return True
+        self._cls = None
+        self._rest_data = None
+        # If rest_data is all padding, we ignore rest_data
+        if rest_data and not _is_padding(rest_data):
+            self._protocols.append(rest_data)
+        return False
+
+    def get_protocol(self, protocol):
+        if isinstance(protocol, packet_base.PacketBase):
+            protocol = protocol.__class__
+        for p in self._protocols:
+            if isinstance(p, protocol):
+                return p
+        while self._decode():
+            if isinstance(self._protocols[-1], protocol):
+                return self._protocols[-1]
+        return None
+
+    def stringify_attrs(self):
+        for k, v in super(LazyPacket, self).stringify_attrs():
+            yield k, v
+        yield 'protocols', self.protocols
+
+
+def get_packet(msg):
+    """Returns a LazyPacket decoding msg.data.
+
+    The instance is kept in *msg*, so that every application handling
+    the same message (e.g. an OFPPacketIn) shares the decoded headers.
+    """
+    pkt = getattr(msg, '_packet', None)
+    if pkt is None:
+        pkt = LazyPacket(msg.data)
+        msg._packet = pkt
+    return pkt
+
+
+class PacketTemplate(object):
+    """An encoder for packets sent repeatedly with a few fields changed,
+    such as ARP or ICMP echo replies.
+
+    *protocols* is the list of protocol headers in on-wire order. They are
+    serialized once into self.data. After modifying some of them, call
+    update() with the modified headers to rewrite self.data in place.
+    Only the modified headers, the headers right after them (which are
+    encoded with them as prev) and the enclosing headers whose encoding
+    depends on the payload contents (checksums) are re-serialized into
+    their slots, the other bytes are reused as they are. Fields computed
+    by the first serialization (checksums, lengths, ...) are computed
+    again for the re-serialized headers.
+
+    If a header changes its length, the whole packet is serialized again.
+    self.data is rewritten by the next update(), copy it to keep it.
+    """
+
+    def __init__(self, protocols):
+        self.protocols = list(protocols)
+        self._serialize()
+
+    def _serialize(self):
+        before = [vars(p).copy() if isinstance(p, packet_base.PacketBase)
+                  else None for p in self.protocols]
+        self.data, self._spans = _serialize_layers(self.protocols)
+        # attribute name -> (value before serialization, value after it)
+        self._computed = []
+        for p, attrs in zip(self.protocols, before):
+            computed = {}
+            if attrs is not None:
+                for k, v in vars(p).items():
+                    if k in attrs and attrs[k] is not v and attrs[k] != v:
+                        computed[k] = (attrs[k], v)
+            self._computed.append(computed)
+
+    def _reset_computed(self, i):
+        # Restore the fields filled in by serialize() unless they were
+        # set since.
+        p = self.protocols[i]
+        for k, (initial, value) in self._computed[i].items():
+            current = getattr(p, k)
+            if current is value or current == value:
+                setattr(p, k, initial)
+
+    def update(self, *protocols):
+        """Re-encode the modified headers *protocols* and return self.data.
+        """
+        indexes = set(i for i, p in enumerate(self.protocols)
+                      if any(p is q for q in protocols))
+        if not indexes:
+            return self.data
+        # The header following a modified one is encoded with it as prev
+        # (e.g. tcp, udp and icmpv6 checksums over the ip pseudo header).
+        for i in list(indexes):
+            if (i + 1 < len(self.protocols) and
+                    isinstance(self.protocols[i + 1],
+                               packet_base.PacketBase)):
+                indexes.add(i + 1)
+
+        view = memoryview(self.data)
+        payload_changed = False
+        for i in range(max(indexes), -1, -1):
+            p = self.protocols[i]
+            if i not in indexes and not (
+                    payload_changed and
+                    isinstance(p, packet_base.PacketBase) and
+                    not p._SERIALIZE_PAYLOAD_LEN_ONLY):
+                continue
+            payload_changed = True
+            offset, end = self._spans[i]
+            if i + 1 < len(self.protocols):
+                payload_start = self._spans[i + 1][0]
+            else:
+                payload_start = end
+            if isinstance(p, packet_base.PacketBase):
+                self._reset_computed(i)
+                if i == 0:
+                    prev = None
+                else:
+                    prev = self.protocols[i - 1]
+                data = p.serialize(view[payload_start:end], prev)
+                computed = self._computed[i]
+                for k, (initial, _value) in computed.items():
+                    computed[k] = (initial, getattr(p, k))
+            else:
+                data = six.binary_type(p)
+            if len(data) != payload_start - offset:
+                for j in range(len(self.protocols)):
+                    self._reset_computed(j)
+                self._serialize()
+                return self.data
+            view[offset:payload_start] = data
+        return self.data
+
+
 # XXX: Hack for preventing recursive import
 def _PacketBase__div__(self, trailer):
     pkt = Packet()
@@ -22,6 +22,11 @@ from ryu.lib import stringify
 class PacketBase(stringify.StringifyMixin):
     """A base class for a protocol (ethernet, ipv4, ...) header."""
     _TYPES = {}
+    # True if serialize() only depends on the length of the payload, not
+    # on its contents (e.g. no checksum over the payload).
+    _SERIALIZE_PAYLOAD_LEN_ONLY = False
+    # serialize() pads payloads shorter than this with zeros.
+    _MIN_PAYLOAD_LEN = 0
 
     @classmethod
     def get_packet_type(cls, type_):
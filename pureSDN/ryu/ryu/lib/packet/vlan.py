@@ -32,6 +32,7 @@ from . import ether_types as ether
 class _vlan(packet_base.PacketBase):
     _PACK_STR = "!HH"
     _MIN_LEN = struct.calcsize(_PACK_STR)
+    _SERIALIZE_PAYLOAD_LEN_ONLY = True
 
     @abc.abstractmethod
     def __init__(self, pcp, cfi, vid, ethertype):
@@ -17,7 +17,9 @@
 from __future__ import print_function
 
 import base64
+import functools
 import inspect
+import json
 
 import six
 
@@ -38,7 +40,12 @@ import six
 # 'len', 'property', 'set', 'type'
 # A bit more generic way is adopted
 
-_RESERVED_KEYWORD = dir(six.moves.builtins)
+_RESERVED_KEYWORD = frozenset(dir(six.moves.builtins))
+
+# Upper bound of the per-class caches of encoders and decoders below.
+# Their keys include the encode_string/decode_string functions, which
+# callers may create on the fly.
+_CODEC_CACHE_SIZE = 4096
 
 _mapdict = lambda f, d: dict([(k, f(v)) for k, v in d.items()])
 _mapdict_key = lambda f, d: dict([(f(k), v) for k, v in d.items()])
@@ -112,6 +119,23 @@ _types = {
 }
 
 
+@functools.lru_cache(maxsize=_CODEC_CACHE_SIZE)
+def _cached_type(cls, k):
+    # StringifyMixin._get_type() of cls, looked up once per attribute.
+    if hasattr(cls, '_TYPE'):
+        for t, attrs in cls._TYPE.items():
+            if k in attrs:
+                return _types[t]
+    return None
+
+
+@functools.lru_cache(maxsize=_CODEC_CACHE_SIZE)
+def _cached_default_codec(cls, name, string_codec):
+    # The default encoder or decoder of cls, generated once per class
+    # and string codec.
+    return getattr(cls, name)(string_codec)
+
+
 class StringifyMixin(object):
 
     _TYPE = {}
@@ -187,18 +211,15 @@ class StringifyMixin(object):
 
     @classmethod
     def _get_type(cls, k):
-        if hasattr(cls, '_TYPE'):
-            for t, attrs in cls._TYPE.items():
-                if k in attrs:
-                    return _types[t]
-        return None
+        return _cached_type(cls, k)
 
     @classmethod
     def _get_encoder(cls, k, encode_string):
         t = cls._get_type(k)
         if t:
             return t.encode
-        return cls._get_default_encoder(encode_string)
+        return _cached_default_codec(cls, '_get_default_encoder',
+                                     encode_string)
 
     @classmethod
     def _encode_value(cls, k, v, encode_string=base64.b64encode):
@@ -259,11 +280,22 @@ class StringifyMixin(object):
         =============  =====================================================
         """
         dict_ = {}
-        encode = lambda key, val: self._encode_value(key, val, encode_string)
+        encode = self._encode_value
         for k, v in obj_attrs(self):
-            dict_[k] = encode(k, v)
+            dict_[k] = encode(k, v, encode_string)
         return {self.__class__.__name__: dict_}
 
+    def to_json_bytes(self, encode_string=base64.b64encode):
+        """
+        This method returns the JSON document of to_jsondict() as UTF-8
+        encoded bytes.
+
+        The result is the same as json.dumps(self.to_jsondict()), but
+        it is written out directly without building the dicts first.
+        Please refer to to_jsondict() for the encode_string argument.
+        """
+        return to_json_bytes(self, encode_string)
+
     @classmethod
     def cls_from_jsondict_key(cls, k):
         # find a class with the given name from our class' module.
@@ -283,7 +315,8 @@ class StringifyMixin(object):
         t = cls._get_type(k)
         if t:
             return t.decode
-        return cls._get_default_decoder(decode_string)
+        return _cached_default_codec(cls, '_get_default_decoder',
+                                     decode_string)
 
     @classmethod
     def _decode_value(cls, k, json_value, decode_string=base64.b64decode,
@@ -366,6 +399,113 @@ class StringifyMixin(object):
                                     registered_dict.values()])
 
 
+@functools.lru_cache(maxsize=_CODEC_CACHE_SIZE)
+def _has_default_json(cls):
+    # Whether to_json_bytes() can write objects of cls by itself, i.e.
+    # cls does not override how to_jsondict() encodes its attributes.
+    base = StringifyMixin
+    return (cls.to_jsondict is base.to_jsondict and
+            cls._encode_value.__func__ is base._encode_value.__func__ and
+            cls._get_encoder.__func__ is base._get_encoder.__func__ and
+            cls._get_type.__func__ is base._get_type.__func__ and
+            cls._get_default_encoder.__func__ is
+            base._get_default_encoder.__func__)
+
+
+@functools.lru_cache(maxsize=_CODEC_CACHE_SIZE)
+def _json_key(k):
+    return json.dumps(k) + ': '
+
+
+def _write_json_obj(obj, encode_string, out):
+    cls = obj.__class__
+    if not _has_default_json(cls):
+        if encode_string is base64.b64encode:
+            json_value = obj.to_jsondict()
+        else:
+            json_value = obj.to_jsondict(encode_string)
+        out.append(json.dumps(json_value))
+        return
+    out.append('{' + _json_key(cls.__name__) + '{')
+    sep = ''
+    for k, v in obj_attrs(obj):
+        out.append(sep + _json_key(k))
+        sep = ', '
+        t = cls._get_type(k)
+        if t:
+            out.append(json.dumps(t.encode(v)))
+        else:
+            _write_json_value(v, encode_string, out)
+    out.append('}}')
+
+
+def _write_json_value(v, encode_string, out):
+    # Writes v as the default encoder of StringifyMixin would encode it.
+    if type(v) is int:
+        out.append(str(v))
+    elif isinstance(v, (bytes, six.text_type)):
+        if isinstance(v, six.text_type):
+            v = v.encode('utf-8')
+        json_value = encode_string(v)
+        if six.PY3:
+            json_value = json_value.decode('ascii')
+        out.append(json.dumps(json_value))
+    elif isinstance(v, list):
+        out.append('[')
+        sep = ''
+        for ve in v:
+            out.append(sep)
+            sep = ', '
+            _write_json_value(ve, encode_string, out)
+        out.append(']')
+    elif isinstance(v, dict):
+        out.append('{')
+        sep = ''
+        for k, ve in _mapdict_key(str, v).items():
+            out.append(sep + _json_key(k))
+            sep = ', '
+            _write_json_value(ve, encode_string, out)
+        out.append('}')
+    elif isinstance(v, StringifyMixin):
+        # nested objects are encoded with the default encode_string
+        _write_json_obj(v, base64.b64encode, out)
+    elif v is None or isinstance(v, (bool, float)):
+        out.append(json.dumps(v))
+    else:
+        try:
+            json_value = v.to_jsondict()
+        except Exception:
+            json_value = v
+        out.append(json.dumps(json_value))
+
+
+def to_json_bytes(value, encode_string=base64.b64encode):
+    """
+    Returns the JSON document of value as UTF-8 encoded bytes.
+
+    value is a StringifyMixin object or a list of them. The result is
+    the same as json.dumps() of the to_jsondict() of each object, but is
+    written out directly without building the dicts.
+    """
+    out = []
+    if isinstance(value, StringifyMixin):
+        _write_json_obj(value, encode_string, out)
+    elif isinstance(value, (list, tuple)):
+        out.append('[')
+        sep = ''
+        for v in value:
+            out.append(sep)
+            sep = ', '
+            if isinstance(v, StringifyMixin):
+                _write_json_obj(v, encode_string, out)
+            else:
+                _write_json_value(v, encode_string, out)
+        out.append(']')
+    else:
+        _write_json_value(value, encode_string, out)
+    return ''.join(out).encode('utf-8')
+
+
 def obj_python_attrs(msg_):
     """iterate object attributes for stringify purposes
     """
@@ -378,6 +518,38 @@ def obj_python_attrs(msg_):
         return
     base = getattr(msg_, '_base_attributes', [])
     opt = getattr(msg_, '_opt_attributes', [])
+    try:
+        instance_attrs = vars(msg_)
+    except TypeError:
+        instance_attrs = None
+    if instance_attrs is not None:
+        # Only instance attributes and _opt_attributes can be yielded
+        # below, so they are picked directly instead of going through
+        # every member of the class. The result is the same.
+        cls = msg_.__class__
+        attrs = []
+        for k in opt:
+            if k in instance_attrs or hasattr(cls, k):
+                try:
+                    attrs.append((k, getattr(msg_, k)))
+                except AttributeError:
+                    pass
+        for k, v in instance_attrs.items():
+            if k in opt:
+                continue
+            elif k.startswith('_'):
+                continue
+            elif callable(v):
+                continue
+            elif k in base:
+                continue
+            elif hasattr(cls, k):
+                continue
+            attrs.append((k, v))
+        attrs.sort(key=lambda attr: attr[0])
+        for attr in attrs:
+            yield attr
+        return
     for k, v in inspect.getmembers(msg_):
         if k in opt:
             pass
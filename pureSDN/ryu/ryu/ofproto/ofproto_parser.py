@@ -35,11 +35,14 @@ if six.PY3:
     buffer = bytes
 
 
-def header(buf):
-    assert len(buf) >= ofproto_common.OFP_HEADER_SIZE
+def header(buf, offset=0):
+    assert len(buf) - offset >= ofproto_common.OFP_HEADER_SIZE
     # LOG.debug('len %d bufsize %d', len(buf), ofproto.OFP_HEADER_SIZE)
+    if not isinstance(buf, (bytes, bytearray, memoryview)):
+        buf = six.binary_type(buf)
+    # Unpack in place; buf may be a large receive buffer.
     return struct.unpack_from(ofproto_common.OFP_HEADER_PACK_STR,
-                              six.binary_type(buf))
+                              buf, offset)
 
 
 _MSG_PARSERS = {}
@@ -724,6 +724,9 @@ class FlowWildcards(object):
         return not self.wildcards & (1 << shift)
 
 
+_FLOW_WILDCARDS_NONE = FlowWildcards().__dict__
+
+
 class OFPMatch(StringifyMixin):
     """
     Flow Match Structure
@@ -1036,8 +1039,8 @@ class OFPMatch(StringifyMixin):
         self.fields.append(OFPMatchField.make(header, value, mask))
 
     def _composed_with_old_api(self):
-        return (self.fields and not self._fields2) or \
-            self._wc.__dict__ != FlowWildcards().__dict__
+        return (not self._fields2 and self.fields) or \
+            self._wc.__dict__ != _FLOW_WILDCARDS_NONE
 
     def serialize(self, buf, offset):
         """
@@ -1049,14 +1052,11 @@ class OFPMatch(StringifyMixin):
         if self._composed_with_old_api():
             return self.serialize_old(buf, offset)
 
-        fields = [ofproto.oxm_from_user(k, uv) for (k, uv)
-                  in self._fields2]
-
         hdr_pack_str = '!HH'
         field_offset = offset + struct.calcsize(hdr_pack_str)
-        for (n, value, mask) in fields:
-            field_offset += ofproto.oxm_serialize(n, value, mask, buf,
-                                                  field_offset)
+        for (k, uv) in self._fields2:
+            field_offset += ofproto.oxm_serialize_user(k, uv, buf,
+                                                       field_offset)
 
         length = field_offset - offset
         msg_pack_into(hdr_pack_str, buf, offset,
@@ -1328,8 +1328,7 @@ class OFPMatch(StringifyMixin):
         fields = []
         try:
             while length > 0:
-                n, value, mask, field_len = ofproto.oxm_parse(buf, offset)
-                k, uv = ofproto.oxm_to_user(n, value, mask)
+                k, uv, field_len = ofproto.oxm_parse_user(buf, offset)
                 fields.append((k, uv))
                 offset += field_len
                 length -= field_len
@@ -74,8 +74,10 @@ from ryu.ofproto.oxx_fields import (
     _normalize_user,
     _parse,
     _parse_header,
+    _parse_user,
     _serialize,
-    _serialize_header)
+    _serialize_header,
+    _serialize_user)
 from ryu.ofproto import ofproto_common
 
 
@@ -204,6 +206,12 @@ def generate(modname):
              functools.partial(_serialize, oxx, mod))
     add_attr('oxm_serialize_header',
              functools.partial(_serialize_header, oxx, mod))
+    # Precompiled fast paths of oxm_parse + oxm_to_user and of
+    # oxm_from_user + oxm_serialize.
+    add_attr('oxm_parse_user',
+             functools.partial(_parse_user, oxx, mod, num_to_field, {}))
+    add_attr('oxm_serialize_user',
+             functools.partial(_serialize_user, oxx, mod, name_to_field, {}))
 
     add_attr('oxm_to_jsondict', _to_jsondict)
     add_attr('oxm_from_jsondict', _from_jsondict)
@@ -23,9 +23,12 @@
 #   value and mask are on-wire bytes.
 #   mask is None if no mask.
 
-import six
+import binascii
+import socket
 import struct
 
+import six
+
 from ryu.ofproto import ofproto_common
 from ryu.lib.pack_utils import msg_pack_into
 from ryu.lib import type_desc
@@ -263,3 +266,147 @@ def _serialize(oxx, mod, n, value, mask, buf, offset):
                       (n << 9) | (0 << 8) | (exp_hdr_len + value_len),
                       bytes(exp_hdr), value)
     return struct.calcsize(pack_str)
+
+
+# Precompiled codecs.
+#
+# Parsing and serializing a known, non-experimenter field goes through
+# one cached struct.Struct per OXM header (for decoding) or per field
+# name (for encoding) instead of the generic helpers above.  Anything
+# the codecs do not cover falls back to the generic helpers, which keep
+# their error reporting.
+
+_HEADER = struct.Struct('!I')
+_INT_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+_IPV4 = struct.Struct('!4B')
+_MAC = struct.Struct('!6B')
+
+
+def _ipv4_to_user(binary):
+    return '%d.%d.%d.%d' % _IPV4.unpack(binary)
+
+
+def _ipv4_from_user(text):
+    try:
+        return socket.inet_pton(socket.AF_INET, text)
+    except (socket.error, TypeError, ValueError):
+        return type_desc.IPv4Addr.from_user(text)
+
+
+def _mac_to_user(binary):
+    return '%02x:%02x:%02x:%02x:%02x:%02x' % _MAC.unpack(binary)
+
+
+def _mac_from_user(text):
+    if len(text) == 17 and text.count(':') == 5:
+        try:
+            return binascii.unhexlify(text.replace(':', ''))
+        except (TypeError, ValueError):
+            pass
+    return type_desc.MacAddr.from_user(text)
+
+
+def _value_codec(t):
+    # Returns (struct format, to_user, from_user) of a field type.
+    # Integers are packed as they are, so their converters are None.
+    if isinstance(t, type_desc.IntDescr) and t.size in _INT_FORMATS:
+        return _INT_FORMATS[t.size], None, None
+    if t is type_desc.IPv4Addr:
+        return '4s', _ipv4_to_user, _ipv4_from_user
+    if t is type_desc.MacAddr:
+        return '6s', _mac_to_user, _mac_from_user
+    return '%ds' % t.size, t.to_user, t.from_user
+
+
+def _compile_decoder(mod, num_to_field, header):
+    n = header >> 9
+    if (n >> 7) == OFPXXC_EXPERIMENTER:
+        return None
+    f = num_to_field.get(n)
+    if f is None:
+        return None
+    hasmask = mod.oxm_tlv_header_extract_hasmask(header)
+    value_len = header & 0xff
+    if hasmask:
+        value_len //= 2
+    if value_len != getattr(f.type, 'size', None):
+        return None
+    fmt, to_user, _ = _value_codec(f.type)
+    codec = struct.Struct('!4x' + fmt * (2 if hasmask else 1))
+    return f.name, codec.unpack_from, to_user, 4 + (header & 0xff), hasmask
+
+
+def _parse_user(oxx, mod, num_to_field, decoders, buf, offset):
+    (header, ) = _HEADER.unpack_from(buf, offset)
+    decoder = decoders.get(header)
+    if decoder is None:
+        decoder = _compile_decoder(mod, num_to_field, header)
+        if decoder is None:
+            (n, value, mask, field_len) = _parse(mod, buf, offset)
+            (name, user_value) = _to_user(oxx, num_to_field, n, value, mask)
+            return name, user_value, field_len
+        decoders[header] = decoder
+    (name, unpack_from, to_user, field_len, hasmask) = decoder
+    if hasmask:
+        (value, mask) = unpack_from(buf, offset)
+        if to_user is not None:
+            return name, (to_user(value), to_user(mask)), field_len
+        return name, (value, mask), field_len
+    (value, ) = unpack_from(buf, offset)
+    if to_user is not None:
+        value = to_user(value)
+    return name, value, field_len
+
+
+def _compile_encoder(name_to_field, name):
+    f = name_to_field.get(name)
+    if f is None or isinstance(f.num, tuple):
+        return None
+    size = getattr(f.type, 'size', None)
+    if size is None:
+        return None
+    fmt, _, from_user = _value_codec(f.type)
+    return ((f.num << 9) | size, struct.Struct('!I' + fmt),
+            (f.num << 9) | (1 << 8) | (size * 2), struct.Struct('!I' + fmt * 2),
+            from_user, size)
+
+
+def _serialize_user(oxx, mod, name_to_field, encoders, name, user_value,
+                    buf, offset):
+    encoder = encoders.get(name)
+    if encoder is None:
+        encoder = _compile_encoder(name_to_field, name)
+        if encoder is None:
+            (n, value, mask) = _from_user(oxx, name_to_field, name,
+                                          user_value)
+            return _serialize(oxx, mod, n, value, mask, buf, offset)
+        encoders[name] = encoder
+    (header, codec, header_w, codec_w, from_user, size) = encoder
+    if isinstance(user_value, (tuple, list)):
+        (value, mask) = user_value
+    else:
+        value = user_value
+        mask = None
+    try:
+        if from_user is not None:
+            value = from_user(value)
+            if mask is not None:
+                mask = from_user(mask)
+            elif isinstance(value, tuple):
+                # CIDR notation, see _from_user.
+                value, mask = value
+            if len(value) != size or (mask is not None and len(mask) != size):
+                raise ValueError(name)
+        if mask is None:
+            args = (header, value)
+        else:
+            codec = codec_w
+            args = (header_w, value, mask)
+        needed_len = offset + codec.size
+        if len(buf) < needed_len:
+            buf += bytearray(needed_len - len(buf))
+        codec.pack_into(buf, offset, *args)
+    except (struct.error, TypeError, ValueError):
+        (n, value, mask) = _from_user(oxx, name_to_field, name, user_value)
+        return _serialize(oxx, mod, n, value, mask, buf, offset)
+    return codec.size
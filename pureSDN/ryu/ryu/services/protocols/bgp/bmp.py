@@ -155,7 +155,7 @@ class BMPClient(Activity):
 
     def _construct_update(self, path):
         # Get copy of path's path attributes.
-        new_pathattr = [attr for attr in path.pathattr_map.values()]
+        new_pathattr = [attr for attr in path.frozen_pathattr_map.values()]
 
         if path.is_withdraw:
             if isinstance(path, Ipv4Path):
@@ -181,6 +181,10 @@ class CoreService(Factory, Activity):
     def signal_bus(self):
         return self._signal_bus
 
+    @property
+    def bgp_processor(self):
+        return self._bgp_processor
+
     def enqueue_for_bgp_processing(self, dest):
         return self._bgp_processor.enqueue(dest)
 
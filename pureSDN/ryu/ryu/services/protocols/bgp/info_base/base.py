@@ -21,17 +21,19 @@
 import abc
 from abc import ABCMeta
 from abc import abstractmethod
-from copy import copy
 import logging
 import functools
 import netaddr
 import six
+import sys
+import weakref
 
 from ryu.lib.packet.bgp import RF_IPv4_UC
 from ryu.lib.packet.bgp import RouteTargetMembershipNLRI
 from ryu.lib.packet.bgp import BGP_ATTR_TYPE_EXTENDED_COMMUNITIES
 from ryu.lib.packet.bgp import BGPPathAttributeLocalPref
 from ryu.lib.packet.bgp import BGP_ATTR_TYPE_AS_PATH
+from ryu.lib.packet.bgp import BGP_ATTR_FLAG_EXTENDED_LENGTH
 
 from ryu.services.protocols.bgp.base import OrderedDict
 from ryu.services.protocols.bgp.constants import VPN_TABLE
@@ -39,10 +41,29 @@ from ryu.services.protocols.bgp.constants import VRF_TABLE
 from ryu.services.protocols.bgp.model import OutgoingRoute
 from ryu.services.protocols.bgp.processor import BPR_ONLY_PATH
 from ryu.services.protocols.bgp.processor import BPR_UNKNOWN
+from ryu.services.protocols.bgp.processor import decision_key
+from ryu.services.protocols.bgp.processor import select_best_path
 
 
 LOG = logging.getLogger('bgpspeaker.info_base.base')
 
+# Minimum number of destinations deleted from a table before keys of
+# deleted destinations are pruned from its per-source and per-RT indexes.
+MIN_INDEX_PRUNE_COUNT = 1024
+
+
+def _sizeof(obj, seen):
+    # Size of `obj` and of its attribute dict, if any. Objects whose id
+    # is in `seen` are counted as zero, others are added to it.
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    obj_dict = getattr(obj, '__dict__', None)
+    if obj_dict is not None:
+        size += sys.getsizeof(obj_dict)
+    return size
+
 
 @six.add_metaclass(ABCMeta)
 class Table(object):
@@ -54,8 +75,22 @@ class Table(object):
     """
     ROUTE_FAMILY = RF_IPv4_UC
 
+    # If True, destinations are also indexed by the route targets of their
+    # paths, so that clean_uninteresting_paths() only visits destinations
+    # having paths with route targets which are not of interest.
+    RT_INDEXED = False
+
     def __init__(self, scope_id, core_service, signal_bus):
         self._destinations = dict()
+        # Keys of destinations which have, or had, paths from a source or
+        # sent routes to a peer. {source: set(table_key)}
+        self._dests_by_source = {}
+        # Keys of destinations which have, or had, paths with a route
+        # target, if RT_INDEXED. {rt: set(table_key)}
+        self._dests_by_rt = {}
+        self._dests_without_rts = set()
+        # Number of destinations deleted since the indexes were pruned.
+        self._deleted_dest_count = 0
         # Scope in which this table exists.
         # If this table represents the VRF, then this could be a VPN ID.
         # For global/VPN tables this should be None
@@ -85,6 +120,29 @@ class Table(object):
     def values(self):
         return iter(self._destinations.values())
 
+    def memory_usage(self, seen=None):
+        """Returns the approximate number of bytes used by this table,
+        its destinations and their paths.
+
+        Objects are counted once across calls sharing the same `seen`
+        set, so path attributes shared between tables are not counted
+        again.
+        """
+        if seen is None:
+            seen = set()
+        size = (_sizeof(self, seen) +
+                _sizeof(self._destinations, seen) +
+                _sizeof(self._dests_by_source, seen) +
+                _sizeof(self._dests_by_rt, seen) +
+                _sizeof(self._dests_without_rts, seen))
+        for keys in self._dests_by_source.values():
+            size += _sizeof(keys, seen)
+        for keys in self._dests_by_rt.values():
+            size += _sizeof(keys, seen)
+        for dest in self._destinations.values():
+            size += dest._memory_usage(seen)
+        return size
+
     def insert(self, path):
         self._validate_path(path)
         self._validate_nlri(path.nlri)
@@ -96,19 +154,56 @@ class Table(object):
 
     def insert_sent_route(self, sent_route):
         self._validate_path(sent_route.path)
-        dest = self._get_or_create_dest(sent_route.path.nlri)
+        table_key = self._table_key(sent_route.path.nlri)
+        dest = self._get_or_create_dest(sent_route.path.nlri, table_key)
         dest.add_sent_route(sent_route)
+        self._dests_by_source.setdefault(
+            sent_route.sent_peer, set()).add(table_key)
 
     def _insert_path(self, path):
         """Add new path to destination identified by given prefix.
         """
         assert path.is_withdraw is False
-        dest = self._get_or_create_dest(path.nlri)
+        table_key = self._table_key(path.nlri)
+        dest = self._get_or_create_dest(path.nlri, table_key)
         # Add given path to matching Dest.
         dest.add_new_path(path)
+        self._index_path(table_key, path)
         # Return updated destination.
         return dest
 
+    def _index_path(self, table_key, path):
+        """Adds the destination identified by `table_key` to the indexes
+        of the source and route targets of `path`.
+
+        Keys are not removed from the indexes as paths are withdrawn, so
+        an index may refer to destinations which no longer have a path
+        from the source or with the route target, but never misses one.
+        """
+        if path.source is not None:
+            self._dests_by_source.setdefault(path.source, set()).add(
+                table_key)
+        if self.RT_INDEXED:
+            rts = path.get_rts()
+            if not rts:
+                self._dests_without_rts.add(table_key)
+            for rt in rts:
+                self._dests_by_rt.setdefault(rt, set()).add(table_key)
+
+    def _prune_indexes(self):
+        """Removes keys of deleted destinations from the indexes."""
+        destinations = self._destinations
+        for index in (self._dests_by_source, self._dests_by_rt):
+            for key, table_keys in list(index.items()):
+                table_keys = set(k for k in table_keys if k in destinations)
+                if table_keys:
+                    index[key] = table_keys
+                else:
+                    del index[key]
+        self._dests_without_rts = set(
+            k for k in self._dests_without_rts if k in destinations)
+        self._deleted_dest_count = 0
+
     def _insert_withdraw(self, path):
         """Appends given path to withdraw list of Destination for given prefix.
         """
@@ -124,9 +219,18 @@ class Table(object):
 
         Old paths have source version number that is less than current peer
         version number. Also removes sent paths to this peer.
+
+        Only destinations in the index of `peer` are visited.
         """
         LOG.debug('Cleaning paths from table %s for peer %s', self, peer)
-        for dest in self.values():
+        table_keys = self._dests_by_source.pop(peer, None)
+        if not table_keys:
+            return
+        remaining_keys = set()
+        for table_key in table_keys:
+            dest = self._destinations.get(table_key)
+            if dest is None:
+                continue
             # Remove paths learned from this source
             paths_deleted = dest.remove_old_paths_from_source(peer)
             # Remove sent paths to this peer
@@ -137,6 +241,11 @@ class Table(object):
             # future processing.
             if paths_deleted:
                 self._signal_bus.dest_changed(dest)
+            # Paths learned in the current session of this peer are kept.
+            if dest.has_paths_from(peer):
+                remaining_keys.add(table_key)
+        if remaining_keys:
+            self._dests_by_source[peer] = remaining_keys
 
     def clean_uninteresting_paths(self, interested_rts):
         """Cleans table of any path that do not have any RT in common
@@ -144,11 +253,23 @@ class Table(object):
          Parameters:
              - `interested_rts`: (set) of RT that are of interest/that need to
              be preserved
+
+        If RT_INDEXED, only destinations having paths without RTs or with
+        RTs not in `interested_rts` are visited.
         """
         LOG.debug('Cleaning table %s for given interested RTs %s',
                   self, interested_rts)
+        if self.RT_INDEXED:
+            table_keys = set(self._dests_without_rts)
+            for rt, rt_keys in self._dests_by_rt.items():
+                if rt not in interested_rts:
+                    table_keys.update(rt_keys)
+            dests = [self._destinations[k] for k in table_keys
+                     if k in self._destinations]
+        else:
+            dests = self.values()
         uninteresting_dest_count = 0
-        for dest in self.values():
+        for dest in dests:
             added_withdraw = \
                 dest.withdraw_uninteresting_paths(interested_rts)
             if added_withdraw:
@@ -170,6 +291,12 @@ class Table(object):
 
     def delete_dest(self, dest):
         del self._destinations[self._table_key(dest.nlri)]
+        # Keys of deleted destinations are left in the indexes and pruned
+        # once as many destinations as remain in this table were deleted.
+        self._deleted_dest_count += 1
+        if self._deleted_dest_count > max(len(self._destinations),
+                                          MIN_INDEX_PRUNE_COUNT):
+            self._prune_indexes()
 
     def _validate_nlri(self, nlri):
         """Validated *nlri* is the type that this table stores/supports.
@@ -186,8 +313,9 @@ class Table(object):
             raise ValueError('Invalid path. Expected instance of'
                              ' Vpnv4 route family path, got %s.' % path)
 
-    def _get_or_create_dest(self, nlri):
-        table_key = self._table_key(nlri)
+    def _get_or_create_dest(self, nlri, table_key=None):
+        if table_key is None:
+            table_key = self._table_key(nlri)
         dest = self._destinations.get(table_key)
         # If destination for given prefix does not exist we create it.
         if dest is None:
@@ -223,6 +351,7 @@ class NonVrfPathProcessingMixin(object):
     Applies to most of Destinations except for VrfDest
     because they are processed at VRF level, so different logic applies.
     """
+    __slots__ = ()
 
     def __init__(self):
         self._core_service = None  # not assigned yet
@@ -283,6 +412,9 @@ class Destination(object):
     For example, an IP prefix. This is the data-structure that is hung of the
     a routing information base table *Table*.
     """
+    __slots__ = ('_table', '_core_service', '_nlri', '_known_path_list',
+                 '_new_path_list', '_best_path', '_best_path_reason',
+                 '_withdraw_list', '_sent_routes')
 
     ROUTE_FAMILY = RF_IPv4_UC
 
@@ -318,16 +450,6 @@ class Destination(object):
         # destination. (key/value: peer/sent_route)
         self._sent_routes = {}
 
-        # This is an (optional) list of paths that were created as a
-        # result of exporting this route to other tables.
-        # self.exported_paths = None
-
-        # Automatically generated
-        #
-        # On work queue for BGP processor.
-        # self.next_dest_to_process
-        # self.prev_dest_to_process
-
     @property
     def route_family(self):
         return self.__class__.ROUTE_FAMILY
@@ -356,6 +478,19 @@ class Destination(object):
     def sent_routes(self):
         return list(self._sent_routes.values())
 
+    def _memory_usage(self, seen):
+        size = (_sizeof(self, seen) + _sizeof(self._nlri, seen) +
+                _sizeof(self._known_path_list, seen) +
+                _sizeof(self._new_path_list, seen) +
+                _sizeof(self._withdraw_list, seen) +
+                _sizeof(self._sent_routes, seen))
+        for path in self._known_path_list:
+            size += path._memory_usage(seen)
+        for sent_route in self._sent_routes.values():
+            size += (_sizeof(sent_route, seen) +
+                     sent_route.path._memory_usage(seen))
+        return size
+
     def add_new_path(self, new_path):
         self._validate_path(new_path)
         self._new_path_list.append(new_path)
@@ -373,6 +508,30 @@ class Destination(object):
             return True
         return False
 
+    def has_paths_from(self, source):
+        """Returns True if any known or new path is from `source`."""
+        for path in self._known_path_list:
+            if path.source == source:
+                return True
+        for path in self._new_path_list:
+            if path.source == source:
+                return True
+        return False
+
+    def has_withdrawals(self):
+        """Returns True if paths of this destination were withdrawn, or
+        its best path was removed, since it was last processed.
+        """
+        if self._withdraw_list:
+            return True
+        best_path = self._best_path
+        if best_path is None:
+            return False
+        for path in self._known_path_list:
+            if path is best_path:
+                return False
+        return True
+
     def was_sent_to(self, peer):
         if peer in self._sent_routes.keys():
             return True
@@ -600,22 +759,10 @@ class Destination(object):
             raise BgpProcessorError(desc='Need at-least one known path to'
                                     ' compute best path')
 
-        # We pick the first path as current best path. This helps in breaking
-        # tie between two new paths learned in one cycle for which best-path
+        # On a tie the first path is picked. This helps in breaking tie
+        # between two new paths learned in one cycle for which best-path
         # calculation steps lead to tie.
-        current_best_path = self._known_path_list[0]
-        best_path_reason = BPR_ONLY_PATH
-        for next_path in self._known_path_list[1:]:
-            from ryu.services.protocols.bgp.processor import compute_best_path
-            # Compare next path with current best path.
-            new_best_path, reason = \
-                compute_best_path(self._core_service.asn, current_best_path,
-                                  next_path)
-            best_path_reason = reason
-            if new_best_path is not None:
-                current_best_path = new_best_path
-
-        return current_best_path, best_path_reason
+        return select_best_path(self._core_service.asn, self._known_path_list)
 
     def withdraw_uninteresting_paths(self, interested_rts):
         """Withdraws paths that are no longer interesting.
@@ -688,6 +835,75 @@ class Destination(object):
         return str(self) >= str(other)
 
 
+class PathAttrMap(OrderedDict):
+    """Read-only path attributes of paths.
+
+    Instances are created by `intern_pathattrs` and shared by all paths
+    with identical path attributes.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('%s is read-only' % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __repr__(self):
+        return repr(OrderedDict(self))
+
+    def __reduce__(self):
+        return OrderedDict, (list(self.items()),)
+
+
+# Interned path attributes and path attribute sets, by their wire format.
+# An entry lives as long as some path refers to it.
+_interned_pattrs = weakref.WeakValueDictionary()
+_interned_pattr_maps = weakref.WeakValueDictionary()
+
+# Interning key of each path attribute instance.
+_pattr_keys = weakref.WeakKeyDictionary()
+
+
+def _pattr_key(pattr):
+    key = _pattr_keys.get(pattr)
+    if key is None:
+        key = (pattr.__class__, pattr.type,
+               pattr.flags & ~BGP_ATTR_FLAG_EXTENDED_LENGTH,
+               bytes(pattr.serialize_value()))
+        _pattr_keys[pattr] = key
+    return key
+
+
+def intern_pathattrs(pattrs):
+    """Returns the `PathAttrMap` with the same path attributes as
+    `pattrs` (OrderedDict).
+
+    Path attribute sets and the path attributes in them are shared, so
+    many paths learned with the same attributes cost a single copy.
+    """
+    if isinstance(pattrs, PathAttrMap):
+        return pattrs
+    key = tuple((attr_type, _pattr_key(pattr))
+                for attr_type, pattr in pattrs.items())
+    interned = _interned_pattr_maps.get(key)
+    if interned is None:
+        interned = PathAttrMap()
+        for attr_type, pattr_key in key:
+            pattr = _interned_pattrs.get(pattr_key)
+            if pattr is None:
+                pattr = _interned_pattrs[pattr_key] = pattrs[attr_type]
+            OrderedDict.__setitem__(interned, attr_type, pattr)
+        _interned_pattr_maps[key] = interned
+    return interned
+
+
+def interned_pathattrs_count():
+    """Returns the number of interned path attribute sets and of interned
+    path attributes.
+    """
+    return len(_interned_pattr_maps), len(_interned_pattrs)
+
+
 @six.add_metaclass(ABCMeta)
 class Path(object):
     """Represents a way of reaching an IP destination.
@@ -697,7 +913,8 @@ class Path(object):
     """
     __slots__ = ('_source', '_path_attr_map', '_nlri', '_source_version_num',
                  '_exported_from', '_nexthop', 'next_path', 'prev_path',
-                 '_is_withdraw', 'med_set_by_target_neighbor')
+                 '_is_withdraw', 'med_set_by_target_neighbor',
+                 '_decision_key')
     ROUTE_FAMILY = RF_IPv4_UC
 
     def __init__(self, source, nlri, src_ver_num, pattrs=None, nexthop=None,
@@ -740,11 +957,8 @@ class Path(object):
         # The entity (peer) that gave us this path.
         self._source = source
 
-        # Path attribute of this path.
-        if pattrs:
-            self._path_attr_map = copy(pattrs)
-        else:
-            self._path_attr_map = OrderedDict()
+        # Path attribute of this path, shared with other paths.
+        self._path_attr_map = intern_pathattrs(pattrs or OrderedDict())
 
         # NLRI that this path represents.
         self._nlri = nlri
@@ -765,6 +979,9 @@ class Path(object):
         # The Destination from which this path was exported, if any.
         self._exported_from = None
 
+        # Cached key for best path selection, see get_decision_key().
+        self._decision_key = None
+
     @property
     def source_version_num(self):
         return self._source_version_num
@@ -791,12 +1008,38 @@ class Path(object):
 
     @property
     def pathattr_map(self):
-        return copy(self._path_attr_map)
+        return OrderedDict(self._path_attr_map)
+
+    @property
+    def frozen_pathattr_map(self):
+        """Path attributes of this path as a read-only `PathAttrMap`,
+        without the copy made by `pathattr_map`.
+        """
+        return self._path_attr_map
 
     @property
     def nexthop(self):
         return self._nexthop
 
+    def _memory_usage(self, seen):
+        size = (_sizeof(self, seen) + _sizeof(self._nlri, seen) +
+                _sizeof(self._path_attr_map, seen))
+        for pattr in self._path_attr_map.values():
+            size += _sizeof(pattr, seen)
+        if self._decision_key is not None:
+            size += _sizeof(self._decision_key, seen)
+        return size
+
+    def get_decision_key(self, local_asn):
+        """Returns the key of this path for best path selection.
+
+        The key is computed once, as the path attributes and source of a
+        path do not change.
+        """
+        if self._decision_key is None:
+            self._decision_key = decision_key(local_asn, self)
+        return self._decision_key
+
     def get_pattr(self, pattr_type, default=None):
         """Returns path attribute of given type.
 
@@ -807,7 +1050,7 @@ class Path(object):
     def clone(self, for_withdrawal=False):
         pathattrs = None
         if not for_withdrawal:
-            pathattrs = self.pathattr_map
+            pathattrs = self._path_attr_map
         clone = self.__class__(
             self.source,
             self.nlri,
@@ -35,6 +35,8 @@ class IPv4Dest(Destination, NonVrfPathProcessingMixin):
 
     Store IPv4 Paths.
     """
+    __slots__ = ()
+
     ROUTE_FAMILY = RF_IPv4_UC
 
     def _best_path_lost(self):
@@ -76,6 +78,8 @@ class Ipv4Table(Table):
 
 class Ipv4Path(Path):
     """Represents a way of reaching an VPNv4 destination."""
+    __slots__ = ()
+
     ROUTE_FAMILY = RF_IPv4_UC
     VRF_PATH_CLASS = None  # defined in init - anti cyclic import hack
     NLRI_CLASS = IPAddrPrefix
@@ -83,7 +87,7 @@ class Ipv4Path(Path):
     def __init__(self, *args, **kwargs):
         super(Ipv4Path, self).__init__(*args, **kwargs)
         from ryu.services.protocols.bgp.info_base.vrf4 import Vrf4Path
-        self.VRF_PATH_CLASS = Vrf4Path
+        Ipv4Path.VRF_PATH_CLASS = Vrf4Path
 
 
 class Ipv4PrefixFilter(PrefixFilter):
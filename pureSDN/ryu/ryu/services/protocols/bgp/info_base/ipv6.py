@@ -35,6 +35,8 @@ class IPv6Dest(Destination, NonVrfPathProcessingMixin):
 
     Store IPv6 Paths.
     """
+    __slots__ = ()
+
     ROUTE_FAMILY = RF_IPv6_UC
 
     def _best_path_lost(self):
@@ -76,6 +78,8 @@ class Ipv6Table(Table):
 
 class Ipv6Path(Path):
     """Represents a way of reaching an v6 destination."""
+    __slots__ = ()
+
     ROUTE_FAMILY = RF_IPv6_UC
     VRF_PATH_CLASS = None  # defined in init - anti cyclic import hack
     NLRI_CLASS = IPAddrPrefix
@@ -83,7 +87,7 @@ class Ipv6Path(Path):
     def __init__(self, *args, **kwargs):
         super(Ipv6Path, self).__init__(*args, **kwargs)
         from ryu.services.protocols.bgp.info_base.vrf6 import Vrf6Path
-        self.VRF_PATH_CLASS = Vrf6Path
+        Ipv6Path.VRF_PATH_CLASS = Vrf6Path
 
 
 class Ipv6PrefixFilter(PrefixFilter):
@@ -35,6 +35,8 @@ class L2VPNFlowSpecDest(VpnDest):
 
     Store Flow Specification Paths.
     """
+    __slots__ = ()
+
     ROUTE_FAMILY = RF_L2VPN_FLOWSPEC
 
 
@@ -50,6 +52,8 @@ class L2VPNFlowSpecTable(VpnTable):
 
 class L2VPNFlowSpecPath(VpnPath):
     """Represents a way of reaching an L2VPN Flow Specification destination."""
+    __slots__ = ()
+
     ROUTE_FAMILY = RF_L2VPN_FLOWSPEC
     VRF_PATH_CLASS = None  # defined in init - anti cyclic import hack
     NLRI_CLASS = FlowSpecL2VPNNLRI
@@ -60,7 +64,7 @@ class L2VPNFlowSpecPath(VpnPath):
         super(L2VPNFlowSpecPath, self).__init__(*args, **kwargs)
         from ryu.services.protocols.bgp.info_base.vrfl2vpnfs import (
             L2vpnFlowSpecPath)
-        self.VRF_PATH_CLASS = L2vpnFlowSpecPath
+        L2VPNFlowSpecPath.VRF_PATH_CLASS = L2vpnFlowSpecPath
         # Because the L2VPN Flow Specification does not require nexthop,
         # initialize with None.
         self._nexthop = None
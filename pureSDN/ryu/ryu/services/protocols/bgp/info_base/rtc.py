@@ -54,6 +54,8 @@ class RtcTable(Table):
 
 
 class RtcDest(Destination, NonVrfPathProcessingMixin):
+    __slots__ = ()
+
     ROUTE_FAMILY = RF_RTC_UC
 
     def _new_best_path(self, new_best_path):
@@ -64,6 +66,8 @@ class RtcDest(Destination, NonVrfPathProcessingMixin):
 
 
 class RtcPath(Path):
+    __slots__ = ()
+
     ROUTE_FAMILY = RF_RTC_UC
 
     def __init__(self, source, nlri, src_ver_num, pattrs=None,
@@ -38,6 +38,7 @@ class VpnTable(Table):
     """
     ROUTE_FAMILY = None
     VPN_DEST_CLASS = None
+    RT_INDEXED = True
 
     def __init__(self, core_service, signal_bus):
         super(VpnTable, self).__init__(None, core_service, signal_bus)
@@ -59,6 +60,8 @@ class VpnTable(Table):
 
 @six.add_metaclass(abc.ABCMeta)
 class VpnPath(Path):
+    __slots__ = ()
+
     ROUTE_FAMILY = None
     VRF_PATH_CLASS = None
     NLRI_CLASS = None
@@ -73,7 +76,7 @@ class VpnPath(Path):
 
         pathattrs = None
         if not is_withdraw:
-            pathattrs = self.pathattr_map
+            pathattrs = self._path_attr_map
 
         vrf_path = self.VRF_PATH_CLASS(
             puid=self.VRF_PATH_CLASS.create_puid(
@@ -93,6 +96,7 @@ class VpnPath(Path):
 @six.add_metaclass(abc.ABCMeta)
 class VpnDest(Destination, NonVrfPathProcessingMixin):
     """Base class for VPN destinations."""
+    __slots__ = ()
 
     def _best_path_lost(self):
         old_best_path = self._best_path
@@ -35,6 +35,8 @@ class VPNv6FlowSpecDest(VpnDest):
 
     Store Flow Specification Paths.
     """
+    __slots__ = ()
+
     ROUTE_FAMILY = RF_VPNv6_FLOWSPEC
 
 
@@ -50,6 +52,8 @@ class VPNv6FlowSpecTable(VpnTable):
 
 class VPNv6FlowSpecPath(VpnPath):
     """Represents a way of reaching an VPNv6 Flow Specification destination."""
+    __slots__ = ()
+
     ROUTE_FAMILY = RF_VPNv6_FLOWSPEC
     VRF_PATH_CLASS = None  # defined in init - anti cyclic import hack
     NLRI_CLASS = FlowSpecVPNv6NLRI
@@ -60,7 +64,7 @@ class VPNv6FlowSpecPath(VpnPath):
         super(VPNv6FlowSpecPath, self).__init__(*args, **kwargs)
         from ryu.services.protocols.bgp.info_base.vrf6fs import (
             Vrf6FlowSpecPath)
-        self.VRF_PATH_CLASS = Vrf6FlowSpecPath
+        VPNv6FlowSpecPath.VRF_PATH_CLASS = Vrf6FlowSpecPath
         # Because the IPv6 Flow Specification does not require nexthop,
         # initialize with None.
         self._nexthop = None
@@ -70,6 +70,7 @@ class VrfTable(Table):
     NLRI_CLASS = None
     VRF_PATH_CLASS = None
     VRF_DEST_CLASS = None
+    RT_INDEXED = True
 
     def __init__(self, vrf_conf, core_service, signal_bus):
         Table.__init__(self, vrf_conf.route_dist, core_service, signal_bus)
@@ -365,6 +366,7 @@ class VrfTable(Table):
 @six.add_metaclass(abc.ABCMeta)
 class VrfDest(Destination):
     """Base class for VRF destination."""
+    __slots__ = ('_route_dist',)
 
     def __init__(self, table, nlri):
         super(VrfDest, self).__init__(table, nlri)
@@ -579,7 +581,7 @@ class VrfPath(Path):
     def clone(self, for_withdrawal=False):
         pathattrs = None
         if not for_withdrawal:
-            pathattrs = self.pathattr_map
+            pathattrs = self._path_attr_map
 
         clone = self.__class__(
             self.puid,
@@ -612,7 +614,7 @@ class VrfPath(Path):
 
         pathattrs = None
         if not for_withdrawal:
-            pathattrs = self.pathattr_map
+            pathattrs = self._path_attr_map
 
         vpnv_path = self.VPN_PATH_CLASS(
             source=self.source,
@@ -635,7 +637,7 @@ class VrfPath(Path):
             return False
         if not self.nexthop == b_path.nexthop:
             return False
-        if not self.pathattr_map == b_path.pathattr_map:
+        if not self._path_attr_map == b_path._path_attr_map:
             return False
 
         return True
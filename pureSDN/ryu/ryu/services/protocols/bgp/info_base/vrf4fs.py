@@ -40,12 +40,16 @@ class Vrf4FlowSpecPath(VRFFlowSpecPath):
     """Represents a way of reaching an IP destination with
     a VPN Flow Specification.
     """
+    __slots__ = ()
+
     ROUTE_FAMILY = RF_IPv4_FLOWSPEC
     VPN_PATH_CLASS = VPNv4FlowSpecPath
     VPN_NLRI_CLASS = FlowSpecVPNv4NLRI
 
 
 class Vrf4FlowSpecDest(VRFFlowSpecDest):
+    __slots__ = ()
+
     ROUTE_FAMILY = RF_IPv4_FLOWSPEC
 
 
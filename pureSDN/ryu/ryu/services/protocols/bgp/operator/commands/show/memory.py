@@ -5,6 +5,8 @@ from ryu.services.protocols.bgp.operator.command import Command
 from ryu.services.protocols.bgp.operator.command import CommandsResponse
 from ryu.services.protocols.bgp.operator.command import STATUS_ERROR
 from ryu.services.protocols.bgp.operator.command import STATUS_OK
+from ryu.services.protocols.bgp.operator.commands.responses import \
+    WrongParamResp
 
 
 class Memory(Command):
@@ -14,7 +16,8 @@ class Memory(Command):
     def __init__(self, *args, **kwargs):
         super(Memory, self).__init__(*args, **kwargs)
         self.subcommands = {
-            'summary': self.Summary}
+            'summary': self.Summary,
+            'rib': self.Rib}
 
     class Summary(Command):
         help_msg = 'shows total memory used and how it is getting used'
@@ -87,3 +90,39 @@ class Memory(Command):
                 )
 
             return ret
+
+    class Rib(Command):
+        help_msg = 'shows memory used by the RIB tables per prefix'
+        command = 'rib'
+
+        def action(self, params):
+            if len(params) > 0:
+                return WrongParamResp()
+            return CommandsResponse(STATUS_OK, self.api.get_rib_memory())
+
+        @classmethod
+        def cli_resp_formatter(cls, resp):
+            if resp.status == STATUS_ERROR:
+                return Command.cli_resp_formatter(resp)
+            val = resp.value
+            ret = '{0:<30s} {1:>10s} {2:>10s} {3:>14s} {4:>12s}\n'.format(
+                'Table',
+                'Prefixes',
+                'Paths',
+                'Size(bytes)',
+                'Bytes/prefix'
+            )
+
+            for t in val.get('tables', []):
+                ret += '{0:<30s} {1:>10d} {2:>10d} {3:>14d} {4:>12d}\n'.format(
+                    t.get('table'), t.get('prefixes'), t.get('paths'),
+                    t.get('bytes'), t.get('bytes_per_prefix')
+                )
+            ret += 'Shared path attribute sets: {0}\n'.format(
+                val.get('pathattr_sets', None)
+            )
+            ret += 'Shared path attributes: {0}\n'.format(
+                val.get('pathattrs', None)
+            )
+
+            return ret
@@ -0,0 +1,31 @@
+from ryu.services.protocols.bgp.operator.command import Command
+from ryu.services.protocols.bgp.operator.command import CommandsResponse
+from ryu.services.protocols.bgp.operator.command import STATUS_ERROR
+from ryu.services.protocols.bgp.operator.command import STATUS_OK
+from ryu.services.protocols.bgp.operator.commands.responses import \
+    WrongParamResp
+
+
+class Processor(Command):
+    help_msg = 'show BGP processor queues and latency'
+    command = 'processor'
+
+    def action(self, params):
+        if len(params) > 0:
+            return WrongParamResp()
+        return CommandsResponse(STATUS_OK, self.api.get_processor_stats())
+
+    @classmethod
+    def cli_resp_formatter(cls, resp):
+        if resp.status == STATUS_ERROR:
+            return Command.cli_resp_formatter(resp)
+        val = resp.value
+        ret = 'Queued RT destinations: {0}\n'.format(val.get('rtdest_queue'))
+        ret += 'Queued destinations with withdrawals: {0}\n'.format(
+            val.get('withdraw_queue'))
+        ret += 'Queued destinations: {0}\n'.format(val.get('dest_queue'))
+        ret += 'Enqueued: {0}, coalesced: {1}, processed: {2}\n'.format(
+            val.get('enqueued'), val.get('coalesced'), val.get('processed'))
+        ret += 'Latency (ms): avg {0:.3f}, max {1:.3f}\n'.format(
+            val.get('latency_avg') * 1000, val.get('latency_max') * 1000)
+        return ret
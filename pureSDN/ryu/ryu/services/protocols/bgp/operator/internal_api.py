@@ -25,6 +25,7 @@ from ryu.services.protocols.bgp.base import add_bgp_error_metadata
 from ryu.services.protocols.bgp.base import BGPSException
 from ryu.services.protocols.bgp.base import SUPPORTED_GLOBAL_RF
 from ryu.services.protocols.bgp.core_manager import CORE_MANAGER
+from ryu.services.protocols.bgp.info_base.base import interned_pathattrs_count
 
 
 LOG = logging.getLogger('bgpspeaker.operator.internal_api')
@@ -32,6 +33,21 @@ LOG = logging.getLogger('bgpspeaker.operator.internal_api')
 INTERNAL_API_ERROR = 100
 INTERNAL_API_SUB_ERROR = 101
 
+# Route families of the global tables by address family name.
+RIB_ROUTE_FAMILIES = {
+    'ipv4': RF_IPv4_UC,
+    'ipv6': RF_IPv6_UC,
+    'vpnv4': RF_IPv4_VPN,
+    'vpnv6': RF_IPv6_VPN,
+    'evpn': RF_L2_EVPN,
+    'ipv4fs': RF_IPv4_FLOWSPEC,
+    'ipv6fs': RF_IPv6_FLOWSPEC,
+    'vpnv4fs': RF_VPNv4_FLOWSPEC,
+    'vpnv6fs': RF_VPNv6_FLOWSPEC,
+    'l2vpnfs': RF_L2VPN_FLOWSPEC,
+    'rtfilter': RF_RTC_UC
+}
+
 
 class InternalApi(object):
 
@@ -83,24 +99,11 @@ class InternalApi(object):
         return CORE_MANAGER.get_core_service().table_manager.get_vrf_tables()
 
     def get_single_rib_routes(self, addr_family):
-        rfs = {
-            'ipv4': RF_IPv4_UC,
-            'ipv6': RF_IPv6_UC,
-            'vpnv4': RF_IPv4_VPN,
-            'vpnv6': RF_IPv6_VPN,
-            'evpn': RF_L2_EVPN,
-            'ipv4fs': RF_IPv4_FLOWSPEC,
-            'ipv6fs': RF_IPv6_FLOWSPEC,
-            'vpnv4fs': RF_VPNv4_FLOWSPEC,
-            'vpnv6fs': RF_VPNv6_FLOWSPEC,
-            'l2vpnfs': RF_L2VPN_FLOWSPEC,
-            'rtfilter': RF_RTC_UC
-        }
-        if addr_family not in rfs:
+        if addr_family not in RIB_ROUTE_FAMILIES:
             raise WrongParamError('Unknown or unsupported family: %s' %
                                   addr_family)
 
-        rf = rfs.get(addr_family)
+        rf = RIB_ROUTE_FAMILIES.get(addr_family)
         table_manager = self.get_core_service().table_manager
         gtable = table_manager.get_global_table_by_route_family(rf)
         if gtable is not None:
@@ -109,6 +112,43 @@ class InternalApi(object):
         else:
             return []
 
+    def get_rib_memory(self):
+        """Returns the approximate memory used by each global and VRF
+        table, in total and per prefix.
+
+        Path attributes shared between paths and tables are counted once,
+        in the first table using them.
+        """
+        table_manager = self.get_core_service().table_manager
+        tables = []
+        for name, rf in sorted(RIB_ROUTE_FAMILIES.items()):
+            table = table_manager.global_tables.get(rf)
+            if table is not None:
+                tables.append((name, table))
+        for (route_dist, vrf_rf), table in sorted(
+                table_manager.get_vrf_tables().items()):
+            tables.append(('vrf %s %s' % (route_dist, vrf_rf), table))
+
+        seen = set()
+        ret = {'tables': []}
+        for name, table in tables:
+            dests = list(table.values())
+            size = table.memory_usage(seen)
+            ret['tables'].append({
+                'table': name,
+                'prefixes': len(dests),
+                'paths': sum(len(d.known_path_list) for d in dests),
+                'bytes': size,
+                'bytes_per_prefix': size // len(dests) if dests else 0})
+        ret['pathattr_sets'], ret['pathattrs'] = interned_pathattrs_count()
+        return ret
+
+    def get_processor_stats(self):
+        """Returns the queue depths and processing latency of the BGP
+        processor.
+        """
+        return self.get_core_service().bgp_processor.get_stats()
+
     def _dst_to_dict(self, dst):
         ret = {'paths': [],
                'prefix': dst.nlri_str}
@@ -38,6 +38,7 @@ from ryu.services.protocols.bgp.rtconf.neighbors import NeighborConfListener
 from ryu.services.protocols.bgp.rtconf.neighbors import CONNECT_MODE_PASSIVE
 from ryu.services.protocols.bgp.signals.emit import BgpSignalBus
 from ryu.services.protocols.bgp.speaker import BgpProtocol
+from ryu.services.protocols.bgp.speaker import UpdatePacker
 from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
 from ryu.services.protocols.bgp.info_base.vpnv4 import Vpnv4Path
 from ryu.services.protocols.bgp.info_base.vpnv6 import Vpnv6Path
@@ -106,6 +107,10 @@ from ryu.lib.packet import safi as subaddr_family
 
 LOG = logging.getLogger('bgpspeaker.peer')
 
+# Time in seconds UPDATE messages are held back to be packed with other
+# prefixes sharing their path attributes.
+UPDATE_PACK_DELAY = 0.05
+
 
 def is_valid_state(state):
     """Returns True if given state is a valid bgp finite state machine state.
@@ -343,6 +348,9 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
         # Bound protocol instance
         self._protocol = None
 
+        # UPDATE messages waiting to be sent to the bound protocol
+        self._update_packer = UpdatePacker()
+
         # Setting this event starts the connect_loop loop again
         # Clearing this event will stop the connect_loop loop
         self._connect_retry_event = EventletIOFactory.create_custom_event()
@@ -722,13 +730,11 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
         self._adj_rib_out[nlri_str] = sent_route
         self._signal_bus.adj_rib_out_changed(self, sent_route)
 
-        # TODO(PH): optimized by sending several prefixes per update.
-        # Construct and send update message.
+        # Construct update message and pack it with other prefixes
+        # sharing its path attributes.
         if not block:
             update_msg = self._construct_update(outgoing_route)
-            self._protocol.send(update_msg)
-            # Collect update statistics.
-            self.state.incr(PeerCounterNames.SENT_UPDATES)
+            self._send_updates(self._update_packer.add(update_msg))
         else:
             LOG.debug('prefix : %s is not sent by filter : %s',
                       path.nlri, blocked_cause)
@@ -741,6 +747,17 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
             tm = self._core_service.table_manager
             tm.remember_sent_route(sent_route)
 
+    def _send_updates(self, update_msgs):
+        """Sends the list of `update_msgs` to peer in a single write."""
+        if not update_msgs:
+            return
+        self._protocol.send_msgs(update_msgs)
+        # Collect update statistics.
+        self.state.incr(PeerCounterNames.SENT_UPDATES, len(update_msgs))
+
+    def _flush_updates(self):
+        self._send_updates(self._update_packer.flush())
+
     def _process_outgoing_msg_list(self):
         while True:
             outgoing_msg = None
@@ -749,10 +766,14 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
                 # We pick the first outgoing msg. available and send it.
                 outgoing_msg = self.outgoing_msg_list.pop_first()
 
-            # If we do not have any outgoing route, we wait.
+            # If we do not have any outgoing route, we wait. Pending
+            # updates are sent if no more routes come in shortly.
             if outgoing_msg is None:
                 self.outgoing_msg_event.clear()
-                self.outgoing_msg_event.wait()
+                if not self._update_packer:
+                    self.outgoing_msg_event.wait()
+                elif not self.outgoing_msg_event.wait(UPDATE_PACK_DELAY):
+                    self._flush_updates()
                 continue
 
             # Check currently supported out-going msgs.
@@ -764,16 +785,23 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
 
             # Send msg. to peer.
             if isinstance(outgoing_msg, BGPRouteRefresh):
+                self._flush_updates()
                 self._send_outgoing_route_refresh_msg(outgoing_msg)
             elif isinstance(outgoing_msg, OutgoingRoute):
                 self._send_outgoing_route(outgoing_msg)
 
             # EOR are enqueued as plain Update messages.
             elif isinstance(outgoing_msg, BGPUpdate):
-                self._protocol.send(outgoing_msg)
+                self._send_updates(self._update_packer.add(outgoing_msg))
                 LOG.debug('Update %s>> %s', self._neigh_conf.ip_address,
                           outgoing_msg)
-                self.state.incr(PeerCounterNames.SENT_UPDATES)
+
+            # Do not hold back updates longer than the delay while the
+            # queue never drains.
+            if (self._update_packer and
+                    time.time() - self._update_packer.pending_since >=
+                    UPDATE_PACK_DELAY):
+                self._flush_updates()
 
     def request_route_refresh(self, *route_families):
         """Request route refresh to peer for given `route_families`.
@@ -973,8 +1001,8 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
         """
         update = None
         path = outgoing_route.path
-        # Get copy of path's path attributes.
-        pathattr_map = path.pathattr_map
+        # Path attributes of the path, shared with other paths.
+        pathattr_map = path.frozen_pathattr_map
         new_pathattr = []
 
         if path.is_withdraw:
@@ -2327,6 +2355,7 @@ class Peer(Source, Sink, NeighborConfListener, Activity):
             self._sent_init_non_rtc_update = False
             # Clear sink.
             self.clear_outgoing_msg_list()
+            self._update_packer = UpdatePacker()
             # Un-schedule timers
             self._unschedule_sending_init_updates()
 
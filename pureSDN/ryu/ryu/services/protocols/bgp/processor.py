@@ -17,12 +17,13 @@
 """
 
 import logging
+import time
 
 from ryu.services.protocols.bgp.base import Activity
 from ryu.services.protocols.bgp.base import add_bgp_error_metadata
 from ryu.services.protocols.bgp.base import BGP_PROCESSOR_ERROR_CODE
 from ryu.services.protocols.bgp.base import BGPSException
-from ryu.services.protocols.bgp.utils import circlist
+from ryu.services.protocols.bgp.base import OrderedDict
 from ryu.services.protocols.bgp.utils.evtlet import EventletIOFactory
 
 from ryu.lib.packet.bgp import RF_RTC_UC
@@ -60,32 +61,42 @@ class BgpProcessor(Activity):
     cases. If you want more control on which destinations get processed faster
     compared to other destinations, you can create several instance of this
     works to achieve the desired work flow.
+
+    Destinations are queued by priority. RT NLRI destinations are processed
+    first, as they change the RT filters of peers, then destinations with
+    withdrawn paths and then the others. A destination which changes again
+    while it is queued is processed only once, at its place in the queue.
     """
 
     # Max. number of destinations processed per cycle.
     MAX_DEST_PROCESSED_PER_CYCLE = 100
 
-    #
-    # DestQueue
-    #
-    # A circular list type in which objects are linked to each
-    # other using the 'next_dest_to_process' and 'prev_dest_to_process'
-    # attributes.
-    #
-    _DestQueue = circlist.CircularListType(
-        next_attr_name='next_dest_to_process',
-        prev_attr_name='prev_dest_to_process')
+    # Share of each cycle left to destinations without withdrawn paths while
+    # withdrawals are queued, so that they are not starved.
+    MIN_DEST_SHARE_PER_CYCLE = 0.25
 
     def __init__(self, core_service, work_units_per_cycle=None):
         Activity.__init__(self)
         # Back pointer to core service instance that created this processor.
         self._core_service = core_service
-        self._dest_queue = BgpProcessor._DestQueue()
-        self._rtdest_queue = BgpProcessor._DestQueue()
+        # Queued destinations and the time they were queued, in order:
+        # {id(dest): (dest, queued_at)}. Destinations define __eq__ but no
+        # __hash__, so they are keyed by identity.
+        self._rtdest_queue = OrderedDict()
+        self._withdraw_queue = OrderedDict()
+        self._dest_queue = OrderedDict()
         self.dest_que_evt = EventletIOFactory.create_custom_event()
         self.work_units_per_cycle =\
             work_units_per_cycle or BgpProcessor.MAX_DEST_PROCESSED_PER_CYCLE
 
+        # Statistics, see get_stats().
+        self._enqueued = 0
+        self._coalesced = 0
+        self._processed = 0
+        self._cycles = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
     def _run(self, *args, **kwargs):
         # Sit in tight loop, getting destinations from the queue and processing
         # one at a time.
@@ -99,41 +110,52 @@ class BgpProcessor(Activity):
             # all destination here as we want to give change to other
             # greenthread to run)
             self._process_dest()
+            self._cycles += 1
 
-            if self._dest_queue.is_empty():
+            if not (self._rtdest_queue or self._withdraw_queue or
+                    self._dest_queue):
                 # If we have no destinations queued for processing, we wait.
                 self.dest_que_evt.clear()
                 self.dest_que_evt.wait()
             else:
                 self.pause(0)
 
-    def _process_dest(self):
+    def _process_queue(self, dest_queue, max_count):
+        """Processes up to `max_count` destinations from `dest_queue`.
+
+        Returns the number of destinations processed.
+        """
         dest_processed = 0
-        LOG.debug('Processing destination...')
-        while (dest_processed < self.work_units_per_cycle and
-               not self._dest_queue.is_empty()):
+        while dest_processed < max_count and dest_queue:
             # We process the first destination in the queue.
-            next_dest = self._dest_queue.pop_first()
-            if next_dest:
-                next_dest.process()
-                dest_processed += 1
+            _, (next_dest, queued_at) = dest_queue.popitem(last=False)
+            next_dest.process()
+            dest_processed += 1
+
+            latency = time.time() - queued_at
+            self._latency_total += latency
+            if latency > self._latency_max:
+                self._latency_max = latency
+        self._processed += dest_processed
+        return dest_processed
+
+    def _process_dest(self):
+        LOG.debug('Processing destination...')
+        work_units = self.work_units_per_cycle
+        withdraw_units = work_units
+        if self._dest_queue:
+            withdraw_units -= int(work_units * self.MIN_DEST_SHARE_PER_CYCLE)
+        dest_processed = self._process_queue(self._withdraw_queue,
+                                             withdraw_units)
+        self._process_queue(self._dest_queue, work_units - dest_processed)
 
     def _process_rtdest(self):
         LOG.debug('Processing RT NLRI destination...')
-        if self._rtdest_queue.is_empty():
+        if not self._rtdest_queue:
             return
-        else:
-            processed_any = False
-            while not self._rtdest_queue.is_empty():
-                # We process the first destination in the queue.
-                next_dest = self._rtdest_queue.pop_first()
-                if next_dest:
-                    next_dest.process()
-                    processed_any = True
-
-            if processed_any:
-                # Since RT destination were updated we update RT filters
-                self._core_service.update_rtfilters()
+        # Since RT destination were updated we update RT filters
+        self._process_queue(self._rtdest_queue, float('inf'))
+        self._core_service.update_rtfilters()
 
     def enqueue(self, destination):
         """Enqueues given destination for processing.
@@ -143,19 +165,50 @@ class BgpProcessor(Activity):
         if not destination:
             raise BgpProcessorError('Invalid destination %s.' % destination)
 
-        dest_queue = self._dest_queue
+        self._enqueued += 1
         # RtDest are queued in a separate queue
         if destination.route_family == RF_RTC_UC:
             dest_queue = self._rtdest_queue
+        elif destination.has_withdrawals():
+            dest_queue = self._withdraw_queue
+        else:
+            dest_queue = self._dest_queue
 
         # We do not add given destination to the queue for processing if
-        # it is already on the queue.
-        if not dest_queue.is_on_list(destination):
-            dest_queue.append(destination)
+        # it is already on the queue. A queued destination with new
+        # withdrawals is moved to the withdrawal queue.
+        dest_id = id(destination)
+        if dest_id in dest_queue or dest_id in self._withdraw_queue:
+            self._coalesced += 1
+        elif dest_id in self._dest_queue:
+            self._coalesced += 1
+            dest_queue[dest_id] = self._dest_queue.pop(dest_id)
+        else:
+            dest_queue[dest_id] = (destination, time.time())
 
         # Wake-up processing thread if sleeping.
         self.dest_que_evt.set()
 
+    def get_stats(self):
+        """Returns the queue depths and processing statistics.
+
+        `latency_avg` and `latency_max` are the times in seconds from when
+        destinations were queued until they were processed.
+        """
+        processed = self._processed
+        return {
+            'rtdest_queue': len(self._rtdest_queue),
+            'withdraw_queue': len(self._withdraw_queue),
+            'dest_queue': len(self._dest_queue),
+            'enqueued': self._enqueued,
+            'coalesced': self._coalesced,
+            'processed': processed,
+            'cycles': self._cycles,
+            'latency_avg': (self._latency_total / processed
+                            if processed else 0.0),
+            'latency_max': self._latency_max,
+        }
+
 
 # =============================================================================
 # Best path computation related utilities.
@@ -176,6 +229,23 @@ BPR_IGP_COST = 'IGP Cost'
 BPR_ROUTER_ID = 'Router ID'
 BPR_CLUSTER_LIST = 'Cluster List'
 
+# Preference of ORIGIN values, IGP is preferred over EGP; EGP is preferred
+# over Incomplete.
+_ORIGIN_PREFS = {
+    BGP_ATTR_ORIGIN_IGP: 3,
+    BGP_ATTR_ORIGIN_EGP: 2,
+    BGP_ATTR_ORIGIN_INCOMPLETE: 1,
+}
+
+# Router IDs of peers and originators as integers, by their string form.
+_router_id_ints = {}
+
+# Reasons a path is chosen as best path by each element of the decision key
+# returned by decision_key().
+_DECISION_KEY_REASONS = (BPR_LOCAL_PREF, BPR_LOCAL_ORIGIN, BPR_ASPATH,
+                         BPR_ORIGIN, BPR_MED, BPR_ASN, BPR_ROUTER_ID,
+                         BPR_CLUSTER_LIST)
+
 
 def _compare_by_version(path1, path2):
     """Returns the current/latest learned path.
@@ -268,6 +338,146 @@ def compute_best_path(local_asn, path1, path2):
     return best_path, best_path_reason
 
 
+def decision_key(local_asn, path):
+    """Returns the key of `path` for best path selection.
+
+    The key is a tuple whose elements are compared in the order of the
+    steps of `compute_best_path`, so that the path with the greatest key
+    is the best path. The first element is the LOCAL_PREF value, or None
+    if the path does not have LOCAL_PREF.
+    Steps which never decide (reachable next hop, weight and IGP cost) are
+    left out.
+    """
+    pattrs = path.frozen_pathattr_map
+    source = path.source
+
+    local_pref = pattrs.get(BGP_ATTR_TYPE_LOCAL_PREF)
+    if local_pref is not None:
+        local_pref = local_pref.value
+
+    as_path = pattrs.get(BGP_ATTR_TYPE_AS_PATH)
+    assert as_path
+    as_path_len = as_path.get_as_path_len()
+    assert as_path_len is not None
+
+    origin = pattrs.get(BGP_ATTR_TYPE_ORIGIN)
+    assert origin is not None
+
+    med = pattrs.get(BGP_ATTR_TYPE_MULTI_EXIT_DISC)
+    med = med.value if med else 0
+
+    c_list = pattrs.get(BGP_ATTR_TYPE_CLUSTER_LIST)
+    c_list_len = len(c_list.value) if c_list is not None else 0
+
+    # Router IDs only break ties between iBGP paths from peers.
+    is_ebgp = False
+    router_id = 0
+    if source is not None and source != VRF_TABLE:
+        is_ebgp = source.remote_as != local_asn
+        if not is_ebgp:
+            router_id = _get_router_id_int(_get_peer_router_id(path))
+
+    return (local_pref, source is None, -as_path_len,
+            _get_origin_pref(origin), -med, is_ebgp, -router_id,
+            -c_list_len)
+
+
+def select_best_path(local_asn, paths):
+    """Selects the best path among `paths`.
+
+    Gives the same result as comparing the paths in order with
+    `compute_best_path`, but compares their decision keys (see
+    `decision_key`) instead. `compute_best_path` only compares LOCAL_PREF
+    between paths which both have it, which is not a total order when
+    only some of the paths have it: iBGP paths can then be preferred over
+    each other by LOCAL_PREF and lose to an eBGP path on a later step.
+    Such mixed sets are compared pairwise in order with
+    `compute_best_path`. On a tie the first path is selected.
+
+    Returns the best path and the reason it was preferred over the next
+    best path, or for mixed sets over the last path compared.
+    """
+    if len(paths) == 1:
+        return paths[0], BPR_ONLY_PATH
+
+    keys = [path.get_decision_key(local_asn) for path in paths]
+    with_local_pref = without_local_pref = False
+    for key in keys:
+        if key[0] is None:
+            without_local_pref = True
+        else:
+            with_local_pref = True
+    if with_local_pref and without_local_pref:
+        best_path = paths[0]
+        reason = BPR_UNKNOWN
+        for path in paths[1:]:
+            new_best_path, reason = compute_best_path(
+                local_asn, best_path, path)
+            if new_best_path is not None:
+                best_path = new_best_path
+        return best_path, reason
+
+    # Find the first greatest key and the greatest of the other keys.
+    best_idx = 0
+    best_key = keys[0]
+    next_key = None
+    for idx in range(1, len(keys)):
+        key = keys[idx]
+        if key > best_key:
+            best_idx, best_key, next_key = idx, key, best_key
+        elif next_key is None or key > next_key:
+            next_key = key
+
+    for reason, best_elem, next_elem in zip(_DECISION_KEY_REASONS, best_key,
+                                            next_key):
+        if best_elem != next_elem:
+            return paths[best_idx], reason
+    return paths[best_idx], BPR_UNKNOWN
+
+
+def _get_origin_pref(origin):
+    pref = _ORIGIN_PREFS.get(origin.value)
+    if pref is None:
+        LOG.error('Invalid origin value encountered %s.', origin)
+        return 0
+    return pref
+
+
+def _get_path_med(path):
+    med = path.get_pattr(BGP_ATTR_TYPE_MULTI_EXIT_DISC)
+    if not med:
+        return 0
+    return med.value
+
+
+def _get_path_source_asn(local_asn, path):
+    if path.source is None or path.source == VRF_TABLE:
+        return local_asn
+    return path.source.remote_as
+
+
+def _get_peer_router_id(path):
+    originator_id = path.get_pattr(BGP_ATTR_TYPE_ORIGINATOR_ID)
+    if originator_id:
+        return originator_id.value
+    return path.source.protocol.recv_open_msg.bgp_identifier
+
+
+def _get_router_id_int(router_id):
+    value = _router_id_ints.get(router_id)
+    if value is None:
+        from ryu.services.protocols.bgp.utils.bgp import from_inet_ptoi
+        value = _router_id_ints[router_id] = from_inet_ptoi(router_id) or 0
+    return value
+
+
+def _get_cluster_list_len(path):
+    c_list = path.get_pattr(BGP_ATTR_TYPE_CLUSTER_LIST)
+    if c_list is None:
+        return 0
+    return len(c_list.value)
+
+
 def _cmp_by_reachable_nh(path1, path2):
     """Compares given paths and selects best path based on reachable next-hop.
 
@@ -368,17 +578,6 @@ def _cmp_by_origin(path1, path2):
     IGP is preferred over EGP; EGP is preferred over Incomplete.
     If both paths have same origin, we return None.
     """
-    def get_origin_pref(origin):
-        if origin.value == BGP_ATTR_ORIGIN_IGP:
-            return 3
-        elif origin.value == BGP_ATTR_ORIGIN_EGP:
-            return 2
-        elif origin.value == BGP_ATTR_ORIGIN_INCOMPLETE:
-            return 1
-        else:
-            LOG.error('Invalid origin value encountered %s.', origin)
-            return 0
-
     origin1 = path1.get_pattr(BGP_ATTR_TYPE_ORIGIN)
     origin2 = path2.get_pattr(BGP_ATTR_TYPE_ORIGIN)
     assert origin1 is not None and origin2 is not None
@@ -388,8 +587,8 @@ def _cmp_by_origin(path1, path2):
         return None
 
     # Translate origin values to preference.
-    origin1 = get_origin_pref(origin1)
-    origin2 = get_origin_pref(origin2)
+    origin1 = _get_origin_pref(origin1)
+    origin2 = _get_origin_pref(origin2)
     # Return preferred path.
     if origin1 == origin2:
         return None
@@ -406,14 +605,8 @@ def _cmp_by_med(path1, path2):
     had a MED of 0, the most preferred value.
     RFC says lower MED is preferred over higher MED value.
     """
-    def get_path_med(path):
-        med = path.get_pattr(BGP_ATTR_TYPE_MULTI_EXIT_DISC)
-        if not med:
-            return 0
-        return med.value
-
-    med1 = get_path_med(path1)
-    med2 = get_path_med(path2)
+    med1 = _get_path_med(path1)
+    med2 = _get_path_med(path2)
 
     if med1 == med2:
         return None
@@ -428,16 +621,8 @@ def _cmp_by_asn(local_asn, path1, path2):
     eBGP path is preferred over iBGP. If both paths are from same kind of
     peers, return None.
     """
-    def get_path_source_asn(path):
-        asn = None
-        if path.source is None or path.source == VRF_TABLE:
-            asn = local_asn
-        else:
-            asn = path.source.remote_as
-        return asn
-
-    p1_asn = get_path_source_asn(path1)
-    p2_asn = get_path_source_asn(path2)
+    p1_asn = _get_path_source_asn(local_asn, path1)
+    p2_asn = _get_path_source_asn(local_asn, path2)
     # If path1 is from ibgp peer and path2 is from ebgp peer.
     if (p1_asn == local_asn) and (p2_asn != local_asn):
         return path2
@@ -474,14 +659,10 @@ def _cmp_by_router_id(local_asn, path1, path2):
             return path_source.remote_as
 
     def get_router_id(path, local_bgp_id):
-        path_source = path.source
-        if path_source is None:
+        if path.source is None:
             return local_bgp_id
         else:
-            originator_id = path.get_pattr(BGP_ATTR_TYPE_ORIGINATOR_ID)
-            if originator_id:
-                return originator_id.value
-            return path_source.protocol.recv_open_msg.bgp_identifier
+            return _get_peer_router_id(path)
 
     path_source1 = path1.source
     path_source2 = path2.source
@@ -535,13 +716,6 @@ def _cmp_by_cluster_list(path1, path2):
     The CLUSTER_LIST length is evaluated as zero if a route does not
     carry the CLUSTER_LIST attribute.
     """
-    def _get_cluster_list_len(path):
-        c_list = path.get_pattr(BGP_ATTR_TYPE_CLUSTER_LIST)
-        if c_list is None:
-            return 0
-        else:
-            return len(c_list.value)
-
     c_list_len1 = _get_cluster_list_len(path1)
     c_list_len2 = _get_cluster_list_len(path2)
     if c_list_len1 < c_list_len2:
@@ -16,13 +16,17 @@
 """
  BGP protocol implementation.
 """
+import collections
+import copy
 import logging
 import socket
 import struct
+import time
 import traceback
 from socket import IPPROTO_TCP, TCP_NODELAY
 from eventlet import semaphore
 
+from ryu.lib import hub
 from ryu.lib.packet import bgp
 from ryu.lib.packet.bgp import AS_TRANS
 from ryu.lib.packet.bgp import BGPMessage
@@ -30,6 +34,8 @@ from ryu.lib.packet.bgp import BGPOpen
 from ryu.lib.packet.bgp import BGPUpdate
 from ryu.lib.packet.bgp import BGPKeepAlive
 from ryu.lib.packet.bgp import BGPNotification
+from ryu.lib.packet.bgp import BGPPathAttributeMpReachNLRI
+from ryu.lib.packet.bgp import BGPPathAttributeMpUnreachNLRI
 from ryu.lib.packet.bgp import BGP_MSG_OPEN
 from ryu.lib.packet.bgp import BGP_MSG_UPDATE
 from ryu.lib.packet.bgp import BGP_MSG_KEEPALIVE
@@ -58,6 +64,12 @@ LOG = logging.getLogger('bgpspeaker.speaker')
 BGP_MIN_MSG_LEN = 19
 BGP_MAX_MSG_LEN = 4096
 
+# Initial size of the receive buffer of each session. A read takes as
+# much of a burst of messages (e.g. a full table transfer) as fits.
+BGP_RECV_BUFFER_SIZE = 64 * 1024
+
+_MSG_HEADER = struct.Struct('!16sHB')
+
 # Keep-alive singleton.
 _KEEP_ALIVE = BGPKeepAlive()
 
@@ -84,6 +96,139 @@ def notification_factory(code, subcode):
     return notification
 
 
+class _PendingUpdate(object):
+    """NLRI waiting in an UpdatePacker to be sent in one UPDATE message."""
+
+    __slots__ = ('build', 'length', 'nlri', 'prefixes')
+
+    def __init__(self, build, length):
+        # Callable which creates the UPDATE message for a list of NLRI.
+        self.build = build
+        # Length of the UPDATE message with the NLRI added so far.
+        self.length = length
+        self.nlri = []
+        self.prefixes = []
+
+
+class UpdatePacker(object):
+    """Packs UPDATE messages carrying a single prefix each into as few
+    UPDATE messages as possible.
+
+    Announcements with identical path attributes, and withdrawals of the
+    same address family, are merged as long as the resulting message fits
+    in `max_len` bytes. Changes to the same prefix are sent in the order
+    they were added; any other message is sent after the pending ones.
+    """
+
+    def __init__(self, max_len=BGP_MAX_MSG_LEN):
+        self.max_len = max_len
+        # Pending UPDATE messages by path attributes, in arrival order.
+        self._pending = collections.OrderedDict()
+        self._prefixes = set()
+        # Time the oldest pending prefix was added, or None.
+        self.pending_since = None
+
+    def __len__(self):
+        return len(self._prefixes)
+
+    @staticmethod
+    def _split(update):
+        # Returns (key, nlri, build, length) for an UPDATE message which
+        # carries a single prefix, or None if it cannot be packed. length
+        # is the length of the message without NLRI, plus one byte for a
+        # MP_(UN)REACH_NLRI attribute growing an extended length.
+        attrs = update.path_attributes
+        if update.withdrawn_routes:
+            if len(update.withdrawn_routes) != 1 or attrs or update.nlri:
+                return None
+            return (('withdraw',), update.withdrawn_routes[0],
+                    lambda nlri: BGPUpdate(withdrawn_routes=nlri),
+                    BGP_MIN_MSG_LEN + 4)
+
+        attrs_bin = bytearray()
+        mp_index = None
+        for i, attr in enumerate(attrs):
+            if isinstance(attr, (BGPPathAttributeMpReachNLRI,
+                                 BGPPathAttributeMpUnreachNLRI)):
+                if mp_index is not None:
+                    return None
+                mp_index = i
+            else:
+                attrs_bin += attr.serialize()
+
+        if update.nlri:
+            if len(update.nlri) != 1 or mp_index is not None:
+                return None
+            return (('nlri', bytes(attrs_bin)), update.nlri[0],
+                    lambda nlri: BGPUpdate(path_attributes=attrs, nlri=nlri),
+                    BGP_MIN_MSG_LEN + 4 + len(attrs_bin))
+
+        if mp_index is None:
+            return None
+        mp_attr = attrs[mp_index]
+        if isinstance(mp_attr, BGPPathAttributeMpReachNLRI):
+            field = 'nlri'
+        else:
+            field = 'withdrawn_routes'
+        mp_nlri = getattr(mp_attr, field)
+        if len(mp_nlri) != 1:
+            return None
+        mp_empty = copy.copy(mp_attr)
+        setattr(mp_empty, field, [])
+        mp_bin = mp_empty.serialize()
+
+        def build(nlri):
+            new_attr = copy.copy(mp_attr)
+            setattr(new_attr, field, nlri)
+            return BGPUpdate(path_attributes=(
+                attrs[:mp_index] + [new_attr] + attrs[mp_index + 1:]))
+
+        return ((field, mp_index, bytes(mp_bin), bytes(attrs_bin)),
+                mp_nlri[0], build,
+                BGP_MIN_MSG_LEN + 4 + len(attrs_bin) + len(mp_bin) + 1)
+
+    def _pop(self, key):
+        pending = self._pending.pop(key)
+        self._prefixes.difference_update(pending.prefixes)
+        if not self._pending:
+            self.pending_since = None
+        return pending.build(pending.nlri)
+
+    def add(self, update):
+        """Adds `update` and returns the list of UPDATE messages which
+        are ready to be sent.
+        """
+        split = self._split(update)
+        if split is None:
+            return self.flush() + [update]
+        key, nlri, build, length = split
+
+        nlri_bin = nlri.serialize()
+        prefix = (nlri.__class__, bytes(nlri_bin))
+        msgs = []
+        if prefix in self._prefixes:
+            # Do not reorder changes to the same prefix.
+            msgs = self.flush()
+        pending = self._pending.get(key)
+        if (pending is not None and
+                pending.length + len(nlri_bin) > self.max_len):
+            msgs.append(self._pop(key))
+            pending = None
+        if pending is None:
+            pending = self._pending[key] = _PendingUpdate(build, length)
+        pending.length += len(nlri_bin)
+        pending.nlri.append(nlri)
+        pending.prefixes.append(prefix)
+        self._prefixes.add(prefix)
+        if self.pending_since is None:
+            self.pending_since = time.time()
+        return msgs
+
+    def flush(self):
+        """Returns the list of all pending UPDATE messages."""
+        return [self._pop(key) for key in list(self._pending)]
+
+
 class BgpProtocol(Protocol, Activity):
     """Protocol that handles BGP messages.
     """
@@ -102,7 +247,11 @@ class BgpProtocol(Protocol, Activity):
         Activity.__init__(self, name=activity_name)
         # Initialize instance variables.
         self._peer = None
-        self._recv_buff = b''
+        # Received data is kept in _recv_buff[_recv_start:_recv_end].
+        self._recv_buff = bytearray(BGP_RECV_BUFFER_SIZE)
+        self._recv_view = memoryview(self._recv_buff)
+        self._recv_start = 0
+        self._recv_end = 0
         self._socket = socket
         self._socket.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
         self._sendlock = semaphore.Semaphore()
@@ -278,16 +427,22 @@ class BgpProtocol(Protocol, Activity):
         try:
             self._data_received(next_bytes)
         except bgp.BgpExc as exc:
-            LOG.error(
-                "BGPExc Exception while receiving data: "
-                "%s \n Traceback %s \n"
-                % (str(exc), traceback.format_exc())
-            )
-            if exc.SEND_ERROR:
-                self.send_notification(exc.CODE, exc.SUB_CODE)
-            else:
-                self._socket.close()
-            raise exc
+            self._handle_recv_error(exc)
+
+    def _handle_recv_error(self, exc):
+        """Reports `exc` raised by received data to the peer and re-raises
+        it.
+        """
+        LOG.error(
+            "BGPExc Exception while receiving data: "
+            "%s \n Traceback %s \n"
+            % (str(exc), traceback.format_exc())
+        )
+        if exc.SEND_ERROR:
+            self.send_notification(exc.CODE, exc.SUB_CODE)
+        else:
+            self._socket.close()
+        raise exc
 
     @staticmethod
     def parse_msg_header(buff):
@@ -295,7 +450,30 @@ class BgpProtocol(Protocol, Activity):
 
         Returns a tuple of marker, length, type of bgp message.
         """
-        return struct.unpack('!16sHB', buff)
+        return _MSG_HEADER.unpack(buff)
+
+    def _reserve_recv_buff(self, size):
+        """Makes room for at least `size` bytes after the received data.
+
+        Only the unprocessed data, which is less than one message after
+        _process_recv_buff(), is moved to the front of the buffer.
+        """
+        buf = self._recv_buff
+        end = self._recv_end
+        if len(buf) - end >= size:
+            return
+        start = self._recv_start
+        pending = end - start
+        if len(buf) < pending + size:
+            new_buf = bytearray(max(pending + size, 2 * len(buf)))
+            new_buf[:pending] = self._recv_view[start:end]
+            self._recv_view.release()
+            self._recv_buff = new_buf
+            self._recv_view = memoryview(new_buf)
+        else:
+            self._recv_view[:pending] = self._recv_view[start:end]
+        self._recv_start = 0
+        self._recv_end = pending
 
     def _data_received(self, next_bytes):
         """Maintains buffer of bytes received from peer and extracts bgp
@@ -308,17 +486,29 @@ class BgpProtocol(Protocol, Activity):
             - `next_bytes`: next set of bytes received from peer.
         """
         # Append buffer with received bytes.
-        self._recv_buff += next_bytes
-
+        self._reserve_recv_buff(len(next_bytes))
+        end = self._recv_end + len(next_bytes)
+        self._recv_view[self._recv_end:end] = next_bytes
+        self._recv_end = end
+        self._process_recv_buff()
+
+    def _process_recv_buff(self):
+        """Extracts and handles every complete bgp message in the receive
+        buffer.
+
+        Messages are parsed in place; the buffer is only copied once per
+        message, into the bytes given to the parser.
+        """
         while True:
+            start = self._recv_start
             # If current buffer size is less then minimum bgp message size, we
             # return as we do not have a complete bgp message to work with.
-            if len(self._recv_buff) < BGP_MIN_MSG_LEN:
+            if self._recv_end - start < BGP_MIN_MSG_LEN:
                 return
 
             # Parse message header into elements.
-            auth, length, ptype = BgpProtocol.parse_msg_header(
-                self._recv_buff[:BGP_MIN_MSG_LEN])
+            auth, length, ptype = _MSG_HEADER.unpack_from(self._recv_buff,
+                                                          start)
 
             # Check if we have valid bgp message marker.
             # We should get default marker since we are not supporting any
@@ -348,10 +538,11 @@ class BgpProtocol(Protocol, Activity):
                 raise bgp.BadLen(ptype, length)
 
             # If we have partial message we wait for rest of the message.
-            if len(self._recv_buff) < length:
+            if self._recv_end - start < length:
                 return
-            msg, _, rest = BGPMessage.parser(self._recv_buff)
-            self._recv_buff = rest
+            msg, _, _ = BGPMessage.parser(
+                bytes(self._recv_view[start:start + length]))
+            self._recv_start = start + length
 
             # If we have a valid bgp message we call message handler.
             self._handle_msg(msg)
@@ -379,19 +570,25 @@ class BgpProtocol(Protocol, Activity):
         self._socket.close()
 
     def _send_with_lock(self, msg):
+        self._sendall_with_lock(msg.serialize())
+
+    def _sendall_with_lock(self, data):
         self._sendlock.acquire()
         try:
-            self._socket.sendall(msg.serialize())
+            self._socket.sendall(data)
         except socket.error:
             self.connection_lost('failed to write to socket')
         finally:
             self._sendlock.release()
 
-    def send(self, msg):
+    def _check_started(self):
         if not self.started:
             raise BgpProtocolException('Tried to send message to peer when '
                                        'this protocol instance is not started'
                                        ' or is no longer is started state.')
+
+    def send(self, msg):
+        self._check_started()
         self._send_with_lock(msg)
 
         if msg.type == BGP_MSG_NOTIFICATION:
@@ -401,6 +598,16 @@ class BgpProtocol(Protocol, Activity):
         else:
             LOG.debug('Sent msg to %s >> %s', self._remotename, msg)
 
+    def send_msgs(self, msgs):
+        """Sends the list of messages `msgs` in a single write.
+
+        Used for UPDATE messages, which are sent back to back during the
+        initial table exchange.
+        """
+        self._check_started()
+        self._sendall_with_lock(b''.join(msg.serialize() for msg in msgs))
+        LOG.debug('Sent %d msgs to %s', len(msgs), self._remotename)
+
     def stop(self):
         Activity.stop(self)
 
@@ -551,15 +758,27 @@ class BgpProtocol(Protocol, Activity):
         """Sits in tight loop collecting data received from peer and
         processing it.
         """
-        required_len = BGP_MIN_MSG_LEN
         conn_lost_reason = "Connection lost as protocol is no longer active"
         try:
             while True:
-                next_bytes = self._socket.recv(required_len)
-                if len(next_bytes) == 0:
+                # Read as much as is available into the free tail of the
+                # buffer, keeping room for at least one whole message.
+                if self._recv_start == self._recv_end:
+                    self._recv_start = self._recv_end = 0
+                self._reserve_recv_buff(BGP_MAX_MSG_LEN)
+                received = self._socket.recv_into(
+                    self._recv_view[self._recv_end:])
+                if received == 0:
                     conn_lost_reason = 'Peer closed connection'
                     break
-                self.data_received(next_bytes)
+                self._recv_end += received
+                try:
+                    self._process_recv_buff()
+                except bgp.BgpExc as exc:
+                    self._handle_recv_error(exc)
+                # Give other sessions and timers a chance to run between
+                # large reads.
+                hub.sleep(0)
         except socket.error as err:
             conn_lost_reason = 'Connection to peer lost: %s.' % err
         except bgp.BgpExc as ex:
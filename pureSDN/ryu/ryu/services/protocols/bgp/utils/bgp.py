@@ -142,7 +142,7 @@ def get_unknown_opttrans_attr(path):
 
     Returns dict: <key> - attribute type code, <value> - unknown path-attr.
     """
-    path_attrs = path.pathattr_map
+    path_attrs = path.frozen_pathattr_map
     unknown_opt_tran_attrs = {}
     for _, attr in path_attrs.items():
         if (isinstance(attr, BGPPathAttributeUnknown) and
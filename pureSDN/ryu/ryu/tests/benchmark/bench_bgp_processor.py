@@ -0,0 +1,174 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Microbenchmark of the BGP processor.
+
+Destinations are queued several times each and then processed, with the
+previous circular list queue and the current queues. Best paths of
+destinations with paths from several peers are selected with pairwise
+compute_best_path() calls and with decision keys, the first time and
+again once the keys are cached.
+
+Usage::
+
+    $ python -m ryu.tests.benchmark.bench_bgp_processor [count] [paths]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+try:
+    import mock  # Python 2
+except ImportError:
+    from unittest import mock  # Python 3
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp import processor
+from ryu.services.protocols.bgp.base import OrderedDict
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.services.protocols.bgp.utils import circlist
+
+LOCAL_ASN = 65000
+
+# Number of times each destination is queued before it is processed
+ENQUEUE_REPEAT = 3
+
+
+class _Dest(object):
+    route_family = bgp.RF_IPv4_UC
+
+    def __init__(self, withdrawals):
+        self.withdrawals = withdrawals
+
+    def has_withdrawals(self):
+        return self.withdrawals
+
+    def process(self):
+        pass
+
+
+class _LegacyProcessor(object):
+    # BgpProcessor queueing before the prioritized queues, for comparison.
+    _DestQueue = circlist.CircularListType(
+        next_attr_name='next_dest_to_process',
+        prev_attr_name='prev_dest_to_process')
+
+    def __init__(self):
+        self._dest_queue = self._DestQueue()
+
+    def enqueue(self, destination):
+        if not self._dest_queue.is_on_list(destination):
+            self._dest_queue.append(destination)
+
+    def _process_dest(self):
+        while not self._dest_queue.is_empty():
+            next_dest = self._dest_queue.pop_first()
+            if next_dest:
+                next_dest.process()
+
+
+class _Processor(processor.BgpProcessor):
+    def _process_dest(self):
+        while self._withdraw_queue or self._dest_queue:
+            super(_Processor, self)._process_dest()
+
+
+class _Protocol(object):
+    def __init__(self, asn, router_id):
+        self.recv_open_msg = bgp.BGPOpen(my_as=asn, bgp_identifier=router_id)
+
+
+class _Peer(object):
+    def __init__(self, asn, router_id):
+        self.version_num = 1
+        self.remote_as = asn
+        self.protocol = _Protocol(asn, router_id)
+
+
+def _paths(count, num_paths):
+    peers = [_Peer(65001 + i % 2 if i < num_paths // 2 else LOCAL_ASN,
+                   '10.0.0.%d' % (i + 1)) for i in range(num_paths)]
+    dests = []
+    for i in range(count):
+        nlri = bgp.IPAddrPrefix(24, '10.%d.%d.0' % (i // 256 % 256, i % 256))
+        paths = []
+        for j, peer in enumerate(peers):
+            pattrs = OrderedDict()
+            pattrs[bgp.BGP_ATTR_TYPE_ORIGIN] = bgp.BGPPathAttributeOrigin(0)
+            pattrs[bgp.BGP_ATTR_TYPE_AS_PATH] = bgp.BGPPathAttributeAsPath(
+                [[65100 + j, 65200 + i % 100]])
+            pattrs[bgp.BGP_ATTR_TYPE_MULTI_EXIT_DISC] = \
+                bgp.BGPPathAttributeMultiExitDisc(i % 3)
+            paths.append(Ipv4Path(peer, nlri, 1, pattrs=pattrs,
+                                  nexthop='192.0.2.%d' % (j + 1)))
+        dests.append(paths)
+    return dests
+
+
+def legacy_best_path(paths):
+    # Destination._compute_best_known_path() before decision keys.
+    best_path = paths[0]
+    for path in paths[1:]:
+        new_best_path, _ = processor.compute_best_path(
+            LOCAL_ASN, best_path, path)
+        if new_best_path is not None:
+            best_path = new_best_path
+    return best_path
+
+
+def _time(func, *args):
+    start = time.time()
+    func(*args)
+    return time.time() - start
+
+
+def _queue(proc, dests):
+    for _ in range(ENQUEUE_REPEAT):
+        for dest in dests:
+            proc.enqueue(dest)
+    proc._process_dest()
+
+
+def main(count=100000, paths=4):
+    dests = [_Dest(i % 10 == 0) for i in range(count)]
+    legacy = _time(_queue, _LegacyProcessor(), dests)
+    proc = _Processor(mock.MagicMock())
+    current = _time(_queue, proc, dests)
+    stats = proc.get_stats()
+    print('%8s %8s %9s %12s %13s' % (
+        'dests', 'enqueued', 'coalesced', 'legacy queue', 'current queue'))
+    print('%8d %8d %9d %11.3fs %12.3fs' % (
+        count, stats['enqueued'], stats['coalesced'], legacy, current))
+
+    dest_paths = _paths(count // 10, paths)
+    legacy = _time(lambda: [legacy_best_path(p) for p in dest_paths])
+    first = _time(lambda: [processor.select_best_path(LOCAL_ASN, p)
+                           for p in dest_paths])
+    cached = _time(lambda: [processor.select_best_path(LOCAL_ASN, p)
+                            for p in dest_paths])
+    for p in dest_paths:
+        assert legacy_best_path(p) is \
+            processor.select_best_path(LOCAL_ASN, p)[0]
+    print('%8s %8s %12s %12s %12s' % (
+        'dests', 'paths', 'legacy best', 'key best', 'cached best'))
+    print('%8d %8d %11.3fs %11.3fs %11.3fs' % (
+        len(dest_paths), paths, legacy, first, cached))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,188 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Microbenchmark of BgpProtocol._recv_loop.
+
+The UPDATE messages captured in the bgp4 packet data, and a synthetic
+full table transfer, are replayed from a local TCP connection into a
+BgpProtocol. Messages and prefixes handled per second and receive calls
+are reported for the current receive loop and for the previous one,
+which read one message header at a time into a concatenated buffer.
+
+Usage::
+
+    $ python -m ryu.tests.benchmark.bench_bgp_recv [count]
+"""
+
+from __future__ import print_function
+
+import os
+import socket
+import sys
+import threading
+import time
+
+from ryu.lib import pcaplib
+from ryu.lib.packet import bgp
+from ryu.lib.packet import packet
+from ryu.services.protocols.bgp import speaker
+
+
+PACKET_DATA_DIR = os.path.join(
+    os.path.dirname(__file__), '../packet_data/bgp4')
+
+CAPTURES = ['bgp4-update.pcap', 'bgp4-update_ipv6.pcap',
+            'bgp4-update_vpnv6.pcap']
+
+# Prefixes per UPDATE of the synthetic table transfer
+TABLE_PREFIXES_PER_UPDATE = 4
+
+
+class _Socket(object):
+    # Wraps one end of a connection and counts receive calls.
+    def __init__(self, sock):
+        self.sock = sock
+        self.calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+    def recv(self, bufsize):
+        self.calls += 1
+        return self.sock.recv(bufsize)
+
+    def recv_into(self, buffer):
+        self.calls += 1
+        return self.sock.recv_into(buffer)
+
+
+class _Protocol(speaker.BgpProtocol):
+    def __init__(self, sock):
+        super(_Protocol, self).__init__(sock, None)
+        self.messages = 0
+        self.prefixes = 0
+
+    def _handle_msg(self, msg):
+        self.messages += 1
+        self.prefixes += _num_prefixes(msg)
+
+    def connection_lost(self, reason):
+        pass
+
+
+class _LegacyProtocol(_Protocol):
+    # The receive path before the offset-based buffer, for comparison.
+    def _recv_loop(self):
+        buff = b''
+        while True:
+            next_bytes = self._socket.recv(speaker.BGP_MIN_MSG_LEN)
+            if len(next_bytes) == 0:
+                break
+            buff += next_bytes
+            while len(buff) >= speaker.BGP_MIN_MSG_LEN:
+                auth, length, ptype = self.parse_msg_header(
+                    buff[:speaker.BGP_MIN_MSG_LEN])
+                if len(buff) < length:
+                    break
+                msg, _, buff = bgp.BGPMessage.parser(buff)
+                self._handle_msg(msg)
+
+
+def _num_prefixes(msg):
+    if not isinstance(msg, bgp.BGPUpdate):
+        return 0
+    num = len(msg.nlri) + len(msg.withdrawn_routes)
+    for attr in msg.path_attributes:
+        if isinstance(attr, (bgp.BGPPathAttributeMpReachNLRI,
+                             bgp.BGPPathAttributeMpUnreachNLRI)):
+            num += len(attr.nlri if hasattr(attr, 'nlri')
+                       else attr.withdrawn_routes)
+    return num
+
+
+def _captured_updates():
+    msgs = []
+    for name in CAPTURES:
+        path = os.path.join(PACKET_DATA_DIR, name)
+        for _, buf in pcaplib.Reader(open(path, 'rb')):
+            msg = packet.Packet(buf).protocols[-1]
+            msgs.append(bytes(msg.serialize()))
+    return msgs
+
+
+def _table_updates(count):
+    attrs = [bgp.BGPPathAttributeOrigin(0),
+             bgp.BGPPathAttributeAsPath([[65001, 65002]]),
+             bgp.BGPPathAttributeNextHop('192.0.2.1')]
+    msgs = []
+    for i in range(count):
+        nlri = [bgp.IPAddrPrefix(24, '10.%d.%d.0' % (
+            (i * TABLE_PREFIXES_PER_UPDATE + j) // 256 % 256,
+            (i * TABLE_PREFIXES_PER_UPDATE + j) % 256))
+            for j in range(TABLE_PREFIXES_PER_UPDATE)]
+        msgs.append(bytes(bgp.BGPUpdate(path_attributes=attrs,
+                                        nlri=nlri).serialize()))
+    return msgs
+
+
+def _connection():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    writer = socket.create_connection(server.getsockname())
+    reader, _ = server.accept()
+    server.close()
+    return reader, writer
+
+
+def _send(sock, data):
+    sock.sendall(data)
+    sock.close()
+
+
+def _run(protocol_cls, data):
+    reader, writer = _connection()
+    sock = _Socket(reader)
+    proto = protocol_cls(sock)
+    sender = threading.Thread(target=_send, args=(writer, data))
+    start = time.time()
+    sender.start()
+    proto._recv_loop()
+    elapsed = time.time() - start
+    sender.join()
+    reader.close()
+    return elapsed, proto.messages, proto.prefixes, sock.calls
+
+
+def main(count=20000):
+    streams = {
+        'captured': b''.join(_captured_updates()) * (count // 3),
+        'table': b''.join(_table_updates(count)),
+    }
+    print('%-9s %8s %9s %11s %12s %12s %12s %13s %13s' % (
+        'stream', 'messages', 'prefixes', 'legacy recv', 'legacy msg/s',
+        'legacy pfx/s', 'current recv', 'current msg/s', 'current pfx/s'))
+    for name, data in sorted(streams.items()):
+        (legacy, _, _, legacy_calls) = _run(_LegacyProtocol, data)
+        (current, messages, prefixes, current_calls) = _run(_Protocol, data)
+        print('%-9s %8d %9d %11d %12.0f %12.0f %12d %13.0f %13.0f' % (
+            name, messages, prefixes, legacy_calls, messages / legacy,
+            prefixes / legacy, current_calls, messages / current,
+            prefixes / current))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,168 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Microbenchmark of the initial table transfer to a BGP peer.
+
+The single prefix UPDATE messages built for an initial table transfer
+are sent over a local TCP connection to a test peer, which parses them
+and counts the prefixes received. The time until the peer has all
+prefixes, the UPDATE messages and the bytes sent are reported for the
+previous pipeline, which sent one UPDATE message per prefix, and for
+UpdatePacker with BgpProtocol.send_msgs().
+
+Usage::
+
+    $ python -m ryu.tests.benchmark.bench_bgp_send [count]
+"""
+
+from __future__ import print_function
+
+import socket
+import struct
+import sys
+import threading
+import time
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp import speaker
+
+# Number of distinct path attribute sets in the table
+ATTR_SETS = 16
+
+
+class _Peer(threading.Thread):
+    # Receives UPDATE messages until all prefixes have arrived.
+    def __init__(self, sock, prefixes):
+        super(_Peer, self).__init__()
+        self.sock = sock
+        self.prefixes = prefixes
+        self.received = 0
+        self.messages = 0
+        self.bytes = 0
+        self.end = None
+
+    def run(self):
+        buf = b''
+        while self.received < self.prefixes:
+            data = self.sock.recv(65536)
+            if not data:
+                break
+            self.bytes += len(data)
+            buf += data
+            offset = 0
+            while len(buf) - offset >= speaker.BGP_MIN_MSG_LEN:
+                (length,) = struct.unpack_from('!H', buf, offset + 16)
+                if len(buf) - offset < length:
+                    break
+                msg, _, _ = bgp.BGPMessage.parser(
+                    buf[offset:offset + length])
+                self.messages += 1
+                self.received += _num_prefixes(msg)
+                offset += length
+            buf = buf[offset:]
+        self.end = time.time()
+
+
+def _num_prefixes(msg):
+    mp_reach = msg.get_path_attr(bgp.BGP_ATTR_TYPE_MP_REACH_NLRI)
+    return len(msg.nlri) + (len(mp_reach.nlri) if mp_reach else 0)
+
+
+def _attr_sets():
+    return [[bgp.BGPPathAttributeOrigin(0),
+             bgp.BGPPathAttributeAsPath([[65001, 65100 + i]]),
+             bgp.BGPPathAttributeNextHop('192.0.2.1'),
+             bgp.BGPPathAttributeMultiExitDisc(i)]
+            for i in range(ATTR_SETS)]
+
+
+def _ipv4_updates(count):
+    attr_sets = _attr_sets()
+    updates = []
+    for i in range(count):
+        prefix = bgp.IPAddrPrefix(24, '10.%d.%d.0' % (i // 256 % 256,
+                                                      i % 256))
+        updates.append(bgp.BGPUpdate(
+            path_attributes=attr_sets[i % ATTR_SETS], nlri=[prefix]))
+    return updates
+
+
+def _ipv6_updates(count):
+    attr_sets = _attr_sets()
+    updates = []
+    for i in range(count):
+        mp_reach = bgp.BGPPathAttributeMpReachNLRI(
+            afi=bgp.addr_family.IP6, safi=bgp.subaddr_family.UNICAST,
+            next_hop='2001:db8::1',
+            nlri=[bgp.IP6AddrPrefix(48, '2001:db8:%x::' % (i % 65536))])
+        updates.append(bgp.BGPUpdate(
+            path_attributes=[mp_reach] + attr_sets[i % ATTR_SETS][:2]))
+    return updates
+
+
+def _connection():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    writer = socket.create_connection(server.getsockname())
+    writer.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    reader, _ = server.accept()
+    server.close()
+    return reader, writer
+
+
+def _send_legacy(sock, updates):
+    for update in updates:
+        sock.sendall(update.serialize())
+
+
+def _send_packed(sock, updates):
+    packer = speaker.UpdatePacker()
+    for update in updates:
+        msgs = packer.add(update)
+        if msgs:
+            sock.sendall(b''.join(msg.serialize() for msg in msgs))
+    sock.sendall(b''.join(msg.serialize() for msg in packer.flush()))
+
+
+def _run(send, updates):
+    reader, writer = _connection()
+    peer = _Peer(reader, len(updates))
+    peer.start()
+    start = time.time()
+    send(writer, updates)
+    peer.join()
+    writer.close()
+    reader.close()
+    assert peer.received == len(updates)
+    return peer.end - start, peer.messages, peer.bytes
+
+
+def main(count=50000):
+    print('%-5s %8s %15s %14s %13s %16s %15s %14s' % (
+        'table', 'prefixes', 'legacy updates', 'legacy bytes', 'legacy time',
+        'packed updates', 'packed bytes', 'packed time'))
+    for name, updates in (('ipv4', _ipv4_updates(count)),
+                          ('ipv6', _ipv6_updates(count))):
+        legacy, legacy_msgs, legacy_bytes = _run(_send_legacy, updates)
+        packed, packed_msgs, packed_bytes = _run(_send_packed, updates)
+        print('%-5s %8d %15d %14d %12.3fs %16d %15d %13.3fs' % (
+            name, count, legacy_msgs, legacy_bytes, legacy, packed_msgs,
+            packed_bytes, packed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
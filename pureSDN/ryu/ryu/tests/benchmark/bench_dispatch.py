@@ -0,0 +1,164 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Microbenchmark of RyuApp event dispatching.
+
+Synthetic EventOFPPacketIn events are pushed from a brick standing in for
+ofp_handler to a consuming application through app_manager. Events per
+second are reported for each hop:
+
+observers
+    RyuApp.get_observers on the sending brick.
+handlers
+    RyuApp.get_handlers on the consuming application.
+end-to-end
+    send_event_to_observers, the event queue and the consumer's
+    event loop until its handler ran.
+
+The lookups are compared with the previous implementations, which
+filtered the registered handlers and observers for every event.
+
+Usage::
+
+    $ python -m ryu.tests.benchmark.bench_dispatch [count]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from ryu.base import app_manager
+from ryu.controller import ofp_event
+from ryu.controller import handler
+from ryu.controller.handler import CONFIG_DISPATCHER
+from ryu.controller.handler import MAIN_DISPATCHER
+from ryu.lib import hub
+from ryu.ofproto import ofproto_v1_3
+from ryu.ofproto import ofproto_v1_3_parser
+
+
+class _Datapath(object):
+    ofproto = ofproto_v1_3
+    ofproto_parser = ofproto_v1_3_parser
+    id = 1
+
+
+class _Source(app_manager.RyuApp):
+    pass
+
+
+class _Sink(app_manager.RyuApp):
+    def __init__(self, *args, **kwargs):
+        super(_Sink, self).__init__(*args, **kwargs)
+        self.count = 0
+        self.expected = 0
+        self.done = hub.Event()
+
+    @handler.set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
+    def packet_in_handler(self, ev):
+        self.count += 1
+        if self.count == self.expected:
+            self.done.set()
+
+    @handler.set_ev_cls(ofp_event.EventOFPPacketIn, CONFIG_DISPATCHER)
+    def config_packet_in_handler(self, ev):
+        pass
+
+    @handler.set_ev_cls(ofp_event.EventOFPPortStatus, MAIN_DISPATCHER)
+    def port_status_handler(self, ev):
+        pass
+
+
+def legacy_get_handlers(app, ev, state=None):
+    # RyuApp.get_handlers before the dispatch tables, for comparison.
+    ev_cls = ev.__class__
+    handlers = app.event_handlers.get(ev_cls, [])
+    if state is None:
+        return handlers
+
+    def test(h):
+        if not hasattr(h, 'callers') or ev_cls not in h.callers:
+            return True
+        states = h.callers[ev_cls].dispatchers
+        if not states:
+            return True
+        return state in states
+
+    return filter(test, handlers)
+
+
+def legacy_get_observers(app, ev, state):
+    # RyuApp.get_observers before the dispatch tables, for comparison.
+    observers = []
+    for k, v in app.observers.get(ev.__class__, {}).items():
+        if not state or not v or state in v:
+            observers.append(k)
+    return observers
+
+
+def _rate(func, count):
+    start = time.time()
+    for _i in range(count):
+        for _x in func():
+            pass
+    return count / (time.time() - start)
+
+
+def _end_to_end(source, sink, ev, count):
+    sink.count = 0
+    sink.expected = count
+    sink.done.clear()
+    start = time.time()
+    for _i in range(count):
+        source.send_event_to_observers(ev, MAIN_DISPATCHER)
+    sink.done.wait()
+    return count / (time.time() - start)
+
+
+def main(count=200000):
+    source = _Source()
+    sink = _Sink()
+    app_manager.register_app(source)
+    app_manager.register_app(sink)
+    handler.register_instance(sink)
+    for ev_cls in (ofp_event.EventOFPPacketIn, ofp_event.EventOFPPortStatus):
+        source.register_observer(ev_cls, sink.name, [MAIN_DISPATCHER])
+        source.register_observer(ev_cls, 'other', [CONFIG_DISPATCHER])
+    sink.start()
+
+    msg = ofproto_v1_3_parser.OFPPacketIn(_Datapath())
+    ev = ofp_event.EventOFPPacketIn(msg)
+
+    print('%-12s %14s %14s' % ('hop', 'legacy ev/s', 'current ev/s'))
+    print('%-12s %14.0f %14.0f' % (
+        'observers',
+        _rate(lambda: legacy_get_observers(source, ev, MAIN_DISPATCHER),
+              count),
+        _rate(lambda: source.get_observers(ev, MAIN_DISPATCHER), count)))
+    print('%-12s %14.0f %14.0f' % (
+        'handlers',
+        _rate(lambda: legacy_get_handlers(sink, ev, MAIN_DISPATCHER), count),
+        _rate(lambda: sink.get_handlers(ev, MAIN_DISPATCHER), count)))
+    print('%-12s %14s %14.0f' % (
+        'end-to-end', '-', _end_to_end(source, sink, ev, count)))
+
+    app_manager.unregister_app(source)
+    app_manager.unregister_app(sink)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,148 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Microbenchmark of OpenFlow 1.3 OFPMatch encoding and decoding.
+
+Typical IPv4/L4 matches are serialized and parsed with the precompiled
+OXM codecs and with the previous generic implementation. Both also parse
+the old API fields. A recorded flow stats reply is parsed as a whole as
+well.
+
+Usage::
+
+    $ python -m ryu.tests.benchmark.bench_match [count]
+"""
+
+from __future__ import print_function
+
+import os
+import struct
+import sys
+import time
+
+from ryu.lib.pack_utils import msg_pack_into
+from ryu.ofproto import ofproto_parser
+from ryu.ofproto import ofproto_v1_3 as ofproto
+from ryu.ofproto import ofproto_v1_3_parser as parser
+
+
+PACKET_DATA_DIR = os.path.join(
+    os.path.dirname(__file__), '../packet_data/of13')
+
+MATCHES = {
+    'in_port': dict(in_port=1),
+    'ipv4': dict(in_port=1, eth_type=0x0800,
+                 ipv4_src='10.0.0.1', ipv4_dst='10.0.0.2'),
+    'ipv4_tcp': dict(in_port=1, eth_type=0x0800, ip_proto=6,
+                     ipv4_src='10.0.0.1', ipv4_dst='10.0.0.2',
+                     tcp_src=34567, tcp_dst=80),
+    'masked': dict(eth_type=0x0800, eth_dst=('00:00:00:00:00:01',
+                                             'ff:ff:ff:00:00:00'),
+                   ipv4_dst=('10.0.0.0', '255.255.255.0'),
+                   metadata=(0x10, 0xff)),
+}
+
+
+def legacy_serialize(match, buf, offset):
+    # OFPMatch.serialize before the precompiled codecs, for comparison.
+    fields = [ofproto.oxm_from_user(k, uv) for (k, uv)
+              in match._fields2]
+    field_offset = offset + 4
+    for (n, value, mask) in fields:
+        field_offset += ofproto.oxm_serialize(n, value, mask, buf,
+                                              field_offset)
+    length = field_offset - offset
+    msg_pack_into('!HH', buf, offset, ofproto.OFPMT_OXM, length)
+    pad_len = (length + 7) // 8 * 8 - length
+    msg_pack_into('%dx' % pad_len, buf, field_offset)
+    return length + pad_len
+
+
+def legacy_parser(buf, offset):
+    # OFPMatch.parser before the precompiled codecs, for comparison.
+    match = parser.OFPMatch()
+    type_, length = struct.unpack_from('!HH', buf, offset)
+    match.type = type_
+    match.length = length
+    offset += 4
+    length -= 4
+    parser.OFPMatch.parser_old(match, buf, offset, length)
+    fields = []
+    while length > 0:
+        n, value, mask, field_len = ofproto.oxm_parse(buf, offset)
+        k, uv = ofproto.oxm_to_user(n, value, mask)
+        fields.append((k, uv))
+        offset += field_len
+        length -= field_len
+    match._fields2 = fields
+    return match
+
+
+def _time(func, count):
+    start = time.time()
+    for _ in range(count):
+        func()
+    return (time.time() - start) / count * 1e6
+
+
+def _bench_match(kwargs, count):
+    match = parser.OFPMatch(**kwargs)
+    buf = bytearray()
+    length = match.serialize(buf, 0)
+    buf = bytes(buf)
+    assert legacy_parser(buf, 0)._fields2 == \
+        parser.OFPMatch.parser(buf, 0)._fields2
+
+    return (_time(lambda: legacy_serialize(match, bytearray(), 0), count),
+            _time(lambda: match.serialize(bytearray(), 0), count),
+            _time(lambda: legacy_parser(buf, 0), count),
+            _time(lambda: parser.OFPMatch.parser(buf, 0), count),
+            length)
+
+
+def _bench_flow_stats(count):
+    data = open(os.path.join(
+        PACKET_DATA_DIR, '4-12-ofp_flow_stats_reply.packet'), 'rb').read()
+    (version, msg_type, msg_len, xid) = ofproto_parser.header(data)
+
+    def parse():
+        ofproto_parser.msg(None, version, msg_type, msg_len, xid, data)
+
+    current = _time(parse, count)
+    orig = parser.OFPMatch.parser
+    parser.OFPMatch.parser = staticmethod(legacy_parser)
+    try:
+        legacy = _time(parse, count)
+    finally:
+        parser.OFPMatch.parser = orig
+    return legacy, current
+
+
+def main(count=20000):
+    print('%-10s %6s %10s %10s %10s %10s' % (
+        'match', 'bytes', 'legacy ser', 'ser', 'legacy par', 'par'))
+    for name, kwargs in sorted(MATCHES.items()):
+        (legacy_ser, ser, legacy_par, par, length) = _bench_match(kwargs,
+                                                                  count)
+        print('%-10s %6d %8.2fus %8.2fus %8.2fus %8.2fus' % (
+            name, length, legacy_ser, ser, legacy_par, par))
+    legacy, current = _bench_flow_stats(count // 10)
+    print('flow stats reply: legacy %.2fus, current %.2fus' % (
+        legacy, current))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
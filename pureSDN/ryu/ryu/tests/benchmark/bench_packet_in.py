@@ -0,0 +1,148 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Microbenchmark of packet-in decoding.
+
+For common frame types, packet-ins per second are reported for:
+
+eager
+    one Packet(msg.data), decoding every header.
+lazy
+    one LazyPacket(msg.data), looking up the IPv4 (or ARP) header only.
+apps
+    the lookups of PureSDN's NetworkAwareness and ShortestForwarding
+    handlers, each decoding msg.data with its own Packet.
+apps-shared
+    the same lookups on the LazyPacket shared through get_packet().
+
+Usage::
+
+    $ python -m ryu.tests.benchmark.bench_packet_in [count]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from ryu.lib.packet import arp
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import icmp
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import lldp
+from ryu.lib.packet import packet
+from ryu.lib.packet import tcp
+from ryu.lib.packet import udp
+from ryu.ofproto import ether
+from ryu.ofproto import inet
+
+
+SRC_MAC = '00:00:00:00:00:01'
+DST_MAC = '00:00:00:00:00:02'
+SRC_IP = '10.0.0.1'
+DST_IP = '10.0.0.2'
+
+
+def _frame(*protocols):
+    pkt = packet.Packet(protocols=list(protocols))
+    pkt.serialize()
+    return bytes(pkt.data)
+
+
+def _ipv4(proto):
+    return ipv4.ipv4(proto=proto, src=SRC_IP, dst=DST_IP)
+
+
+FRAMES = {
+    'arp': _frame(
+        ethernet.ethernet(DST_MAC, SRC_MAC, ether.ETH_TYPE_ARP),
+        arp.arp_ip(arp.ARP_REQUEST, SRC_MAC, SRC_IP, DST_MAC, DST_IP)),
+    'ipv4-icmp': _frame(
+        ethernet.ethernet(DST_MAC, SRC_MAC, ether.ETH_TYPE_IP),
+        _ipv4(inet.IPPROTO_ICMP),
+        icmp.icmp(data=icmp.echo(1, 1, b'\x00' * 56))),
+    'ipv4-tcp': _frame(
+        ethernet.ethernet(DST_MAC, SRC_MAC, ether.ETH_TYPE_IP),
+        _ipv4(inet.IPPROTO_TCP), tcp.tcp(5001, 80), b'\x01' * 1400),
+    'ipv4-udp': _frame(
+        ethernet.ethernet(DST_MAC, SRC_MAC, ether.ETH_TYPE_IP),
+        _ipv4(inet.IPPROTO_UDP), udp.udp(5001, 80), b'\x01' * 1400),
+    'lldp': _frame(
+        ethernet.ethernet(lldp.LLDP_MAC_NEAREST_BRIDGE, SRC_MAC,
+                          ether.ETH_TYPE_LLDP),
+        lldp.lldp([lldp.ChassisID(subtype=lldp.ChassisID.SUB_LOCALLY_ASSIGNED,
+                                  chassis_id=b'dpid:0000000000000001'),
+                   lldp.PortID(subtype=lldp.PortID.SUB_PORT_COMPONENT,
+                               port_id=b'\x00\x00\x00\x01'),
+                   lldp.TTL(ttl=120), lldp.End()])),
+}
+
+
+class _Msg(object):
+    def __init__(self, data):
+        self.data = data
+
+
+def _eager(data):
+    packet.Packet(data)
+
+
+def _lazy(data):
+    pkt = packet.LazyPacket(data)
+    pkt.get_protocol(ipv4.ipv4) or pkt.get_protocol(arp.arp)
+
+
+def _handlers(msg, get_packet):
+    # NetworkAwareness._packet_in_handler
+    pkt = get_packet(msg)
+    if not pkt.get_protocol(arp.arp) and pkt.get_protocol(ipv4.ipv4):
+        pkt.get_protocol(ethernet.ethernet)
+    # ShortestForwarding._packet_in_handler and shortest_forwarding()
+    pkt = get_packet(msg)
+    pkt.get_protocol(arp.arp)
+    if pkt.get_protocol(ipv4.ipv4):
+        pkt.get_protocol(ethernet.ethernet)
+        pkt = get_packet(msg)
+        pkt.get_protocol(tcp.tcp)
+        pkt.get_protocol(udp.udp)
+
+
+def _apps(data):
+    _handlers(_Msg(data), lambda msg: packet.Packet(msg.data))
+
+
+def _apps_shared(data):
+    _handlers(_Msg(data), packet.get_packet)
+
+
+def _rate(func, data, count):
+    start = time.time()
+    for _i in range(count):
+        func(data)
+    return count / (time.time() - start)
+
+
+def main(count=20000):
+    runs = [('eager', _eager), ('lazy', _lazy), ('apps', _apps),
+            ('apps-shared', _apps_shared)]
+    print('%-10s' % 'frame' + ''.join('%13s' % name for name, _f in runs))
+    for name, data in sorted(FRAMES.items()):
+        print('%-10s' % name + ''.join(
+            '%13.0f' % _rate(func, data, count) for _name, func in runs))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,158 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Microbenchmark of Datapath._recv_loop.
+
+Recorded OpenFlow 1.3 messages are concatenated into one stream and fed
+to a Datapath through a local socket pair. Messages parsed per second and
+receive calls are reported for the current receive loop and for the
+previous read-per-message implementation.
+
+Usage::
+
+    $ python -m ryu.tests.benchmark.bench_recv_loop [count]
+"""
+
+from __future__ import print_function
+
+import os
+import socket
+import sys
+import threading
+import time
+
+from ryu.base import app_manager  # noqa: F401, imported before controller
+from ryu.controller import controller
+from ryu.controller import handler
+from ryu.ofproto import ofproto_common
+from ryu.ofproto import ofproto_parser
+
+
+PACKET_DATA_DIR = os.path.join(
+    os.path.dirname(__file__), '../packet_data/of13')
+
+STREAMS = {
+    'packet_in': ['4-4-ofp_packet_in.packet'],
+    'mixed': ['4-4-ofp_packet_in.packet',
+              '4-14-ofp_echo_reply.packet',
+              '4-30-ofp_port_stats_reply.packet',
+              '4-39-ofp_port_status.packet'],
+    'flow_stats': ['4-12-ofp_flow_stats_reply.packet'],
+}
+
+
+class _Brick(object):
+    def send_event_to_observers(self, ev, state=None):
+        pass
+
+    def get_handlers(self, ev, state=None):
+        return []
+
+
+class _Socket(object):
+    # Wraps one end of a socket pair and counts receive calls.
+    def __init__(self, sock):
+        self.sock = sock
+        self.calls = 0
+
+    def setsockopt(self, *args):
+        pass
+
+    def settimeout(self, timeout):
+        self.sock.settimeout(timeout)
+
+    def shutdown(self, how):
+        pass
+
+    def close(self):
+        self.sock.close()
+
+    def recv(self, bufsize):
+        self.calls += 1
+        return self.sock.recv(bufsize)
+
+    def recv_into(self, buffer):
+        self.calls += 1
+        return self.sock.recv_into(buffer)
+
+
+def legacy_recv_loop(dp):
+    # The receive loop before the offset-based buffer, for comparison.
+    buf = bytearray()
+    min_read_len = remaining_read_len = ofproto_common.OFP_HEADER_SIZE
+    while True:
+        read_len = min_read_len
+        if remaining_read_len > min_read_len:
+            read_len = remaining_read_len
+        ret = dp.socket.recv(read_len)
+        if not ret:
+            break
+        buf += ret
+        buf_len = len(buf)
+        while buf_len >= min_read_len:
+            (version, msg_type, msg_len, xid) = ofproto_parser.header(
+                bytes(buf))
+            if buf_len < msg_len:
+                remaining_read_len = (msg_len - buf_len)
+                break
+            ofproto_parser.msg(
+                dp, version, msg_type, msg_len, xid, buf[:msg_len])
+            buf = buf[msg_len:]
+            buf_len = len(buf)
+            remaining_read_len = min_read_len
+
+
+def _stream(names, count):
+    msgs = [open(os.path.join(PACKET_DATA_DIR, name), 'rb').read()
+            for name in names]
+    return b''.join(msgs) * count, len(msgs) * count
+
+
+def _send(sock, data):
+    sock.sendall(data)
+    sock.close()
+
+
+def _run(loop, data):
+    reader, writer = socket.socketpair()
+    sock = _Socket(reader)
+    dp = controller.Datapath(sock, ('127.0.0.1', 0))
+    dp.ofp_brick = _Brick()
+    dp.set_state(handler.MAIN_DISPATCHER)
+    sender = threading.Thread(target=_send, args=(writer, data))
+    start = time.time()
+    sender.start()
+    loop(dp)
+    elapsed = time.time() - start
+    sender.join()
+    return elapsed, sock.calls
+
+
+def main(count=20000):
+    print('%-12s %9s %14s %12s %14s %12s' % (
+        'stream', 'messages', 'legacy msg/s', 'legacy recv',
+        'current msg/s', 'current recv'))
+    for name, files in sorted(STREAMS.items()):
+        data, num_msgs = _stream(files, count)
+        legacy, legacy_calls = _run(legacy_recv_loop, data)
+        current, current_calls = _run(controller.Datapath._recv_loop, data)
+        print('%-12s %9d %14.0f %12d %14.0f %12d' % (
+            name, num_msgs, num_msgs / legacy, legacy_calls,
+            num_msgs / current, current_calls))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,125 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Microbenchmark of the memory used by the BGP RIB.
+
+A global IPv4 table is filled with the paths of parsed UPDATE messages,
+which announce prefixes with a limited number of distinct path attribute
+combinations. The memory allocated per prefix is reported for the
+previous layout, where each path kept a copy of its path attributes and
+paths and destinations had an attribute dict, and for the current one
+with interned path attributes and __slots__.
+
+Usage::
+
+    $ python -m ryu.tests.benchmark.bench_rib_memory [count] [attr_sets]
+"""
+
+from __future__ import print_function
+
+from copy import copy
+import gc
+import sys
+import time
+import tracemalloc
+
+try:
+    import mock  # Python 2
+except ImportError:
+    from unittest import mock  # Python 3
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp.info_base.ipv4 import IPv4Dest
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Table
+
+# Prefixes per UPDATE message
+PREFIXES_PER_UPDATE = 4
+
+
+class _LegacyIpv4Path(Ipv4Path):
+    # A path before interned path attributes and __slots__.
+    def __init__(self, *args, **kwargs):
+        super(_LegacyIpv4Path, self).__init__(*args, **kwargs)
+        self._path_attr_map = copy(kwargs['pattrs'])
+
+
+class _LegacyIPv4Dest(IPv4Dest):
+    pass
+
+
+class _LegacyIpv4Table(Ipv4Table):
+    VPN_DEST_CLASS = _LegacyIPv4Dest
+
+
+def _updates(count, attr_sets):
+    msgs = []
+    for i in range(0, count, PREFIXES_PER_UPDATE):
+        n = i // PREFIXES_PER_UPDATE % attr_sets
+        attrs = [bgp.BGPPathAttributeOrigin(0),
+                 bgp.BGPPathAttributeAsPath([[65001, 65100 + n % 100]]),
+                 bgp.BGPPathAttributeNextHop('192.0.2.%d' % (n % 4 + 1)),
+                 bgp.BGPPathAttributeMultiExitDisc(n),
+                 bgp.BGPPathAttributeCommunities([0xfde80000 + n % 10])]
+        nlri = [bgp.IPAddrPrefix(24, '10.%d.%d.0' % (j // 256 % 256,
+                                                     j % 256))
+                for j in range(i, i + PREFIXES_PER_UPDATE)]
+        msgs.append(bgp.BGPUpdate(path_attributes=attrs,
+                                  nlri=nlri).serialize())
+    return msgs
+
+
+def _fill(table_cls, path_cls, updates):
+    table = table_cls(mock.MagicMock(), mock.MagicMock())
+    for buf in updates:
+        msg, _, _ = bgp.BGPMessage.parser(buf)
+        pattrs = msg.pathattr_map
+        for nlri in msg.nlri:
+            path = path_cls(None, nlri, 0, pattrs=pattrs,
+                            nexthop=pattrs[bgp.BGP_ATTR_TYPE_NEXT_HOP].value)
+            dest = table.insert(path)
+            dest._known_path_list.append(path)
+            del dest._new_path_list[:]
+    return table
+
+
+def _run(table_cls, path_cls, updates):
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    table = _fill(table_cls, path_cls, updates)
+    elapsed = time.time() - start
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del table
+    return size, elapsed
+
+
+def main(count=50000, attr_sets=1000):
+    updates = _updates(count, attr_sets)
+    legacy, legacy_time = _run(_LegacyIpv4Table, _LegacyIpv4Path, updates)
+    current, current_time = _run(Ipv4Table, Ipv4Path, updates)
+    print('%8s %9s %13s %12s %14s %13s' % (
+        'prefixes', 'attr sets', 'legacy B/pfx', 'legacy time',
+        'current B/pfx', 'current time'))
+    print('%8d %9d %13d %11.3fs %14d %12.3fs' % (
+        count, attr_sets, legacy // count, legacy_time, current // count,
+        current_time))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,149 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Microbenchmark of RIB cleanup on peer down and route target changes.
+
+A global IPv4 table holds a full table from one peer and a few prefixes
+from another peer, which then goes down. A global VPNv4 table holds
+prefixes with one of a number of route targets, one of which is then no
+longer of interest. The time to clean the tables is reported against
+the table size for the previous full scan of all destinations and for
+the per-source and per-RT indexes.
+
+Usage::
+
+    $ python -m ryu.tests.benchmark.bench_rib_peer_down [count] [peer_prefixes]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+try:
+    import mock  # Python 2
+except ImportError:
+    from unittest import mock  # Python 3
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp.base import OrderedDict
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Table
+from ryu.services.protocols.bgp.info_base.vpnv4 import Vpnv4Path
+from ryu.services.protocols.bgp.info_base.vpnv4 import Vpnv4Table
+from ryu.services.protocols.bgp.utils.bgp import create_rt_extended_community
+
+# Number of route targets of the VPNv4 table
+ROUTE_TARGETS = 100
+
+
+class _Peer(object):
+    def __init__(self, version_num):
+        self.version_num = version_num
+
+
+def legacy_cleanup_paths_for_peer(table, peer):
+    # Table.cleanup_paths_for_peer() before the per-source index.
+    for dest in table.values():
+        paths_deleted = dest.remove_old_paths_from_source(peer)
+        dest.remove_sent_route(peer)
+        if paths_deleted:
+            table._signal_bus.dest_changed(dest)
+
+
+def legacy_clean_uninteresting_paths(table, interested_rts):
+    # Table.clean_uninteresting_paths() before the per-RT index.
+    uninteresting_dest_count = 0
+    for dest in table.values():
+        if dest.withdraw_uninteresting_paths(interested_rts):
+            table._signal_bus.dest_changed(dest)
+            uninteresting_dest_count += 1
+    return uninteresting_dest_count
+
+
+def _pattrs(rt=None):
+    pattrs = OrderedDict()
+    pattrs[bgp.BGP_ATTR_TYPE_ORIGIN] = bgp.BGPPathAttributeOrigin(0)
+    pattrs[bgp.BGP_ATTR_TYPE_AS_PATH] = bgp.BGPPathAttributeAsPath(
+        [[65001]])
+    if rt is not None:
+        pattrs[bgp.BGP_ATTR_TYPE_EXTENDED_COMMUNITIES] = \
+            bgp.BGPPathAttributeExtendedCommunities(
+                [create_rt_extended_community(rt)])
+    return pattrs
+
+
+def _insert(table, path):
+    dest = table.insert(path)
+    dest._known_path_list.append(path)
+    del dest._new_path_list[:]
+
+
+def _ipv4_table(count, peer_prefixes, full_peer, peer):
+    table = Ipv4Table(mock.MagicMock(), mock.MagicMock())
+    pattrs = _pattrs()
+    for i in range(count):
+        nlri = bgp.IPAddrPrefix(24, '10.%d.%d.0' % (i // 256 % 256, i % 256))
+        _insert(table, Ipv4Path(full_peer, nlri, 1, pattrs=pattrs,
+                                nexthop='192.0.2.1'))
+    for i in range(peer_prefixes):
+        nlri = bgp.IPAddrPrefix(24, '172.16.%d.0' % (i % 256))
+        _insert(table, Ipv4Path(peer, nlri, 1, pattrs=pattrs,
+                                nexthop='192.0.2.2'))
+    return table
+
+
+def _vpnv4_table(count, peer):
+    table = Vpnv4Table(mock.MagicMock(), mock.MagicMock())
+    pattrs = [_pattrs('65000:%d' % n) for n in range(ROUTE_TARGETS)]
+    for i in range(count):
+        nlri = bgp.LabelledVPNIPAddrPrefix(
+            24, '10.%d.%d.0' % (i // 256 % 256, i % 256),
+            route_dist='65000:%d' % (i // 65536), labels=[100])
+        _insert(table, Vpnv4Path(peer, nlri, 1,
+                                 pattrs=pattrs[i % ROUTE_TARGETS],
+                                 nexthop='192.0.2.1'))
+    return table
+
+
+def _time(func, *args):
+    start = time.time()
+    func(*args)
+    return time.time() - start
+
+
+def main(count=100000, peer_prefixes=100):
+    full_peer = _Peer(1)
+    peer = _Peer(2)
+    interested_rts = set('65000:%d' % n for n in range(1, ROUTE_TARGETS))
+    print('%8s %15s %15s %15s %15s' % (
+        'prefixes', 'legacy down', 'current down', 'legacy rt', 'current rt'))
+    for size in (count // 100, count // 10, count):
+        table = _ipv4_table(size, peer_prefixes, full_peer, peer)
+        legacy_down = _time(legacy_cleanup_paths_for_peer, table, peer)
+        table = _ipv4_table(size, peer_prefixes, full_peer, peer)
+        current_down = _time(table.cleanup_paths_for_peer, peer)
+        table = _vpnv4_table(size, full_peer)
+        legacy_rt = _time(legacy_clean_uninteresting_paths, table,
+                          interested_rts)
+        table = _vpnv4_table(size, full_peer)
+        current_rt = _time(table.clean_uninteresting_paths, interested_rts)
+        print('%8d %14.4fs %14.4fs %14.4fs %14.4fs' % (
+            size, legacy_down, current_down, legacy_rt, current_rt))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
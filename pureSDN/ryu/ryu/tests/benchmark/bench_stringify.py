@@ -0,0 +1,161 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Microbenchmark of StringifyMixin JSON encoding.
+
+Large lists of OFPFlowStats and Packet objects are encoded to JSON with
+the previous reflection based to_jsondict(), the current to_jsondict()
+and to_json_bytes().
+
+Usage::
+
+    $ python -m ryu.tests.benchmark.bench_stringify [count]
+"""
+
+from __future__ import print_function
+
+import base64
+import inspect
+import json
+import sys
+import time
+
+import six
+
+from ryu.lib import stringify
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import packet
+from ryu.lib.packet import tcp
+from ryu.ofproto import ofproto_v1_3_parser as parser
+
+
+def _legacy_attrs(msg_):
+    # obj_python_attrs() and obj_attrs() before the fast path.
+    if hasattr(msg_, '_fields'):
+        for k in msg_._fields:
+            yield (k, getattr(msg_, k))
+        return
+    base = getattr(msg_, '_base_attributes', [])
+    opt = getattr(msg_, '_opt_attributes', [])
+    for k, v in inspect.getmembers(msg_):
+        if k in opt:
+            pass
+        elif k.startswith('_'):
+            continue
+        elif callable(v):
+            continue
+        elif k in base:
+            continue
+        elif hasattr(msg_.__class__, k):
+            continue
+        if k.endswith('_') and k[:-1] in dir(six.moves.builtins):
+            k = k[:-1]
+        yield (k, v)
+
+
+def legacy_to_jsondict(obj, encode_string=base64.b64encode):
+    # StringifyMixin.to_jsondict() before the per-class caches, for
+    # comparison. Objects with their own to_jsondict() are left as is.
+    if type(obj).to_jsondict is not stringify.StringifyMixin.to_jsondict:
+        return obj.to_jsondict()
+    cls = obj.__class__
+
+    def _encode(v):
+        if isinstance(v, (bytes, six.text_type)):
+            if isinstance(v, six.text_type):
+                v = v.encode('utf-8')
+            return encode_string(v).decode('ascii')
+        elif isinstance(v, list):
+            return [_encode(ve) for ve in v]
+        elif isinstance(v, dict):
+            return dict((str(k), _encode(ve)) for k, ve in v.items())
+        try:
+            return legacy_to_jsondict(v)
+        except Exception:
+            return v
+
+    if isinstance(obj, stringify.StringifyMixin):
+        attrs = list(obj.stringify_attrs())
+        if obj.stringify_attrs.__func__ is \
+                stringify.StringifyMixin.stringify_attrs:
+            attrs = _legacy_attrs(obj)
+    else:
+        attrs = _legacy_attrs(obj)
+    dict_ = {}
+    for k, v in attrs:
+        t = None
+        for name, keys in getattr(cls, '_TYPE', {}).items():
+            if k in keys:
+                t = stringify._types[name]
+        dict_[k] = t.encode(v) if t else _encode(v)
+    return {cls.__name__: dict_}
+
+
+def _flow_stats(count):
+    stats = []
+    for i in range(count):
+        match = parser.OFPMatch(in_port=i % 48 + 1, eth_type=0x0800,
+                                ipv4_dst='10.0.%d.%d' % (i // 256 % 256,
+                                                         i % 256))
+        actions = [parser.OFPActionOutput(i % 48 + 1)]
+        inst = [parser.OFPInstructionActions(4, actions)]
+        stats.append(parser.OFPFlowStats(
+            table_id=0, duration_sec=i, duration_nsec=0, priority=1,
+            idle_timeout=0, hard_timeout=0, flags=0, cookie=i,
+            packet_count=i, byte_count=i * 64, match=match,
+            instructions=inst))
+    return stats
+
+
+def _packets(count):
+    pkts = []
+    for i in range(count):
+        pkt = packet.Packet()
+        pkt.add_protocol(ethernet.ethernet(
+            dst='00:00:00:00:00:02', src='00:00:00:00:00:01',
+            ethertype=0x0800))
+        pkt.add_protocol(ipv4.ipv4(
+            src='10.0.0.1', dst='10.0.%d.%d' % (i // 256 % 256, i % 256),
+            proto=6))
+        pkt.add_protocol(tcp.tcp(src_port=i % 65536, dst_port=80))
+        pkts.append(pkt)
+    return pkts
+
+
+def _time(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def main(count=10000):
+    print('%-10s %8s %10s %14s %14s' % (
+        'objects', 'count', 'legacy', 'to_jsondict', 'to_json_bytes'))
+    for name, objs in (('flowstats', _flow_stats(count)),
+                       ('packet', _packets(count))):
+        legacy, legacy_doc = _time(lambda: json.dumps(
+            [legacy_to_jsondict(o) for o in objs]).encode('utf-8'))
+        current, doc = _time(lambda: json.dumps(
+            [o.to_jsondict() for o in objs]).encode('utf-8'))
+        direct, direct_doc = _time(lambda: stringify.to_json_bytes(objs))
+        assert legacy_doc == doc == direct_doc
+        print('%-10s %8d %9.3fs %13.3fs %13.3fs' % (
+            name, count, legacy, current, direct))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
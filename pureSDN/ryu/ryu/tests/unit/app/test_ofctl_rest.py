@@ -91,6 +91,15 @@ class Test_ofctl_rest(unittest.TestCase):
             res = req.get_response(wsgi)
         eq_(res.status, '200 OK')
 
+    def test_json_list_stream(self):
+        entries = [{'priority': i, 'match': {'in_port': i}}
+                   for i in range(5)]
+        for chunk_size in (1, 64 * 1024):
+            chunks = list(ofctl_rest.json_list_stream(
+                '1', iter(entries), chunk_size))
+            eq_(json.dumps({'1': entries}).encode('utf-8'), b''.join(chunks))
+        eq_([b'{"1": []}'], list(ofctl_rest.json_list_stream('1', [])))
+
 
 def _add_tests():
     _ofp_vers = {
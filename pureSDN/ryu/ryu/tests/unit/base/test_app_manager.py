@@ -0,0 +1,102 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from nose.tools import eq_
+
+from ryu.base import app_manager
+from ryu.controller import event
+from ryu.controller import handler
+from ryu.controller.handler import CONFIG_DISPATCHER
+from ryu.controller.handler import MAIN_DISPATCHER
+
+
+class _EventA(event.EventBase):
+    pass
+
+
+class _EventB(event.EventBase):
+    pass
+
+
+class _App(app_manager.RyuApp):
+    @handler.set_ev_cls(_EventA, MAIN_DISPATCHER)
+    def main_handler(self, ev):
+        pass
+
+    @handler.set_ev_cls(_EventA, [MAIN_DISPATCHER, CONFIG_DISPATCHER])
+    def both_handler(self, ev):
+        pass
+
+    @handler.set_ev_cls(_EventA)
+    def any_handler(self, ev):
+        pass
+
+
+class Test_RyuApp_dispatch(unittest.TestCase):
+    """ Test case for the handler and observer dispatch tables
+    """
+
+    def setUp(self):
+        self.app = _App()
+        handler.register_instance(self.app)
+        self.ev = _EventA()
+
+    def test_get_handlers(self):
+        app = self.app
+        eq_(set(app.get_handlers(self.ev)),
+            set([app.main_handler, app.both_handler, app.any_handler]))
+        eq_(set(app.get_handlers(self.ev, MAIN_DISPATCHER)),
+            set([app.main_handler, app.both_handler, app.any_handler]))
+        eq_(set(app.get_handlers(self.ev, CONFIG_DISPATCHER)),
+            set([app.both_handler, app.any_handler]))
+        eq_(list(app.get_handlers(self.ev, 'unknown')), [app.any_handler])
+        eq_(list(app.get_handlers(_EventB(), MAIN_DISPATCHER)), [])
+
+    def test_dynamic_handler(self):
+        app = self.app
+
+        def dynamic(ev):
+            pass
+
+        app.register_handler(_EventB, dynamic)
+        eq_(list(app.get_handlers(_EventB(), MAIN_DISPATCHER)), [dynamic])
+        app.unregister_handler(_EventB, dynamic)
+        eq_(list(app.get_handlers(_EventB(), MAIN_DISPATCHER)), [])
+
+    def test_unregister_handler(self):
+        app = self.app
+        app.unregister_handler(_EventA, app.both_handler)
+        eq_(set(app.get_handlers(self.ev, CONFIG_DISPATCHER)),
+            set([app.any_handler]))
+
+    def test_get_observers(self):
+        app = self.app
+        app.register_observer(_EventA, 'main', [MAIN_DISPATCHER])
+        app.register_observer(_EventA, 'any')
+        eq_(set(app.get_observers(self.ev, MAIN_DISPATCHER)),
+            set(['main', 'any']))
+        eq_(list(app.get_observers(self.ev, CONFIG_DISPATCHER)), ['any'])
+        eq_(set(app.get_observers(self.ev, None)), set(['main', 'any']))
+
+        app.register_observer(_EventA, 'main', [CONFIG_DISPATCHER])
+        eq_(set(app.get_observers(self.ev, CONFIG_DISPATCHER)),
+            set(['main', 'any']))
+
+        app.unregister_observer(_EventA, 'any')
+        eq_(list(app.get_observers(self.ev, 'unknown')), [])
+        app.unregister_observer_all_event('main')
+        eq_(list(app.get_observers(self.ev, MAIN_DISPATCHER)), [])
@@ -29,7 +29,7 @@ import logging
 import random
 import unittest
 
-from nose.tools import eq_, raises
+from nose.tools import eq_, ok_, raises
 
 from ryu.base import app_manager  # To suppress cyclic import
 from ryu.controller import controller
@@ -117,8 +117,20 @@ class Test_Datapath(unittest.TestCase):
     def test_ports_accessibility_v10(self):
         self._test_ports_accessibility(ofproto_v1_0_parser, 0)
 
+    def test_recv_loop(self):
+        self._test_recv_loop()
+
+    def test_recv_loop_small_buffer(self):
+        # The receive buffer has to be compacted and grown for messages
+        # larger than the buffer.
+        controller.CONF.set_override('ofp_recv_buffer_size', 32)
+        try:
+            self._test_recv_loop()
+        finally:
+            controller.CONF.clear_override('ofp_recv_buffer_size')
+
     @mock.patch("ryu.base.app_manager", spec=app_manager)
-    def test_recv_loop(self, app_manager_mock):
+    def _test_recv_loop(self, app_manager_mock):
         # Prepare test data
         test_messages = [
             "4-6-ofp_features_reply.packet",
@@ -153,6 +165,11 @@ class Test_Datapath(unittest.TestCase):
                 self.buf = self.buf[size:]
                 return out
 
+            def recv_into(self, buffer):
+                out = self.recv(len(buffer))
+                buffer[:len(out)] = out
+                return len(out)
+
         # Prepare mock
         ofp_brick_mock = mock.MagicMock(spec=app_manager.RyuApp)
         app_manager_mock.lookup_service_brick.return_value = ofp_brick_mock
@@ -181,6 +198,54 @@ class Test_Datapath(unittest.TestCase):
             self.assertEqual(kwargs, {})
         self.assertEqual(expected_json, output_json)
 
+    def _new_datapath_v13(self):
+        with mock.patch('ryu.controller.controller.Datapath.set_state'):
+            dp = controller.Datapath(mock.Mock(), mock.Mock())
+        dp.set_version(ofproto_v1_3_parser.ofproto.OFP_VERSION)
+        return dp
+
+    def test_send_msgs(self):
+        dp = self._new_datapath_v13()
+        parser = dp.ofproto_parser
+        msgs = [parser.OFPEchoRequest(dp), parser.OFPBarrierRequest(dp)]
+
+        ok_(dp.send_msgs(msgs))
+
+        eq_(dp.send_q.qsize(), 1)
+        buf, close_socket = dp.send_q.get()
+        eq_(buf, msgs[0].buf + msgs[1].buf)
+        eq_(close_socket, False)
+        ok_(msgs[0].xid != msgs[1].xid)
+
+    def test_send_loop_coalesces_queued_buffers(self):
+        dp = self._new_datapath_v13()
+        parser = dp.ofproto_parser
+        echo = parser.OFPEchoRequest(dp)
+        barrier = parser.OFPBarrierRequest(dp)
+        hello = parser.OFPHello(dp)
+        dp.send_msg(echo)
+        dp.send_msgs([barrier])
+        dp.send_msg(hello, close_socket=True)
+
+        dp._send_loop()
+
+        dp.socket.sendall.assert_called_once_with(
+            echo.buf + barrier.buf + hello.buf)
+
+    def test_send_loop_batch_size(self):
+        dp = self._new_datapath_v13()
+        dp.send_batch_size = 1
+        parser = dp.ofproto_parser
+        echo = parser.OFPEchoRequest(dp)
+        hello = parser.OFPHello(dp)
+        dp.send_msg(echo)
+        dp.send_msg(hello, close_socket=True)
+
+        dp._send_loop()
+
+        eq_(dp.socket.sendall.call_args_list,
+            [mock.call(echo.buf), mock.call(hello.buf)])
+
 
 class TestOpenFlowController(unittest.TestCase):
     """
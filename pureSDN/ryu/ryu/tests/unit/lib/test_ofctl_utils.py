@@ -16,13 +16,56 @@
 import logging
 import unittest
 
+from ryu.lib import hub
 from ryu.lib import ofctl_utils
+from ryu.ofproto import ofproto_protocol
 from ryu.ofproto import ofproto_v1_3
 
 
 LOG = logging.getLogger(__name__)
 
 
+class DummyDatapath(ofproto_protocol.ProtocolDesc):
+    # Replies to a flow stats request with one multipart part per entry,
+    # handling the waiters like ofctl_rest.RestStatsApi does.
+
+    def __init__(self, priorities):
+        super(DummyDatapath, self).__init__(ofproto_v1_3.OFP_VERSION)
+        self.id = 1
+        self.priorities = priorities
+        self.waiters = None
+
+    @staticmethod
+    def set_xid(msg):
+        msg.set_xid(0)
+        return 0
+
+    def send_msg(self, msg):
+        hub.spawn(self._reply, msg.xid)
+
+    def _reply(self, xid):
+        for i, priority in enumerate(self.priorities):
+            hub.sleep(0)
+            flags = 0
+            if i < len(self.priorities) - 1:
+                flags = self.ofproto.OFPMPF_REPLY_MORE
+            stats = self.ofproto_parser.OFPFlowStats(
+                table_id=0, duration_sec=0, duration_nsec=0,
+                priority=priority, idle_timeout=0, hard_timeout=0, flags=0,
+                cookie=0, packet_count=0, byte_count=0,
+                match=self.ofproto_parser.OFPMatch(), instructions=[])
+            reply = self.ofproto_parser.OFPFlowStatsReply(
+                self, flags=flags, body=[stats])
+            if xid not in self.waiters[self.id]:
+                return
+            lock, msgs = self.waiters[self.id][xid]
+            msgs.append(reply)
+            if flags:
+                continue
+            del self.waiters[self.id][xid]
+            lock.set()
+
+
 class Test_ofctl_utils(unittest.TestCase):
     # prepare test target
     util = ofctl_utils.OFCtlUtil(ofproto_v1_3)
@@ -140,3 +183,21 @@ class Test_ofctl_utils(unittest.TestCase):
             'ALL',
             self.util.ofp_queue_to_user(ofproto_v1_3.OFPQ_ALL)
         )
+
+    def test_iter_stats(self):
+        dp = DummyDatapath([1, 2, 3])
+        dp.waiters = {}
+        stats = dp.ofproto_parser.OFPFlowStatsRequest(dp)
+        entries = ofctl_utils.iter_stats(dp, stats, dp.waiters)
+        self.assertEqual(
+            [1, 2, 3], [entry.priority for entry in entries])
+        self.assertEqual({}, dp.waiters[dp.id])
+
+    def test_iter_stats_reply_closed(self):
+        dp = DummyDatapath([1, 2, 3])
+        dp.waiters = {}
+        stats = dp.ofproto_parser.OFPFlowStatsRequest(dp)
+        msgs = ofctl_utils.iter_stats_reply(dp, stats, dp.waiters)
+        next(msgs)
+        msgs.close()
+        self.assertEqual({}, dp.waiters[dp.id])
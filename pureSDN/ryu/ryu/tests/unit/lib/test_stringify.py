@@ -17,6 +17,7 @@
 from __future__ import print_function
 
 import base64
+import json
 import six
 import unittest
 from nose.tools import eq_
@@ -32,6 +33,32 @@ class C1(stringify.StringifyMixin):
         self.c = c
 
 
+class C2(stringify.StringifyMixin):
+    _TYPE = {
+        'ascii': [
+            'name',
+        ]
+    }
+    _base_attributes = ['hidden']
+    _opt_attributes = ['prop']
+
+    def __init__(self, name, value, children, ports):
+        self.name = name
+        self.value = value
+        self.children = children
+        self.ports = ports
+        self.hidden = 1
+        self.callback = len
+
+    @property
+    def prop(self):
+        return self.value + 1
+
+    @property
+    def other_prop(self):
+        return self.value + 2
+
+
 class Test_stringify(unittest.TestCase):
     """ Test case for ryu.lib.stringify
     """
@@ -73,3 +100,22 @@ class Test_stringify(unittest.TestCase):
         eq_(c.__class__, c2.__class__)
         eq_(c.__dict__, c2.__dict__)
         eq_(j, c.to_jsondict(encode_string=my_encode))
+
+    def test_obj_python_attrs(self):
+        c = C2(name='n', value=1, children=[], ports={})
+        eq_([('children', []), ('name', 'n'), ('ports', {}), ('prop', 2),
+             ('value', 1)],
+            list(stringify.obj_python_attrs(c)))
+
+    def test_to_json_bytes(self):
+        c = C2(name='n', value=1.5,
+               children=[C1(a=b'AAA', c=None), True, [b'x']],
+               ports={1: C1(a=2, c='CCC'), 'p': 'q'})
+        eq_(json.dumps(c.to_jsondict()).encode('utf-8'), c.to_json_bytes())
+        eq_(json.dumps([c.to_jsondict(), C1(a=1, c=2).to_jsondict()]),
+            stringify.to_json_bytes([c, C1(a=1, c=2)]).decode('utf-8'))
+
+        def my_encode(x):
+            return x.lower()
+        eq_(json.dumps(c.to_jsondict(my_encode)).encode('utf-8'),
+            c.to_json_bytes(my_encode))
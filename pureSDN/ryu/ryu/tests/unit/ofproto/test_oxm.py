@@ -26,12 +26,21 @@ class Test_OXM(unittest.TestCase):
         buf = bytearray()
         ofp.oxm_serialize(n, v, m, buf, 0)
         self.assertEqual(on_wire, buf)
+        # precompiled fast path
+        buf = bytearray()
+        l = ofp.oxm_serialize_user(f, uv, buf, 0)
+        self.assertEqual(len(on_wire), l)
+        self.assertEqual(on_wire, buf)
 
     def _test_decode(self, user, on_wire):
         (n, v, m, l) = ofp.oxm_parse(on_wire, 0)
         self.assertEqual(len(on_wire), l)
         (f, uv) = ofp.oxm_to_user(n, v, m)
         self.assertEqual(user, (f, uv))
+        # precompiled fast path
+        (f, uv, l) = ofp.oxm_parse_user(on_wire, 0)
+        self.assertEqual(len(on_wire), l)
+        self.assertEqual(user, (f, uv))
 
     def _test_encode_header(self, user, on_wire):
         f = user
@@ -75,6 +84,42 @@ class Test_OXM(unittest.TestCase):
         )
         self._test(user, on_wire, 4)
 
+    def test_basic_cidr(self):
+        user = ('ipv4_src', '192.0.2.1/16')
+        on_wire = (
+            b'\x80\x00\x17\x08'
+            b'\xc0\x00\x02\x01'
+            b'\xff\xff\x00\x00'
+        )
+        self._test_encode(user, on_wire)
+
+    def test_basic_mac_mask(self):
+        user = ('eth_dst', ('00:11:22:33:44:55', 'ff:ff:ff:00:00:00'))
+        on_wire = (
+            b'\x80\x00\x07\x0c'
+            b'\x00\x11\x22\x33\x44\x55'
+            b'\xff\xff\xff\x00\x00\x00'
+        )
+        self._test(user, on_wire, 4)
+
+    def test_basic_ipv6_nomask(self):
+        user = ('ipv6_dst', '2001:db8::1')
+        on_wire = (
+            b'\x80\x00\x36\x10'
+            b'\x20\x01\x0d\xb8\x00\x00\x00\x00'
+            b'\x00\x00\x00\x00\x00\x00\x00\x01'
+        )
+        self._test(user, on_wire, 4)
+
+    def test_basic_int3_mask(self):
+        user = ('pbb_isid', (0x123456, 0xffff00))
+        on_wire = (
+            b'\x80\x00\x4b\x06'
+            b'\x12\x34\x56'
+            b'\xff\xff\x00'
+        )
+        self._test(user, on_wire, 4)
+
     def test_exp_nomask(self):
         user = ('_dp_hash', 0x12345678)
         on_wire = (
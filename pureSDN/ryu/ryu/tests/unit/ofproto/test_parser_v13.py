@@ -162,3 +162,36 @@ class TestOFPMatch(unittest.TestCase):
 
     def test_set_vlan_vid_none(self):
         self._test_set_vlan_vid_none()
+
+    def test_parser_old_api_fields(self):
+        match = OFPMatch(in_port=1, eth_type=0x0800,
+                         ipv4_src=('10.0.0.1', '255.255.255.0'))
+        buf = bytearray()
+        match.serialize(buf, 0)
+
+        res = OFPMatch.parser(six.binary_type(buf), 0)
+        eq_(res._fields2, match._fields2)
+        eq_([f.header for f in res.fields],
+            [ofproto.OXM_OF_IN_PORT, ofproto.OXM_OF_ETH_TYPE,
+             ofproto.OXM_OF_IPV4_SRC_W])
+        eq_(res.fields[2].mask, 0xffffff00)
+
+    def test_parser_short_length(self):
+        # The match length ends inside its last field, which is still
+        # parsed from the rest of the buffer by both APIs.
+        match = OFPMatch(in_port=1, eth_type=0x0800)
+        buf = bytearray()
+        match.serialize(buf, 0)
+        pack_into('!H', buf, 2, 14)
+
+        res = OFPMatch.parser(six.binary_type(buf), 0)
+        eq_(res._fields2, match._fields2)
+        eq_([f.header for f in res.fields],
+            [ofproto.OXM_OF_IN_PORT, ofproto.OXM_OF_ETH_TYPE])
+
+    @raises(exception.OFPTruncatedMessage)
+    def test_parser_truncated(self):
+        match = OFPMatch(in_port=1, eth_type=0x0800)
+        buf = bytearray()
+        match.serialize(buf, 0)
+        OFPMatch.parser(six.binary_type(buf[:14]), 0)
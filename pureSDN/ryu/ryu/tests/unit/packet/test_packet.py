@@ -1551,3 +1551,163 @@ class TestPacket(unittest.TestCase):
         ok_(isinstance(pkt.protocols[0], ethernet.ethernet))
         ok_(isinstance(pkt.protocols[1], ipv4.ipv4))
         ok_(isinstance(pkt.protocols[2], udp.udp))
+
+    def test_serialize_grows_buffer(self):
+        # ipv4 options and the payload are longer than the estimate
+        e = ethernet.ethernet(self.dst_mac, self.src_mac, ether.ETH_TYPE_IP)
+        i = ipv4.ipv4(proto=inet.IPPROTO_UDP, src=self.src_ip,
+                      dst=self.dst_ip, option=b'\x01' * 4, header_length=6)
+        u = udp.udp(self.src_port, self.dst_port)
+        p = packet.Packet()
+        for proto in (e, i, u, self.payload * 4):
+            p.add_protocol(proto)
+        p.serialize()
+
+        eq_(14 + 24 + 8 + len(self.payload) * 4, len(p.data))
+        eq_(self.payload * 4, six.binary_type(p.data[46:]))
+        pkt = packet.Packet(p.data)
+        eq_(self.payload * 4, pkt.protocols[-1])
+        eq_(i.csum, pkt.get_protocol(ipv4.ipv4).csum)
+        eq_(u.csum, pkt.get_protocol(udp.udp).csum)
+
+    def _arp_reply(self, dst_mac, dst_ip):
+        return [ethernet.ethernet(dst_mac, self.src_mac, ether.ETH_TYPE_ARP),
+                arp.arp(opcode=arp.ARP_REPLY, src_mac=self.src_mac,
+                        src_ip=self.src_ip, dst_mac=dst_mac, dst_ip=dst_ip)]
+
+    def _icmp_reply(self, dst_ip, seq, data):
+        return [ethernet.ethernet(self.dst_mac, self.src_mac,
+                                  ether.ETH_TYPE_IP),
+                ipv4.ipv4(proto=inet.IPPROTO_ICMP, src=self.src_ip,
+                          dst=dst_ip),
+                icmp.icmp(icmp.ICMP_ECHO_REPLY, 0, 0,
+                          icmp.echo(1, seq, data))]
+
+    def _serialize(self, protocols):
+        p = packet.Packet(protocols=protocols)
+        p.serialize()
+        return p.data
+
+    def test_template_arp(self):
+        t = packet.PacketTemplate(self._arp_reply(self.dst_mac, self.dst_ip))
+        eq_(self._serialize(self._arp_reply(self.dst_mac, self.dst_ip)),
+            t.data)
+        # ethernet padding is kept
+        eq_(60, len(t.data))
+
+        e, a = t.protocols
+        e.dst = a.dst_mac = 'cc:cc:cc:cc:cc:cc'
+        a.dst_ip = '10.0.0.3'
+        data = t.update(e, a)
+        eq_(self._serialize(self._arp_reply('cc:cc:cc:cc:cc:cc', '10.0.0.3')),
+            data)
+
+    def test_template_icmp(self):
+        t = packet.PacketTemplate(
+            self._icmp_reply(self.dst_ip, 1, self.payload))
+        e, i, ic = t.protocols
+
+        # inner-most header only, the checksums are computed again
+        ic.data.seq = 2
+        eq_(self._serialize(self._icmp_reply(self.dst_ip, 2, self.payload)),
+            t.update(ic))
+
+        i.dst = '10.0.0.3'
+        eq_(self._serialize(self._icmp_reply('10.0.0.3', 2, self.payload)),
+            t.update(i))
+
+        # a header changing its length serializes the packet again
+        ic.data.data = self.payload * 2
+        eq_(self._serialize(
+            self._icmp_reply('10.0.0.3', 2, self.payload * 2)),
+            t.update(ic))
+
+    def _transport_reply(self, dst_ip, proto, l4):
+        if ':' in dst_ip:
+            ip = ipv6.ipv6(nxt=proto, src='2001:db8::1', dst=dst_ip)
+            ethertype = ether.ETH_TYPE_IPV6
+        else:
+            ip = ipv4.ipv4(proto=proto, src=self.src_ip, dst=dst_ip)
+            ethertype = ether.ETH_TYPE_IP
+        return [ethernet.ethernet(self.dst_mac, self.src_mac, ethertype),
+                ip, l4(), self.payload]
+
+    def test_template_transport(self):
+        # The tcp, udp and icmpv6 checksums cover the ip pseudo header,
+        # so they are computed again when only the ip header is updated.
+        def _tcp():
+            return tcp.tcp(self.src_port, self.dst_port)
+
+        def _udp():
+            return udp.udp(self.src_port, self.dst_port)
+
+        def _icmpv6():
+            return icmpv6.icmpv6(icmpv6.ICMPV6_ECHO_REPLY, 0, 0,
+                                 icmpv6.echo(1, 1))
+
+        for dst_ip, new_dst, proto, l4 in [
+                (self.dst_ip, '10.0.0.3', inet.IPPROTO_TCP, _tcp),
+                (self.dst_ip, '10.0.0.3', inet.IPPROTO_UDP, _udp),
+                ('2001:db8::2', '2001:db8::3', inet.IPPROTO_TCP, _tcp),
+                ('2001:db8::2', '2001:db8::3', inet.IPPROTO_UDP, _udp),
+                ('2001:db8::2', '2001:db8::3', inet.IPPROTO_ICMPV6,
+                 _icmpv6)]:
+            t = packet.PacketTemplate(
+                self._transport_reply(dst_ip, proto, l4))
+            ip = t.protocols[1]
+            ip.dst = new_dst
+            eq_(self._serialize(self._transport_reply(new_dst, proto, l4)),
+                t.update(ip))
+
+    def _ipv4_tcp_data(self):
+        e = ethernet.ethernet(self.dst_mac, self.src_mac, ether.ETH_TYPE_IP)
+        i = ipv4.ipv4(proto=inet.IPPROTO_TCP, src=self.src_ip,
+                      dst=self.dst_ip)
+        t = tcp.tcp(self.src_port, self.dst_port)
+        return self._serialize([e, i, t, self.payload])
+
+    def test_lazy_packet(self):
+        data = self._ipv4_tcp_data()
+        pkt = packet.LazyPacket(data)
+        eq_(0, len(pkt._protocols))
+
+        i = pkt.get_protocol(ipv4.ipv4)
+        eq_(self.dst_ip, i.dst)
+        eq_(2, len(pkt._protocols))
+        ok_(pkt.get_protocol(ethernet.ethernet))
+        eq_(2, len(pkt._protocols))
+
+        eq_(None, pkt.get_protocol(arp.arp))
+        eq_(str(packet.Packet(data)), str(pkt))
+        eq_(packet.Packet(data).to_jsondict()['Packet'],
+            pkt.to_jsondict()['LazyPacket'])
+
+    def test_lazy_packet_padding(self):
+        p = packet.Packet(protocols=self._arp_reply(self.dst_mac,
+                                                    self.dst_ip))
+        p.serialize()
+        pkt = packet.LazyPacket(p.data)
+        eq_(2, len(pkt))
+        eq_(self.dst_ip, pkt.get_protocol(arp.arp).dst_ip)
+
+    def test_memoryview(self):
+        data = self._ipv4_tcp_data()
+        for pkt in (packet.Packet(memoryview(data)),
+                    packet.LazyPacket(memoryview(data))):
+            eq_(4, len(pkt.protocols))
+            eq_(self.dst_port, pkt.get_protocol(tcp.tcp).dst_port)
+            eq_(self.payload, six.binary_type(pkt.protocols[-1]))
+
+        # trailing padding is ignored
+        data = self._serialize(self._arp_reply(self.dst_mac, self.dst_ip))
+        eq_(2, len(packet.Packet(memoryview(data)).protocols))
+
+    def test_get_packet(self):
+        class _Msg(object):
+            data = self._ipv4_tcp_data()
+
+        msg = _Msg()
+        pkt = packet.get_packet(msg)
+        ok_(isinstance(pkt, packet.LazyPacket))
+        ok_(pkt is packet.get_packet(msg))
+        eq_(self.dst_port, pkt.get_protocol(tcp.tcp).dst_port)
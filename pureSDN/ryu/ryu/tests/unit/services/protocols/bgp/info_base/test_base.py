@@ -0,0 +1,250 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from abc import ABCMeta
+from collections import OrderedDict
+import logging
+import unittest
+try:
+    import mock  # Python 2
+except ImportError:
+    from unittest import mock  # Python 3
+
+from nose.tools import eq_
+from nose.tools import ok_
+from nose.tools import raises
+
+from ryu.lib.packet.bgp import BGPPathAttributeAsPath
+from ryu.lib.packet.bgp import BGPPathAttributeExtendedCommunities
+from ryu.lib.packet.bgp import BGPPathAttributeMultiExitDisc
+from ryu.lib.packet.bgp import BGPPathAttributeNextHop
+from ryu.lib.packet.bgp import BGPPathAttributeOrigin
+from ryu.lib.packet.bgp import BGP_ATTR_TYPE_AS_PATH
+from ryu.lib.packet.bgp import BGP_ATTR_TYPE_EXTENDED_COMMUNITIES
+from ryu.lib.packet.bgp import BGP_ATTR_TYPE_MULTI_EXIT_DISC
+from ryu.lib.packet.bgp import BGP_ATTR_TYPE_NEXT_HOP
+from ryu.lib.packet.bgp import BGP_ATTR_TYPE_ORIGIN
+from ryu.lib.packet.bgp import IPAddrPrefix
+from ryu.lib.packet.bgp import LabelledVPNIPAddrPrefix
+from ryu.services.protocols.bgp.info_base import base
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Table
+from ryu.services.protocols.bgp.info_base.vpnv4 import Vpnv4Path
+from ryu.services.protocols.bgp.info_base.vpnv4 import Vpnv4Table
+from ryu.services.protocols.bgp.model import SentRoute
+from ryu.services.protocols.bgp.utils.bgp import create_rt_extended_community
+
+
+LOG = logging.getLogger(__name__)
+
+
+class Test_PathAttrMap(unittest.TestCase):
+    """
+    Test case for interned path attributes of
+    ryu.services.protocols.bgp.info_base.base
+    """
+
+    def _pattrs(self, med=100):
+        # New attribute instances for each call, as parsed from UPDATEs.
+        pattrs = OrderedDict()
+        pattrs[BGP_ATTR_TYPE_ORIGIN] = BGPPathAttributeOrigin(0)
+        pattrs[BGP_ATTR_TYPE_AS_PATH] = BGPPathAttributeAsPath([[65001]])
+        pattrs[BGP_ATTR_TYPE_NEXT_HOP] = BGPPathAttributeNextHop('192.0.2.1')
+        pattrs[BGP_ATTR_TYPE_MULTI_EXIT_DISC] = \
+            BGPPathAttributeMultiExitDisc(med)
+        return pattrs
+
+    def _path(self, prefix, pattrs):
+        return Ipv4Path(None, IPAddrPrefix(24, prefix), 0, pattrs=pattrs,
+                        nexthop='192.0.2.1')
+
+    def test_intern_pathattrs(self):
+        pattrs = self._pattrs()
+        interned = base.intern_pathattrs(pattrs)
+        ok_(isinstance(interned, base.PathAttrMap))
+        eq_(str(list(pattrs.items())), str(list(interned.items())))
+        ok_(base.intern_pathattrs(self._pattrs()) is interned)
+        ok_(base.intern_pathattrs(interned) is interned)
+
+        # Identical attributes are shared between different sets.
+        other = base.intern_pathattrs(self._pattrs(med=200))
+        ok_(other is not interned)
+        ok_(other[BGP_ATTR_TYPE_AS_PATH] is interned[BGP_ATTR_TYPE_AS_PATH])
+        eq_(200, other[BGP_ATTR_TYPE_MULTI_EXIT_DISC].value)
+
+    @raises(TypeError)
+    def test_path_attr_map_read_only(self):
+        interned = base.intern_pathattrs(self._pattrs())
+        interned[BGP_ATTR_TYPE_MULTI_EXIT_DISC] = \
+            BGPPathAttributeMultiExitDisc(0)
+
+    def test_metaclass(self):
+        ok_(isinstance(base.Path, ABCMeta))
+        eq_(type(OrderedDict), type(base.PathAttrMap))
+
+    def test_path_shares_pathattrs(self):
+        path1 = self._path('10.0.0.0', self._pattrs())
+        path2 = self._path('10.0.1.0', self._pattrs())
+        ok_(path1.frozen_pathattr_map is path2.frozen_pathattr_map)
+        ok_(path1.clone().frozen_pathattr_map is path1.frozen_pathattr_map)
+        eq_(0, len(path1.clone(for_withdrawal=True).frozen_pathattr_map))
+
+        # pathattr_map is still a copy which callers may modify.
+        pattrs = path1.pathattr_map
+        eq_(OrderedDict, type(pattrs))
+        del pattrs[BGP_ATTR_TYPE_MULTI_EXIT_DISC]
+        eq_(4, len(path1.frozen_pathattr_map))
+        eq_(str(pattrs), str(OrderedDict(
+            (k, v) for k, v in path1.frozen_pathattr_map.items()
+            if k != BGP_ATTR_TYPE_MULTI_EXIT_DISC)))
+
+    def test_slots(self):
+        table = Ipv4Table(mock.MagicMock(), mock.MagicMock())
+        path = self._path('10.0.0.0', self._pattrs())
+        dest = table.insert(path)
+        peer = mock.MagicMock()
+        for obj in (path, dest, SentRoute(path, peer)):
+            ok_(not hasattr(obj, '__dict__'), obj.__class__)
+
+    def test_memory_usage(self):
+        table = Ipv4Table(mock.MagicMock(), mock.MagicMock())
+        eq_(0, len(list(table.values())))
+        empty = table.memory_usage()
+        for i in range(10):
+            dest = table.insert(self._path('10.0.%d.0' % i, self._pattrs()))
+            dest._known_path_list.extend(dest._new_path_list)
+        seen = set()
+        size = table.memory_usage(seen)
+        ok_(size > empty)
+        # Everything is counted only once.
+        eq_(0, table.memory_usage(seen))
+
+        # Shared path attributes are counted for the first path only.
+        dest = table.insert(self._path('10.0.10.0', self._pattrs()))
+        dest._known_path_list.extend(dest._new_path_list)
+        path = dest._known_path_list[0]
+        new = set()
+        size = sum(base._sizeof(obj, new) for obj in (
+            dest, dest.nlri, dest._known_path_list, dest._new_path_list,
+            dest._withdraw_list, dest._sent_routes, path, path.nlri))
+        eq_(size, table.memory_usage(seen))
+
+
+class Test_TableIndexes(unittest.TestCase):
+    """
+    Test case for the per-source and per-RT destination indexes of
+    ryu.services.protocols.bgp.info_base.base.Table
+    """
+
+    def setUp(self):
+        self.signal_bus = mock.MagicMock()
+        self.peer1 = mock.MagicMock(version_num=1)
+        self.peer2 = mock.MagicMock(version_num=1)
+
+    def _pattrs(self, rts=()):
+        pattrs = OrderedDict()
+        pattrs[BGP_ATTR_TYPE_ORIGIN] = BGPPathAttributeOrigin(0)
+        pattrs[BGP_ATTR_TYPE_AS_PATH] = BGPPathAttributeAsPath([[65001]])
+        if rts:
+            pattrs[BGP_ATTR_TYPE_EXTENDED_COMMUNITIES] = \
+                BGPPathAttributeExtendedCommunities(
+                    [create_rt_extended_community(rt) for rt in rts])
+        return pattrs
+
+    def _insert(self, table, path):
+        dest = table.insert(path)
+        dest._known_path_list.extend(dest._new_path_list)
+        dest._new_path_list = []
+        return dest
+
+    def _ipv4_table(self):
+        table = Ipv4Table(mock.MagicMock(), self.signal_bus)
+        for i in range(10):
+            self._insert(table, Ipv4Path(
+                self.peer1, IPAddrPrefix(24, '10.0.%d.0' % i), 1,
+                pattrs=self._pattrs(), nexthop='192.0.2.1'))
+        for i in range(2):
+            self._insert(table, Ipv4Path(
+                self.peer2, IPAddrPrefix(24, '10.1.%d.0' % i), 1,
+                pattrs=self._pattrs(), nexthop='192.0.2.2'))
+        return table
+
+    def test_cleanup_paths_for_peer(self):
+        table = self._ipv4_table()
+        dest = list(table.values())[0]
+        table.insert_sent_route(SentRoute(dest._known_path_list[0],
+                                          self.peer2))
+        self.peer2.version_num = 2
+        with mock.patch.object(base.Destination, 'remove_sent_route',
+                               autospec=True) as remove_sent_route:
+            table.cleanup_paths_for_peer(self.peer2)
+        # Only destinations with paths from or sent to the peer are visited.
+        eq_(3, remove_sent_route.call_count)
+        eq_(2, self.signal_bus.dest_changed.call_count)
+        ok_(self.peer2 not in table._dests_by_source)
+        eq_(10, len(table._dests_by_source[self.peer1]))
+
+    def test_cleanup_keeps_current_paths(self):
+        table = self._ipv4_table()
+        self.peer1.version_num = 2
+        dest = table.insert(Ipv4Path(
+            self.peer1, IPAddrPrefix(24, '10.0.0.0'), 2,
+            pattrs=self._pattrs(), nexthop='192.0.2.1'))
+        table.cleanup_paths_for_peer(self.peer1)
+        eq_(10, self.signal_bus.dest_changed.call_count)
+        eq_([], dest._known_path_list)
+        eq_(set(['10.0.0.0/24']), table._dests_by_source[self.peer1])
+
+    def test_clean_uninteresting_paths(self):
+        table = Vpnv4Table(mock.MagicMock(), self.signal_bus)
+        for i, rts in enumerate([['65000:1']] * 5 + [['65000:2']] * 3 +
+                                [['65000:1', '65000:2'], []]):
+            nlri = LabelledVPNIPAddrPrefix(24, '10.0.%d.0' % i,
+                                           route_dist='65000:1',
+                                           labels=[100])
+            self._insert(table, Vpnv4Path(self.peer1, nlri, 1,
+                                          pattrs=self._pattrs(rts),
+                                          nexthop='192.0.2.1'))
+        with mock.patch.object(base.Destination, 'withdraw_path',
+                               autospec=True) as withdraw_path:
+            eq_(4, table.clean_uninteresting_paths(set(['65000:1'])))
+        eq_(set(['65000:1:10.0.%d.0/24' % i for i in (5, 6, 7, 9)]),
+            set(table._table_key(args[1].nlri)
+                for args, _ in withdraw_path.call_args_list))
+        eq_(4, self.signal_bus.dest_changed.call_count)
+
+    def test_has_withdrawals(self):
+        table = self._ipv4_table()
+        dest = list(table.values())[0]
+        path = dest._known_path_list[0]
+        ok_(not dest.has_withdrawals())
+        dest._best_path = path
+        ok_(not dest.has_withdrawals())
+        dest.withdraw_path(path)
+        ok_(dest.has_withdrawals())
+        # Best path removed on peer down
+        dest._withdraw_list = []
+        dest._known_path_list = []
+        ok_(dest.has_withdrawals())
+
+    def test_prune_indexes(self):
+        table = self._ipv4_table()
+        with mock.patch.object(base, 'MIN_INDEX_PRUNE_COUNT', 0):
+            # Pruned once more destinations are deleted than remain.
+            for dest in list(table.values())[:7]:
+                table.delete_dest(dest)
+        eq_(3, len(table._dests_by_source[self.peer1]))
+        eq_(2, len(table._dests_by_source[self.peer2]))
+        eq_(0, table._deleted_dest_count)
@@ -0,0 +1,239 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict
+import logging
+import random
+import unittest
+try:
+    import mock  # Python 2
+except ImportError:
+    from unittest import mock  # Python 3
+
+from nose.tools import eq_
+from nose.tools import ok_
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp import processor
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Path
+from ryu.services.protocols.bgp.info_base.ipv4 import Ipv4Table
+
+
+LOG = logging.getLogger(__name__)
+
+LOCAL_ASN = 65000
+
+
+class Test_BgpProcessor(unittest.TestCase):
+    """
+    Test case for the queues of processor.BgpProcessor
+    """
+
+    def setUp(self):
+        self.core_service = mock.MagicMock()
+        self.processor = processor.BgpProcessor(self.core_service)
+        self.processed = []
+
+    def _dest(self, name, route_family=bgp.RF_IPv4_UC, withdrawals=False):
+        dest = mock.MagicMock(route_family=route_family)
+        dest.has_withdrawals.return_value = withdrawals
+        dest.process.side_effect = lambda: self.processed.append(name)
+        return dest
+
+    def _cycle(self):
+        self.processor._process_rtdest()
+        self.processor._process_dest()
+
+    def test_priority(self):
+        for dest in (self._dest('dest'),
+                     self._dest('withdraw', withdrawals=True),
+                     self._dest('rtdest', route_family=bgp.RF_RTC_UC)):
+            self.processor.enqueue(dest)
+        self._cycle()
+        eq_(['rtdest', 'withdraw', 'dest'], self.processed)
+        eq_(1, self.core_service.update_rtfilters.call_count)
+
+    def test_coalesce(self):
+        dest = self._dest('dest')
+        for _ in range(3):
+            self.processor.enqueue(dest)
+        self._cycle()
+        eq_(['dest'], self.processed)
+        stats = self.processor.get_stats()
+        eq_(3, stats['enqueued'])
+        eq_(2, stats['coalesced'])
+        eq_(1, stats['processed'])
+
+    def test_move_to_withdraw_queue(self):
+        first = self._dest('first')
+        dest = self._dest('dest')
+        self.processor.enqueue(first)
+        self.processor.enqueue(dest)
+        queued = self.processor._dest_queue[id(dest)]
+        dest.has_withdrawals.return_value = True
+        self.processor.enqueue(dest)
+        # Stays in the withdrawal queue, which is processed first.
+        dest.has_withdrawals.return_value = False
+        self.processor.enqueue(dest)
+        eq_(queued, self.processor._withdraw_queue[id(dest)])
+        self._cycle()
+        eq_(['dest', 'first'], self.processed)
+
+    def test_fair_share(self):
+        self.processor.work_units_per_cycle = 100
+        for _ in range(200):
+            self.processor.enqueue(self._dest('withdraw', withdrawals=True))
+            self.processor.enqueue(self._dest('dest'))
+        self._cycle()
+        eq_(75, self.processed.count('withdraw'))
+        eq_(25, self.processed.count('dest'))
+
+        # Without other destinations, whole cycles go to withdrawals.
+        self.processor._dest_queue.clear()
+        del self.processed[:]
+        self._cycle()
+        eq_(['withdraw'] * 100, self.processed)
+
+    def test_real_destination(self):
+        # Destinations compare equal by str() but are not hashable.
+        table = Ipv4Table(self.core_service, mock.MagicMock())
+        pattrs = OrderedDict()
+        pattrs[bgp.BGP_ATTR_TYPE_ORIGIN] = bgp.BGPPathAttributeOrigin(
+            bgp.BGP_ATTR_ORIGIN_IGP)
+        pattrs[bgp.BGP_ATTR_TYPE_AS_PATH] = bgp.BGPPathAttributeAsPath(
+            [[65100]])
+        dests = []
+        for prefix in ('10.0.0.0', '10.0.1.0'):
+            path = Ipv4Path(None, bgp.IPAddrPrefix(24, prefix), 1,
+                            pattrs=pattrs, nexthop='192.0.2.1')
+            dests.append(table.insert(path))
+        for dest in dests + dests:
+            self.processor.enqueue(dest)
+        eq_(2, self.processor.get_stats()['dest_queue'])
+        self._cycle()
+        stats = self.processor.get_stats()
+        eq_(0, stats['dest_queue'])
+        eq_(2, stats['processed'])
+        for dest in dests:
+            ok_(dest.best_path is not None)
+
+    def test_get_stats(self):
+        self.processor.enqueue(self._dest('withdraw', withdrawals=True))
+        self.processor.enqueue(self._dest('dest'))
+        stats = self.processor.get_stats()
+        eq_(0, stats['rtdest_queue'])
+        eq_(1, stats['withdraw_queue'])
+        eq_(1, stats['dest_queue'])
+        eq_(0.0, stats['latency_avg'])
+        self._cycle()
+        stats = self.processor.get_stats()
+        eq_(0, stats['dest_queue'])
+        eq_(2, stats['processed'])
+        ok_(0 <= stats['latency_avg'] <= stats['latency_max'])
+
+
+class Test_select_best_path(unittest.TestCase):
+    """
+    Test case for processor.select_best_path
+    """
+
+    def setUp(self):
+        self.random = random.Random(1)
+        self.sources = [None]
+        for i, asn in enumerate([65001, 65002, LOCAL_ASN, LOCAL_ASN]):
+            peer = mock.MagicMock(version_num=1, remote_as=asn)
+            peer.protocol.recv_open_msg.bgp_identifier = '10.0.0.%d' % (
+                4 - i)
+            self.sources.append(peer)
+
+    def _path(self, source, local_pref):
+        rand = self.random
+        pattrs = OrderedDict()
+        pattrs[bgp.BGP_ATTR_TYPE_ORIGIN] = bgp.BGPPathAttributeOrigin(
+            rand.choice([bgp.BGP_ATTR_ORIGIN_IGP, bgp.BGP_ATTR_ORIGIN_EGP,
+                         bgp.BGP_ATTR_ORIGIN_INCOMPLETE]))
+        pattrs[bgp.BGP_ATTR_TYPE_AS_PATH] = bgp.BGPPathAttributeAsPath(
+            [[65100] * rand.randint(1, 2)])
+        if local_pref:
+            pattrs[bgp.BGP_ATTR_TYPE_LOCAL_PREF] = \
+                bgp.BGPPathAttributeLocalPref(rand.choice([100, 200]))
+        if rand.random() < 0.5:
+            pattrs[bgp.BGP_ATTR_TYPE_MULTI_EXIT_DISC] = \
+                bgp.BGPPathAttributeMultiExitDisc(rand.randint(0, 1))
+        if rand.random() < 0.3:
+            pattrs[bgp.BGP_ATTR_TYPE_ORIGINATOR_ID] = \
+                bgp.BGPPathAttributeOriginatorId('10.0.1.%d' % rand.randint(
+                    1, 2))
+        if rand.random() < 0.3:
+            pattrs[bgp.BGP_ATTR_TYPE_CLUSTER_LIST] = \
+                bgp.BGPPathAttributeClusterList(
+                    ['10.0.2.1'] * rand.randint(1, 2))
+        return Ipv4Path(source, bgp.IPAddrPrefix(24, '10.0.0.0'), 1,
+                        pattrs=pattrs, nexthop='192.0.2.1')
+
+    @staticmethod
+    def _compute_best_path(paths):
+        # Pairwise comparison in order, as done before decision keys.
+        best_path, reason = paths[0], processor.BPR_ONLY_PATH
+        for path in paths[1:]:
+            new_best_path, reason = processor.compute_best_path(
+                LOCAL_ASN, best_path, path)
+            if new_best_path is not None:
+                best_path = new_best_path
+        return best_path, reason
+
+    def test_same_as_compute_best_path(self):
+        for _ in range(1000):
+            # All, none or some of the paths have LOCAL_PREF.
+            local_pref = self.random.choice([True, False, None])
+            sources = self.random.sample(self.sources,
+                                         self.random.randint(1, 4))
+            paths = [self._path(source, local_pref if local_pref is not None
+                                else self.random.random() < 0.5)
+                     for source in sources]
+            best_path, reason = processor.select_best_path(LOCAL_ASN, paths)
+            expected_path, expected_reason = self._compute_best_path(paths)
+            ok_(best_path is expected_path)
+            if len(paths) <= 2:
+                eq_(expected_reason, reason)
+
+    def test_mixed_local_pref(self):
+        # Only some paths have LOCAL_PREF: A is preferred over B by
+        # LOCAL_PREF and over E by AS path length, B over E by AS path
+        # length, as when compared pairwise in order.
+        paths = []
+        for source, local_pref, as_path_len in ((self.sources[3], 200, 3),
+                                                (self.sources[4], 100, 1),
+                                                (self.sources[1], None, 2)):
+            pattrs = OrderedDict()
+            pattrs[bgp.BGP_ATTR_TYPE_ORIGIN] = bgp.BGPPathAttributeOrigin(
+                bgp.BGP_ATTR_ORIGIN_IGP)
+            pattrs[bgp.BGP_ATTR_TYPE_AS_PATH] = bgp.BGPPathAttributeAsPath(
+                [[65100] * as_path_len])
+            if local_pref is not None:
+                pattrs[bgp.BGP_ATTR_TYPE_LOCAL_PREF] = \
+                    bgp.BGPPathAttributeLocalPref(local_pref)
+            paths.append(Ipv4Path(source, bgp.IPAddrPrefix(24, '10.0.0.0'),
+                                  1, pattrs=pattrs, nexthop='192.0.2.1'))
+        eq_(self._compute_best_path(paths),
+            processor.select_best_path(LOCAL_ASN, paths))
+        eq_((paths[2], processor.BPR_ASPATH),
+            processor.select_best_path(LOCAL_ASN, paths))
+
+    def test_decision_key_cached(self):
+        path = self._path(self.sources[1], local_pref=True)
+        key = path.get_decision_key(LOCAL_ASN)
+        eq_(processor.decision_key(LOCAL_ASN, path), key)
+        ok_(path.get_decision_key(LOCAL_ASN) is key)
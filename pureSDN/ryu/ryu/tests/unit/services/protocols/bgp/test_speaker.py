@@ -0,0 +1,222 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import socket
+import unittest
+try:
+    import mock  # Python 2
+except ImportError:
+    from unittest import mock  # Python 3
+
+from nose.tools import eq_
+from nose.tools import ok_
+
+from ryu.lib.packet import bgp
+from ryu.services.protocols.bgp import speaker
+
+
+LOG = logging.getLogger(__name__)
+
+
+class Test_BgpProtocol(unittest.TestCase):
+    """
+    Test case for speaker.BgpProtocol
+    """
+
+    def setUp(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        self.writer = socket.create_connection(server.getsockname())
+        self.reader, _ = server.accept()
+        server.close()
+        self.proto = speaker.BgpProtocol(self.reader, None)
+        self.msgs = []
+        self.proto._handle_msg = self.msgs.append
+        self.proto.connection_lost = mock.MagicMock()
+
+        attrs = [bgp.BGPPathAttributeOrigin(0),
+                 bgp.BGPPathAttributeAsPath([[65001]]),
+                 bgp.BGPPathAttributeNextHop('192.0.2.1')]
+        self.data = b''
+        for i in range(100):
+            nlri = [bgp.IPAddrPrefix(24, '10.0.%d.0' % i)]
+            self.data += bgp.BGPUpdate(path_attributes=attrs,
+                                       nlri=nlri).serialize()
+        self.data += bgp.BGPKeepAlive().serialize()
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+
+    def _check_msgs(self):
+        eq_(101, len(self.msgs))
+        eq_(['10.0.%d.0/24' % i for i in range(100)],
+            [msg.nlri[0].prefix for msg in self.msgs[:100]])
+        eq_(bgp.BGPKeepAlive, self.msgs[100].__class__)
+        eq_(self.proto._recv_start, self.proto._recv_end)
+
+    def test_data_received_split(self):
+        # Feed the stream in pieces which split headers and messages.
+        for i in range(0, len(self.data), 7):
+            self.proto.data_received(self.data[i:i + 7])
+        self._check_msgs()
+
+    def test_data_received_large(self):
+        # More data than fits in the initial buffer at once.
+        data = self.data * (speaker.BGP_RECV_BUFFER_SIZE // len(self.data))
+        self.proto.data_received(data + self.data)
+        eq_(len(data) // len(self.data) * 101 + 101, len(self.msgs))
+        del self.msgs[:-101]
+        self._check_msgs()
+
+    def test_recv_loop(self):
+        self.writer.sendall(self.data)
+        self.writer.close()
+        self.proto._recv_loop()
+        self._check_msgs()
+        self.proto.connection_lost.assert_called_once_with(
+            'Peer closed connection')
+
+    def test_data_received_bad_marker(self):
+        self.proto.send_notification = mock.MagicMock()
+        data = b'\x00' * 16 + self.data[16:]
+        self.assertRaises(bgp.NotSync, self.proto.data_received, data)
+        self.proto.send_notification.assert_called_once_with(
+            bgp.NotSync.CODE, bgp.NotSync.SUB_CODE)
+
+
+class Test_UpdatePacker(unittest.TestCase):
+    """
+    Test case for speaker.UpdatePacker
+    """
+
+    def setUp(self):
+        self.packer = speaker.UpdatePacker()
+        self.attrs = [bgp.BGPPathAttributeOrigin(0),
+                      bgp.BGPPathAttributeAsPath([[65001]]),
+                      bgp.BGPPathAttributeNextHop('192.0.2.1')]
+
+    def _ipv4(self, i, attrs=None):
+        return bgp.BGPUpdate(
+            path_attributes=attrs or self.attrs,
+            nlri=[bgp.IPAddrPrefix(24, '10.%d.%d.0' % (i // 256, i % 256))])
+
+    def _ipv6(self, i):
+        prefix = bgp.IP6AddrPrefix(64, '2001:db8:%x::' % i)
+        mp_reach = bgp.BGPPathAttributeMpReachNLRI(
+            afi=bgp.addr_family.IP6, safi=bgp.subaddr_family.UNICAST,
+            next_hop='2001:db8::1', nlri=[prefix])
+        return bgp.BGPUpdate(path_attributes=[mp_reach] + self.attrs[:2])
+
+    def _ipv6_withdraw(self, i):
+        prefix = bgp.IP6AddrPrefix(64, '2001:db8:%x::' % i)
+        mp_unreach = bgp.BGPPathAttributeMpUnreachNLRI(
+            afi=bgp.addr_family.IP6, safi=bgp.subaddr_family.UNICAST,
+            withdrawn_routes=[prefix])
+        return bgp.BGPUpdate(path_attributes=[mp_unreach])
+
+    def _add(self, updates):
+        msgs = []
+        for update in updates:
+            msgs.extend(self.packer.add(update))
+        return msgs
+
+    @staticmethod
+    def _parse(msgs):
+        # Returns the messages as received by the peer.
+        parsed = []
+        for msg in msgs:
+            buf = msg.serialize()
+            ok_(len(buf) <= speaker.BGP_MAX_MSG_LEN)
+            parsed.append(bgp.BGPMessage.parser(buf)[0])
+        return parsed
+
+    def test_pack_nlri(self):
+        msgs = self._add(self._ipv4(i) for i in range(2500))
+        eq_(2, len(msgs))
+        eq_(2500 - sum(len(msg.nlri) for msg in msgs), len(self.packer))
+        ok_(self.packer.pending_since is not None)
+        msgs += self.packer.flush()
+        eq_(0, len(self.packer))
+        eq_(None, self.packer.pending_since)
+
+        msgs = self._parse(msgs)
+        eq_(3, len(msgs))
+        eq_(['10.%d.%d.0/24' % (i // 256, i % 256) for i in range(2500)],
+            [n.prefix for msg in msgs for n in msg.nlri])
+        for msg in msgs:
+            eq_(str(self.attrs), str(msg.path_attributes))
+
+    def test_pack_path_attributes(self):
+        other_attrs = [bgp.BGPPathAttributeOrigin(0),
+                       bgp.BGPPathAttributeAsPath([[65002]]),
+                       bgp.BGPPathAttributeNextHop('192.0.2.2')]
+        msgs = self._add([self._ipv4(0), self._ipv4(1, other_attrs),
+                          self._ipv4(2), self._ipv4(3, other_attrs)])
+        msgs = self._parse(msgs + self.packer.flush())
+        eq_(2, len(msgs))
+        eq_(['10.0.0.0/24', '10.0.2.0/24'],
+            [n.prefix for n in msgs[0].nlri])
+        eq_(['10.0.1.0/24', '10.0.3.0/24'],
+            [n.prefix for n in msgs[1].nlri])
+        eq_(65002, msgs[1].get_path_attr(bgp.BGP_ATTR_TYPE_AS_PATH).value[0][0])
+
+    def test_pack_withdrawn_routes(self):
+        withdraw = [bgp.BGPUpdate(withdrawn_routes=self._ipv4(i).nlri)
+                    for i in range(10)]
+        msgs = self._parse(self._add(withdraw) + self.packer.flush())
+        eq_(1, len(msgs))
+        eq_(10, len(msgs[0].withdrawn_routes))
+
+    def test_pack_mp_nlri(self):
+        first = self._ipv6(1)
+        msgs = self._add([first] + [self._ipv6(i) for i in range(2, 501)])
+        msgs += self._add(self._ipv6_withdraw(i) for i in range(501, 1001))
+        msgs = self._parse(msgs + self.packer.flush())
+
+        reach = [msg.get_path_attr(bgp.BGP_ATTR_TYPE_MP_REACH_NLRI) for msg in msgs]
+        unreach = [msg.get_path_attr(bgp.BGP_ATTR_TYPE_MP_UNREACH_NLRI) for msg in msgs]
+        eq_(['2001:db8:%x::/64' % i for i in range(1, 501)],
+            [n.prefix for attr in reach if attr for n in attr.nlri])
+        eq_(['2001:db8:%x::/64' % i for i in range(501, 1001)],
+            [n.prefix for attr in unreach if attr
+             for n in attr.withdrawn_routes])
+        eq_(len(msgs), 4)
+        for attr in reach:
+            if attr:
+                eq_('2001:db8::1', attr.next_hop)
+        # The original messages are left as they were.
+        eq_(1, len(first.get_path_attr(
+            bgp.BGP_ATTR_TYPE_MP_REACH_NLRI).nlri))
+
+    def test_same_prefix(self):
+        withdraw = bgp.BGPUpdate(withdrawn_routes=self._ipv4(0).nlri)
+        msgs = self._add([self._ipv4(0), self._ipv4(1), withdraw])
+        eq_(1, len(self.packer))
+        msgs = self._parse(msgs + self.packer.flush())
+        eq_(2, len(msgs))
+        eq_(2, len(msgs[0].nlri))
+        eq_(['10.0.0.0/24'], [n.prefix for n in msgs[1].withdrawn_routes])
+
+    def test_end_of_rib(self):
+        eor = bgp.BGPUpdate()
+        self._add([self._ipv4(0), self._ipv4(1)])
+        msgs = self.packer.add(eor)
+        eq_(2, len(msgs))
+        eq_(2, len(msgs[0].nlri))
+        ok_(msgs[1] is eor)
+        eq_(0, len(self.packer))
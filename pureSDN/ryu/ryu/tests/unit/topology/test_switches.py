@@ -0,0 +1,281 @@
+# Copyright (C) 2026 Computer Networks Group @ UPB
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import deque
+import time
+import unittest
+try:
+    import mock  # Python 2
+except ImportError:
+    from unittest import mock  # Python 3
+
+from nose.tools import eq_
+from nose.tools import ok_
+
+from ryu import cfg
+from ryu.base import app_manager
+from ryu.controller.handler import DEAD_DISPATCHER
+from ryu.controller.handler import MAIN_DISPATCHER
+from ryu.ofproto import ofproto_v1_3
+from ryu.ofproto import ofproto_v1_3_parser
+from ryu.topology import event
+from ryu.topology import switches
+
+
+def _switches():
+    # ryu/tests/unit/cmd/test_manager.py reloads app_manager, after which
+    # RyuApp.__init__ refers to a new RyuApp class Switches does not
+    # derive from. Construct it against the RyuApp it was defined with.
+    with mock.patch.object(app_manager, 'RyuApp',
+                           switches.Switches.__bases__[0]):
+        with mock.patch.object(switches.hub, 'spawn'):
+            return switches.Switches()
+
+
+class _SwitchesTestBase(unittest.TestCase):
+    # Two datapaths 1 and 2 whose ports with the same number are linked.
+
+    def setUp(self):
+        cfg.CONF.set_override('observe_links', True)
+        self.addCleanup(cfg.CONF.clear_override, 'observe_links')
+        self.switches = _switches()
+        self.switches.explicit_drop = False
+        self.dps = {}
+        for dpid in (1, 2):
+            dp = mock.MagicMock(id=dpid, ofproto=ofproto_v1_3,
+                                ofproto_parser=ofproto_v1_3_parser)
+            dp.ports = {}
+            for port_no in range(1, self.PORTS + 1):
+                dp.ports[port_no] = ofproto_v1_3_parser.OFPPort(
+                    port_no, '00:00:00:00:%02x:%02x' % (dpid, port_no),
+                    b'eth%d' % port_no, 0, 0, 0, 0, 0, 0, 0, 0)
+            self.dps[dpid] = dp
+            self.state_change(dpid, MAIN_DISPATCHER)
+
+    def state_change(self, dpid, state):
+        self.switches.state_change_handler(
+            mock.MagicMock(datapath=self.dps[dpid], state=state))
+
+    def port(self, dpid, port_no=1):
+        return self.switches._get_port(dpid, port_no)
+
+    def port_data(self, dpid, port_no=1):
+        return self.switches.ports[self.port(dpid, port_no)]
+
+    def send(self, dpid, port_no=1):
+        self.switches.ports.lldp_sent(self.port(dpid, port_no))
+
+    def receive(self, src_dpid, port_no=1):
+        # The probe sent out of port_no of src_dpid arrives at the other
+        # datapath.
+        dst_dp = self.dps[3 - src_dpid]
+        msg = mock.MagicMock(datapath=dst_dp, match={'in_port': port_no})
+        msg.data = self.port_data(src_dpid, port_no).lldp_data
+        self.switches.lldp_packet_in_handler(mock.MagicMock(msg=msg))
+
+    def probe_round(self):
+        self.send(1)
+        self.send(2)
+        self.receive(1)
+        self.receive(2)
+
+
+class Test_send_lldp_packets(_SwitchesTestBase):
+    """
+    Test case for the rate limiting of switches.Switches.send_lldp_packets
+    """
+    PORTS = 3
+
+    @mock.patch.object(switches.hub, 'sleep')
+    def test_rate_limit(self, sleep):
+        self.switches.lldp_send_rate = 40   # bursts of 2 packets
+        ports = list(self.switches.ports.keys())
+        eq_(6, len(ports))
+        self.switches.send_lldp_packets(ports)
+
+        writes = [len(call[0][0]) for dp in self.dps.values()
+                  for call in dp.send_msgs.call_args_list]
+        eq_(6, sum(writes))
+        ok_(max(writes) <= 2)
+        # 3 bursts, spaced out by the time to send 2 packets.
+        eq_(2, sleep.call_count)
+        for i, call in enumerate(sleep.call_args_list):
+            self.assertAlmostEqual(0.05 * (i + 1), call[0][0], places=2)
+
+        for port in ports:
+            eq_(1, self.switches.ports[port].lldp_dropped())
+
+
+class Test_lldp_backoff(_SwitchesTestBase):
+    """
+    Test case for the LLDP send period backoff of switches.Switches
+    """
+    PORTS = 1
+
+    def test_backoff(self):
+        base = self.switches.LLDP_SEND_PERIOD_PER_PORT
+        period_max = self.switches.LLDP_SEND_PERIOD_MAX
+
+        # The link is discovered in both directions.
+        self.probe_round()
+        eq_(2, len(self.switches.links))
+        eq_(None, self.port_data(1).period)
+        eq_(None, self.port_data(2).period)
+
+        # Stable in both directions, both ports back off.
+        self.probe_round()
+        ok_(self.port_data(1).period > base)
+        ok_(self.port_data(2).period > base)
+
+        for _ in range(5):
+            self.probe_round()
+        eq_(period_max, self.port_data(1).period)
+        eq_(period_max, self.port_data(2).period)
+
+    def test_no_backoff_with_unanswered_probe(self):
+        self.probe_round()
+        self.probe_round()
+        period = self.port_data(2).period
+        self.port_data(2).period = None
+        # The probe of port 2 is lost, only port 1 backs off.
+        self.send(1)
+        self.send(2)
+        self.receive(1)
+        ok_(self.port_data(1).period > period)
+        eq_(None, self.port_data(2).period)
+
+    def test_reset_on_loss(self):
+        for _ in range(5):
+            self.probe_round()
+        ok_(self.port_data(1).period is not None)
+
+        # A probe is lost, the next one is sent at the base period.
+        self.send(1)
+        self.send(1)
+        eq_(None, self.port_data(1).period)
+        eq_(2, self.port_data(1).lldp_dropped())
+
+    def test_lldp_loop_resends_unanswered(self):
+        for _ in range(5):
+            self.probe_round()
+        base = self.switches.LLDP_SEND_PERIOD_PER_PORT
+        now = time.time()
+        # Both were probed after the base period, only the probe of
+        # port 1 is unanswered.
+        for dpid in (1, 2):
+            self.port_data(dpid).timestamp = now - base - 0.1
+        self.port_data(1).sent = 1
+
+        def wait(timeout):
+            self.switches.is_active = False
+        self.switches.lldp_event = mock.MagicMock()
+        self.switches.lldp_event.wait.side_effect = wait
+        with mock.patch.object(self.switches, 'send_lldp_packets') as send:
+            self.switches.lldp_loop()
+        send.assert_called_once_with([self.port(1)])
+
+
+class Test_topology_changes(_SwitchesTestBase):
+    """
+    Test case for the topology versions and changes of switches.Switches
+    """
+    PORTS = 1
+
+    def test_switch_enter(self):
+        eq_(2, self.switches.topology_version)
+        changes = self.switches.get_topology_changes(0)
+        eq_([event.EventSwitchEnter] * 2, [ev.__class__ for ev in changes])
+        eq_([1, 2], [ev.switch.dp.id for ev in changes])
+        eq_(changes[1:], self.switches.get_topology_changes(1))
+        eq_([], self.switches.get_topology_changes(2))
+
+    def test_link_add_delete(self):
+        version = self.switches.topology_version
+        self.probe_round()
+        eq_(version + 2, self.switches.topology_version)
+        changes = self.switches.get_topology_changes(version)
+        eq_([event.EventLinkAdd] * 2, [ev.__class__ for ev in changes])
+        eq_(set([(1, 2), (2, 1)]),
+            set((ev.link.src.dpid, ev.link.dst.dpid) for ev in changes))
+
+        # Links seen again are no change.
+        self.probe_round()
+        eq_(version + 2, self.switches.topology_version)
+
+        self.switches._link_down(self.port(1))
+        eq_(version + 4, self.switches.topology_version)
+        changes = self.switches.get_topology_changes(version + 2)
+        eq_([event.EventLinkDelete] * 2, [ev.__class__ for ev in changes])
+        eq_(set([(1, 2), (2, 1)]),
+            set((ev.link.src.dpid, ev.link.dst.dpid) for ev in changes))
+
+    def test_switch_leave(self):
+        self.probe_round()
+        version = self.switches.topology_version
+        self.state_change(2, DEAD_DISPATCHER)
+        changes = self.switches.get_topology_changes(version)
+        eq_(event.EventSwitchLeave, changes[0].__class__)
+        eq_(2, changes[0].switch.dp.id)
+        eq_([event.EventLinkDelete] * 2, [ev.__class__ for ev in changes[1:]])
+        eq_(version + len(changes), self.switches.topology_version)
+
+    def test_changes_not_kept(self):
+        self.switches._topology_changes = deque(maxlen=2)
+        version = self.switches.topology_version
+        self.probe_round()
+        self.switches._link_down(self.port(1))
+        eq_(None, self.switches.get_topology_changes(version))
+        eq_(None, self.switches.get_topology_changes(version + 1))
+        eq_([event.EventLinkDelete] * 2,
+            [ev.__class__ for ev in
+             self.switches.get_topology_changes(version + 2)])
+        eq_(None, self.switches.get_topology_changes(version + 5))
+
+    def test_snapshot(self):
+        snapshot = self.switches.get_topology_snapshot()
+        eq_(2, snapshot.version)
+        eq_(set([1, 2]), set(snapshot.switches))
+        eq_(frozenset(), snapshot.links)
+        # Shared while the topology does not change.
+        ok_(snapshot is self.switches.get_topology_snapshot())
+
+        self.probe_round()
+        new_snapshot = self.switches.get_topology_snapshot()
+        eq_(4, new_snapshot.version)
+        eq_({(1, 2): (1, 1), (2, 1): (1, 1)}, new_snapshot.link_ports)
+        eq_(frozenset(), snapshot.links)
+
+        self.state_change(2, DEAD_DISPATCHER)
+        snapshot = self.switches.get_topology_snapshot()
+        eq_([1], list(snapshot.switches))
+        eq_(frozenset(), snapshot.links)
+
+    def test_app_manager_reloaded(self):
+        # As after cmd/test_manager.py reloaded app_manager.
+        with mock.patch.object(app_manager, 'RyuApp',
+                               type('RyuApp', (object,), {})):
+            self.switches = _switches()
+            eq_(0, self.switches.topology_version)
+            for dpid in (1, 2):
+                self.state_change(dpid, MAIN_DISPATCHER)
+            self.probe_round()
+        eq_(4, self.switches.topology_version)
+        eq_([event.EventSwitchEnter] * 2 + [event.EventLinkAdd] * 2,
+            [ev.__class__ for ev in self.switches.get_topology_changes(0)])
+        eq_(4, self.switches.get_topology_snapshot().version)
+
+
+if __name__ == '__main__':
+    unittest.main()
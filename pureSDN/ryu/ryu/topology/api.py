@@ -44,4 +44,25 @@ def get_all_host(app):
     return get_host(app)
 
 
+def get_topology(app):
+    """
+    Returns the current ryu.topology.switches.TopologySnapshot.
+
+    Unlike get_switch() and get_link(), the snapshot is read directly
+    from the switches application, without a request/reply round-trip.
+    Compare its version to skip work when nothing has changed.
+    """
+    return app_manager.lookup_service_brick('switches') \
+        .get_topology_snapshot()
+
+
+def get_topology_changes(app, version):
+    """
+    Returns the topology events since the snapshot *version*, or None if
+    they are no longer known and a new snapshot should be read.
+    """
+    return app_manager.lookup_service_brick('switches') \
+        .get_topology_changes(version)
+
+
 app_manager.require_app('ryu.topology.switches', api_style=True)
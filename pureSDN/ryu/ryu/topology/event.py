@@ -111,6 +111,20 @@ class EventLinkDelete(EventLinkBase):
         super(EventLinkDelete, self).__init__(link)
 
 
+class EventLinkDiscoveryConverged(event.EventBase):
+    # Sent when no new link was discovered for a while after switches or
+    # ports were added. time_to_topology is the time in seconds from the
+    # first of them until the last link was discovered.
+    def __init__(self, time_to_topology, links):
+        super(EventLinkDiscoveryConverged, self).__init__()
+        self.time_to_topology = time_to_topology
+        self.links = links
+
+    def __str__(self):
+        return '%s<time_to_topology=%.2f, links=%d>' % (
+            self.__class__.__name__, self.time_to_topology, self.links)
+
+
 class EventLinkRequest(event.EventRequestBase):
     # If dpid is None, reply all list
     def __init__(self, dpid=None):
@@ -19,7 +19,7 @@ import struct
 import time
 from ryu import cfg
 
-from collections import defaultdict
+from collections import defaultdict, deque
 from ryu.topology import event
 from ryu.base import app_manager
 from ryu.controller import ofp_event
@@ -53,7 +53,9 @@ CONF.register_cli_opts([
                 help='link discovery: explicitly install flow entry '
                      'to send lldp packet to controller'),
     cfg.BoolOpt('explicit-drop', default=True,
-                help='link discovery: explicitly drop lldp packet in')
+                help='link discovery: explicitly drop lldp packet in'),
+    cfg.IntOpt('lldp-send-rate', default=1000, min=1,
+               help='link discovery: lldp packets sent per second at most')
 ])
 
 
@@ -198,24 +200,32 @@ class HostState(dict):
         self.setdefault(mac, host)
 
     def update_ip(self, host, ip_v4=None, ip_v6=None):
+        # returns True if a new address was learned
         mac = host.mac
         host = None
         if mac in self:
             host = self[mac]
 
         if not host:
-            return
+            return False
 
+        learned = False
         if ip_v4 is not None:
             if ip_v4 in host.ipv4:
                 host.ipv4.remove(ip_v4)
+            else:
+                learned = True
             host.ipv4.append(ip_v4)
 
         if ip_v6 is not None:
             if ip_v6 in host.ipv6:
                 host.ipv6.remove(ip_v6)
+            else:
+                learned = True
             host.ipv6.append(ip_v6)
 
+        return learned
+
     def get_by_dpid(self, dpid):
         result = []
 
@@ -227,6 +237,27 @@ class HostState(dict):
         return result
 
 
+class TopologySnapshot(object):
+    # The topology known to Switches at one version, built by
+    # Switches.get_topology_snapshot(). Snapshots are shared by all the
+    # readers, they must not be modified.
+    def __init__(self, version, switches, links, hosts):
+        super(TopologySnapshot, self).__init__()
+        self.version = version
+        self.switches = switches    # dict: datapath_id -> Switch class
+        self.links = links          # frozenset of Link class
+        self.hosts = hosts          # tuple of Host class
+        # dict: (src dpid, dst dpid) -> (src port_no, dst port_no)
+        self.link_ports = dict(
+            ((link.src.dpid, link.dst.dpid),
+             (link.src.port_no, link.dst.port_no)) for link in links)
+
+    def __str__(self):
+        return 'TopologySnapshot<version=%d, switches=%d, links=%d, ' \
+            'hosts=%d>' % (self.version, len(self.switches),
+                           len(self.links), len(self.hosts))
+
+
 class PortState(dict):
     # dict: int port_no -> OFPPort port
     # OFPPort is defined in ryu.ofproto.ofproto_v1_X_parser
@@ -250,8 +281,12 @@ class PortData(object):
         self.lldp_data = lldp_data
         self.timestamp = None
         self.sent = 0
+        self.period = None  # send period, None until the link is stable
 
     def lldp_sent(self):
+        if self.sent:
+            # the previous probe went unanswered, probe at the base period
+            self.period = None
         self.timestamp = time.time()
         self.sent += 1
 
@@ -261,15 +296,19 @@ class PortData(object):
     def lldp_dropped(self):
         return self.sent
 
+    def lldp_backoff(self, period, period_max):
+        self.period = min((self.period or period) * 2, period_max)
+
     def clear_timestamp(self):
         self.timestamp = None
+        self.period = None
 
     def set_down(self, is_down):
         self.is_down = is_down
 
     def __str__(self):
-        return 'PortData<live=%s, timestamp=%s, sent=%d>' \
-            % (not self.is_down, self.timestamp, self.sent)
+        return 'PortData<live=%s, timestamp=%s, sent=%d, period=%s>' \
+            % (not self.is_down, self.timestamp, self.sent, self.period)
 
 
 class PortDataState(dict):
@@ -503,6 +542,7 @@ class Switches(app_manager.RyuApp):
                event.EventPortAdd, event.EventPortDelete,
                event.EventPortModify,
                event.EventLinkAdd, event.EventLinkDelete,
+               event.EventLinkDiscoveryConverged,
                event.EventHostAdd]
 
     DEFAULT_TTL = 120  # unused. ignored.
@@ -512,6 +552,18 @@ class Switches(app_manager.RyuApp):
     LLDP_SEND_PERIOD_PER_PORT = .9
     TIMEOUT_CHECK_PERIOD = 5.
     LINK_TIMEOUT = TIMEOUT_CHECK_PERIOD * 2
+    # The send period of a port doubles while its link is stable, and is
+    # reset once one of its probes is unanswered for the base period.
+    LLDP_SEND_PERIOD_MAX = LINK_TIMEOUT / 4
+    # Discovery has converged when no link was found for this long.
+    LLDP_SETTLE_TIME = LLDP_SEND_PERIOD_PER_PORT * 2
+    # Topology changes kept for get_topology_changes().
+    TOPOLOGY_CHANGES_MAX = 4096
+    _TOPOLOGY_EVENTS = (event.EventSwitchEnter, event.EventSwitchLeave,
+                        event.EventPortAdd, event.EventPortDelete,
+                        event.EventPortModify,
+                        event.EventLinkAdd, event.EventLinkDelete,
+                        event.EventHostAdd, event.EventHostMove)
 
     def __init__(self, *args, **kwargs):
         super(Switches, self).__init__(*args, **kwargs)
@@ -524,10 +576,24 @@ class Switches(app_manager.RyuApp):
         self.hosts = HostState()      # mac address -> Host class list
         self.is_active = True
 
+        self.topology_version = 0
+        # (version, topology event) of the latest changes
+        self._topology_changes = deque(maxlen=self.TOPOLOGY_CHANGES_MAX)
+        self._topology_snapshot = None
+
         self.link_discovery = self.CONF.observe_links
         if self.link_discovery:
             self.install_flow = self.CONF.install_lldp_flow
             self.explicit_drop = self.CONF.explicit_drop
+            self.lldp_send_rate = self.CONF.lldp_send_rate
+            self._lldp_send_time = 0
+            # Start of the current discovery, None once it has converged.
+            self.discovery_start = None
+            self.discovery_last_change = None
+            self.discovery_last_link = None
+            # Seconds from the start of the last converged discovery until
+            # its last link was found.
+            self.time_to_topology = None
             self.lldp_event = hub.Event()
             self.link_event = hub.Event()
             self.threads.append(hub.spawn(self.lldp_loop))
@@ -540,6 +606,54 @@ class Switches(app_manager.RyuApp):
             self.link_event.set()
             hub.joinall(self.threads)
 
+    def send_event_to_observers(self, ev, state=None):
+        if isinstance(ev, self._TOPOLOGY_EVENTS):
+            self._topology_changed(ev)
+        super(Switches, self).send_event_to_observers(ev, state)
+
+    def _topology_changed(self, ev):
+        self.topology_version += 1
+        self._topology_changes.append((self.topology_version, ev))
+
+    def get_topology_snapshot(self):
+        """
+        Returns the TopologySnapshot of the current topology version.
+
+        The snapshot is only rebuilt when the topology has changed since
+        the last call.
+        """
+        snapshot = self._topology_snapshot
+        if snapshot is None or snapshot.version != self.topology_version:
+            switches = dict((dpid, self._get_switch(dpid))
+                            for dpid in self.dps)
+            hosts = []
+            for host in self.hosts.values():
+                copied = Host(host.mac, host.port)
+                copied.ipv4 = list(host.ipv4)
+                copied.ipv6 = list(host.ipv6)
+                hosts.append(copied)
+            snapshot = TopologySnapshot(self.topology_version, switches,
+                                        frozenset(self.links), tuple(hosts))
+            self._topology_snapshot = snapshot
+        return snapshot
+
+    def get_topology_changes(self, version):
+        """
+        Returns the list of topology events (EventSwitchEnter,
+        EventLinkAdd, ...) since *version*, oldest first.
+
+        EventHostAdd of a known host means that it got a new address.
+        Returns None if the changes are no longer kept, the caller should
+        then read a snapshot.
+        """
+        if version == self.topology_version:
+            return []
+        changes = self._topology_changes
+        if (version > self.topology_version or not changes or
+                changes[0][0] > version + 1):
+            return None
+        return [ev for (v, ev) in changes if v > version]
+
     def _register(self, dp):
         assert dp.id is not None
 
@@ -573,6 +687,7 @@ class Switches(app_manager.RyuApp):
         lldp_data = LLDPPacket.lldp_packet(
             port.dpid, port.port_no, port.hw_addr, self.DEFAULT_TTL)
         self.ports.add_port(port, lldp_data)
+        self._discovery_changed()
         # LOG.debug('_port_added dpid=%s, port_no=%s, live=%s',
         #           port.dpid, port.port_no, port.is_live())
 
@@ -591,6 +706,37 @@ class Switches(app_manager.RyuApp):
             self.send_event_to_observers(event.EventLinkDelete(rev_link))
             self.ports.move_front(rev_link_dst)
 
+    def _discovery_changed(self, link_added=False):
+        now = time.time()
+        if self.discovery_start is None:
+            self.discovery_start = now
+            self.discovery_last_link = None
+        self.discovery_last_change = now
+        if link_added:
+            self.discovery_last_link = now
+
+    def _check_discovery(self, now):
+        # Returns the seconds until discovery may converge, or None.
+        if self.discovery_start is None:
+            return None
+        for data in self.ports.values():
+            if data.timestamp is None and not data.is_down:
+                # not probed yet
+                return None
+        settle = self.discovery_last_change + self.LLDP_SETTLE_TIME - now
+        if settle > 0:
+            return settle
+
+        self.time_to_topology = (
+            (self.discovery_last_link or self.discovery_start) -
+            self.discovery_start)
+        self.discovery_start = None
+        LOG.info('link discovery converged: %d links in %.2f s',
+                 len(self.links), self.time_to_topology)
+        self.send_event_to_observers(event.EventLinkDiscoveryConverged(
+            self.time_to_topology, len(self.links)))
+        return None
+
     def _is_edge_port(self, port):
         for link in self.links:
             if port == link.src or port == link.dst:
@@ -810,8 +956,10 @@ class Switches(app_manager.RyuApp):
         # LOG.debug("  dst=%s", dst)
 
         link = Link(src, dst)
-        if link not in self.links:
+        stable = link in self.links
+        if not stable:
             self.send_event_to_observers(event.EventLinkAdd(link))
+            self._discovery_changed(link_added=True)
 
             # remove hosts if it's not attached to edge port
             host_to_del = []
@@ -827,6 +975,14 @@ class Switches(app_manager.RyuApp):
             # So schedule the check early because it's very likely it's up
             self.ports.move_front(dst)
             self.lldp_event.set()
+        elif stable:
+            # Both directions are up since the last probe, probe both
+            # ports less often unless a probe of theirs is unanswered.
+            for port in (src, dst):
+                port_data = self.ports.get(port)
+                if port_data is not None and not port_data.lldp_dropped():
+                    port_data.lldp_backoff(self.LLDP_SEND_PERIOD_PER_PORT,
+                                           self.LLDP_SEND_PERIOD_MAX)
         if self.explicit_drop:
             self._drop_packet(msg)
 
@@ -870,52 +1026,88 @@ class Switches(app_manager.RyuApp):
             self.hosts[host_mac] = host
             self.send_event_to_observers(ev)
 
+        learned = False
         # arp packet, update ip address
         if eth.ethertype == ether_types.ETH_TYPE_ARP:
             arp_pkt, _, _ = pkt_type.parser(pkt_data)
-            self.hosts.update_ip(host, ip_v4=arp_pkt.src_ip)
+            learned = self.hosts.update_ip(host, ip_v4=arp_pkt.src_ip)
 
         # ipv4 packet, update ipv4 address
         elif eth.ethertype == ether_types.ETH_TYPE_IP:
             ipv4_pkt, _, _ = pkt_type.parser(pkt_data)
-            self.hosts.update_ip(host, ip_v4=ipv4_pkt.src)
+            learned = self.hosts.update_ip(host, ip_v4=ipv4_pkt.src)
 
         # ipv6 packet, update ipv6 address
         elif eth.ethertype == ether_types.ETH_TYPE_IPV6:
             # TODO: need to handle NDP
             ipv6_pkt, _, _ = pkt_type.parser(pkt_data)
-            self.hosts.update_ip(host, ip_v6=ipv6_pkt.src)
+            learned = self.hosts.update_ip(host, ip_v6=ipv6_pkt.src)
 
-    def send_lldp_packet(self, port):
+        if learned:
+            self._topology_changed(event.EventHostAdd(self.hosts[host_mac]))
+
+    def _lldp_packet_out(self, port):
         try:
             port_data = self.ports.lldp_sent(port)
         except KeyError:
             # ports can be modified during our sleep in self.lldp_loop()
             # LOG.debug('send_lld error', exc_info=True)
-            return
+            return None
         if port_data.is_down:
-            return
+            return None
 
         dp = self.dps.get(port.dpid, None)
         if dp is None:
             # datapath was already deleted
-            return
+            return None
 
         # LOG.debug('lldp sent dpid=%s, port_no=%d', dp.id, port.port_no)
         # TODO:XXX
         if dp.ofproto.OFP_VERSION == ofproto_v1_0.OFP_VERSION:
             actions = [dp.ofproto_parser.OFPActionOutput(port.port_no)]
-            dp.send_packet_out(actions=actions, data=port_data.lldp_data)
+            return dp.ofproto_parser.OFPPacketOut(
+                dp, 0xffffffff, dp.ofproto.OFPP_NONE, actions,
+                port_data.lldp_data)
         elif dp.ofproto.OFP_VERSION >= ofproto_v1_2.OFP_VERSION:
             actions = [dp.ofproto_parser.OFPActionOutput(port.port_no)]
-            out = dp.ofproto_parser.OFPPacketOut(
+            return dp.ofproto_parser.OFPPacketOut(
                 datapath=dp, in_port=dp.ofproto.OFPP_CONTROLLER,
                 buffer_id=dp.ofproto.OFP_NO_BUFFER, actions=actions,
                 data=port_data.lldp_data)
-            dp.send_msg(out)
         else:
             LOG.error('cannot send lldp packet. unsupported version. %x',
                       dp.ofproto.OFP_VERSION)
+            return None
+
+    def send_lldp_packet(self, port):
+        out = self._lldp_packet_out(port)
+        if out is not None:
+            out.datapath.send_msg(out)
+
+    def send_lldp_packets(self, ports):
+        """
+        Send LLDP packets out of *ports*.
+
+        The packet-outs are sent in bursts of one send guard interval
+        worth of lldp_send_rate, each burst as one write per datapath.
+        """
+        burst = max(1, int(self.lldp_send_rate * self.LLDP_SEND_GUARD))
+        for i in range(0, len(ports), burst):
+            delay = self._lldp_send_time - time.time()
+            if delay > 0:
+                hub.sleep(delay)      # don't burst
+
+            outs = {}   # Datapath class -> [OFPPacketOut,]
+            for port in ports[i:i + burst]:
+                out = self._lldp_packet_out(port)
+                if out is not None:
+                    outs.setdefault(out.datapath, []).append(out)
+            for dp, msgs in outs.items():
+                dp.send_msgs(msgs)
+
+            self._lldp_send_time = (max(self._lldp_send_time, time.time()) +
+                                    float(len(ports[i:i + burst])) /
+                                    self.lldp_send_rate)
 
     def lldp_loop(self):
         while self.is_active:
@@ -923,29 +1115,35 @@ class Switches(app_manager.RyuApp):
 
             now = time.time()
             timeout = None
-            ports_now = []
             ports = []
             for (key, data) in self.ports.items():
                 if data.timestamp is None:
-                    ports_now.append(key)
+                    ports.append(key)
                     continue
 
-                expire = data.timestamp + self.LLDP_SEND_PERIOD_PER_PORT
-                if expire <= now:
+                if data.sent:
+                    # the last probe is unanswered yet, so don't wait for
+                    # a backed off period before probing again.
+                    expire = data.timestamp + self.LLDP_SEND_PERIOD_PER_PORT
+                else:
+                    expire = data.timestamp + (data.period or
+                                               self.LLDP_SEND_PERIOD_PER_PORT)
+                # ports expiring within the guard interval are sent now,
+                # so that they keep being sent in the same bursts.
+                if expire <= now + self.LLDP_SEND_GUARD:
                     ports.append(key)
                     continue
 
-                timeout = expire - now
-                break
+                if timeout is None or expire - now < timeout:
+                    timeout = expire - now
 
-            for port in ports_now:
-                self.send_lldp_packet(port)
-            for port in ports:
-                self.send_lldp_packet(port)
-                hub.sleep(self.LLDP_SEND_GUARD)      # don't burst
+            self.send_lldp_packets(ports)
 
+            settle = self._check_discovery(time.time())
+            if settle is not None and (timeout is None or settle < timeout):
+                timeout = settle
             if timeout is not None and ports:
-                timeout = 0     # We have already slept
+                timeout = max(0, timeout - (time.time() - now))
             # LOG.debug('lldp sleep %s', timeout)
             self.lldp_event.wait(timeout=timeout)
 